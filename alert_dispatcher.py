@@ -0,0 +1,321 @@
+# alert_dispatcher.py
+#
+# Long-lived alert sender. Alerts are submitted from any thread into a bounded
+# queue, coalesced into as few messages as possible, and sent through a
+# transport that stays connected between runs. Each route (channel) has a
+# send budget so bursts don't run into Discord's rate limits; a 429 is retried
+# with backoff. FakeDiscordTransport lets all of this run offline.
+
+import time
+import asyncio
+import threading
+from collections import deque
+
+from config import (
+    ALERT_QUEUE_SIZE, ALERT_COALESCE_SECONDS, ALERT_MAX_WAIT_SECONDS,
+    ALERT_ROUTE_LIMIT, ALERT_ROUTE_PERIOD_SECONDS, ALERT_MAX_RETRIES
+)
+
+DISCORD_MESSAGE_LIMIT = 2000
+_STOP = object()
+
+
+class RateLimited(Exception):
+    """Raised by a transport when the server answered 429."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"rate limited, retry after {retry_after:.2f}s")
+        self.retry_after = retry_after
+
+
+class RouteBudget:
+    """Sliding-window budget: at most `limit` sends per `period` seconds on one route."""
+
+    def __init__(self, limit=ALERT_ROUTE_LIMIT, period=ALERT_ROUTE_PERIOD_SECONDS):
+        self.limit = limit
+        self.period = period
+        self.sent = deque()
+        self.blocked_until = 0.0
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            if now < self.blocked_until:
+                await asyncio.sleep(self.blocked_until - now)
+                continue
+            while self.sent and now - self.sent[0] >= self.period:
+                self.sent.popleft()
+            if len(self.sent) < self.limit:
+                self.sent.append(now)
+                return
+            await asyncio.sleep(self.period - (now - self.sent[0]))
+
+    def penalize(self, retry_after):
+        self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+
+
+def coalesce(contents, limit=DISCORD_MESSAGE_LIMIT):
+    """Packs alert texts into as few messages as fit under the Discord length limit."""
+    messages, current = [], ""
+    for content in contents:
+        content = content[:limit]
+        candidate = f"{current}\n\n{content}" if current else content
+        if len(candidate) > limit:
+            messages.append(current)
+            current = content
+        else:
+            current = candidate
+    if current:
+        messages.append(current)
+    return messages
+
+
+class FakeDiscordTransport:
+    """
+    Local stand-in for Discord: fixed network latency, a server-side
+    per-route limit that answers with RateLimited, and a log of what was sent.
+    """
+
+    default_route = "fake-channel"
+
+    def __init__(self, latency=0.05, limit=ALERT_ROUTE_LIMIT, period=ALERT_ROUTE_PERIOD_SECONDS):
+        self.latency = latency
+        self.limit = limit
+        self.period = period
+        self.sent = []
+        self.rejected = 0
+        self._windows = {}
+
+    async def connect(self):
+        await asyncio.sleep(self.latency)
+
+    async def send(self, route, content):
+        await asyncio.sleep(self.latency)
+        now = time.monotonic()
+        window = self._windows.setdefault(route, deque())
+        while window and now - window[0] >= self.period:
+            window.popleft()
+        if len(window) >= self.limit:
+            self.rejected += 1
+            raise RateLimited(self.period - (now - window[0]))
+        window.append(now)
+        self.sent.append((route, content, now))
+
+    async def close(self):
+        pass
+
+
+class DiscordTransport:
+    """Keeps one discord.Client logged in for the life of the dispatcher."""
+
+    def __init__(self, client, token, channel_id):
+        self.client = client
+        self.token = token
+        self.default_route = channel_id
+        self._task = None
+
+    async def connect(self):
+        if self.client.is_closed():
+            self.client.clear()
+        # login() sets the client up on this loop (wait_until_ready needs that) and checks the token
+        await self.client.login(self.token)
+        self._task = asyncio.create_task(self.client.connect())
+        ready = asyncio.create_task(self.client.wait_until_ready())
+        await asyncio.wait({ready, self._task}, return_when=asyncio.FIRST_COMPLETED)
+        if not ready.done():
+            # The gateway connection ended before it was ready
+            ready.cancel()
+            self._task.result()
+            raise ConnectionError("Discord connection closed before it was ready")
+
+    async def send(self, route, content):
+        import discord
+
+        channel = self.client.get_channel(route) or await self.client.fetch_channel(route)
+        try:
+            await channel.send(content)
+        except discord.HTTPException as e:
+            if e.status == 429:
+                raise RateLimited(float(getattr(e, "retry_after", 1.0) or 1.0))
+            raise
+
+    async def close(self):
+        await self.client.close()
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+
+
+class AlertDispatcher:
+
+    def __init__(self, transport, queue_size=ALERT_QUEUE_SIZE, coalesce_seconds=ALERT_COALESCE_SECONDS,
+                 max_wait=ALERT_MAX_WAIT_SECONDS, route_limit=ALERT_ROUTE_LIMIT,
+                 route_period=ALERT_ROUTE_PERIOD_SECONDS, max_retries=ALERT_MAX_RETRIES):
+        self.transport = transport
+        self.queue_size = queue_size
+        self.coalesce_seconds = coalesce_seconds
+        self.max_wait = max_wait
+        self.route_limit = route_limit
+        self.route_period = route_period
+        self.max_retries = max_retries
+        self.budgets = {}
+        self.latencies = deque(maxlen=1000)
+        self.stats = {"submitted": 0, "dropped": 0, "alerts_sent": 0, "messages": 0, "rate_limited": 0, "failed": 0}
+        self._loop = None
+        self._queue = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._error = None
+
+    # --- Thread-facing API ---
+
+    def start(self):
+        """Connects the transport on a background event loop; returns once it is ready."""
+        self._thread = threading.Thread(target=self._run_loop, name="alert-dispatcher", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            # The loop has already shut down; let the caller fall back
+            self._thread.join()
+            self._thread = None
+            raise self._error
+        return self
+
+    def submit(self, content, route=None):
+        """Queues one alert. Waits up to max_wait for queue space, then drops it."""
+        self.stats["submitted"] += 1
+        if self._thread is None or not self._thread.is_alive() or self._loop.is_closed():
+            self.stats["dropped"] += 1
+            print("[DISCORD ❌] Alert dispatcher is not running; alert dropped.")
+            return False
+        item = (content, route or self.transport.default_route, time.monotonic())
+        future = None
+        try:
+            future = asyncio.run_coroutine_threadsafe(self._queue.put(item), self._loop)
+            future.result(timeout=self.max_wait)
+            return True
+        except Exception:
+            # The put may have landed just as the wait ran out
+            if future is not None and not future.cancel() and future.done() and future.exception() is None:
+                return True
+            self.stats["dropped"] += 1
+            print("[DISCORD ❌] Alert queue full; alert dropped.")
+            return False
+
+    def stop(self, timeout=30):
+        """Flushes everything already queued, then disconnects."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        asyncio.run_coroutine_threadsafe(self._queue.put(_STOP), self._loop)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def summary(self):
+        ordered = sorted(self.latencies)
+        p50 = ordered[len(ordered) // 2] if ordered else 0.0
+        p95 = ordered[int(len(ordered) * 0.95)] if ordered else 0.0
+        return dict(self.stats, latency_p50_s=round(p50, 3), latency_p95_s=round(p95, 3))
+
+    # --- Event loop side ---
+
+    def _run_loop(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._main())
+        finally:
+            self._loop.close()
+
+    async def _main(self):
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        try:
+            await self.transport.connect()
+        except Exception as e:
+            # Handed to start(), which re-raises it on the caller's thread
+            self._error = e
+            await asyncio.gather(self.transport.close(), return_exceptions=True)
+            return
+        finally:
+            self._ready.set()
+        try:
+            await self._worker()
+        finally:
+            await self.transport.close()
+
+    async def _worker(self):
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is _STOP:
+                break
+
+            # Gather more alerts until the queue is quiet for coalesce_seconds,
+            # but never hold the first one longer than max_wait
+            batch = [first]
+            deadline = first[2] + self.max_wait
+            while True:
+                timeout = min(self.coalesce_seconds, deadline - time.monotonic())
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            await self._send_batch(batch)
+
+    async def _send_batch(self, batch):
+        routes = {}
+        for content, route, queued_at in batch:
+            routes.setdefault(route, []).append((content, queued_at))
+
+        for route, items in routes.items():
+            budget = self.budgets.setdefault(route, RouteBudget(self.route_limit, self.route_period))
+            delivered = True
+            for message in coalesce([content for content, _ in items]):
+                if await self._send_with_retry(budget, route, message):
+                    self.stats["messages"] += 1
+                else:
+                    delivered = False
+            if delivered:
+                sent_at = time.monotonic()
+                self.stats["alerts_sent"] += len(items)
+                self.latencies.extend(sent_at - queued_at for _, queued_at in items)
+
+    async def _send_with_retry(self, budget, route, message):
+        delay = 0.5
+        for attempt in range(self.max_retries + 1):
+            await budget.acquire()
+            try:
+                await self.transport.send(route, message)
+                return True
+            except RateLimited as e:
+                self.stats["rate_limited"] += 1
+                budget.penalize(max(e.retry_after, delay))
+                delay *= 2
+            except Exception as e:
+                print(f"[DISCORD ❌] Failed to send alert: {e}")
+                await asyncio.sleep(delay)
+                delay *= 2
+        self.stats["failed"] += 1
+        return False
+
+
+def measure_fake_throughput(alerts=100, latency=0.05, **dispatcher_kwargs):
+    """Pushes a burst of alerts through a FakeDiscordTransport and returns the dispatcher summary."""
+    transport = FakeDiscordTransport(latency=latency)
+    dispatcher = AlertDispatcher(transport, **dispatcher_kwargs).start()
+    started = time.monotonic()
+    for i in range(alerts):
+        dispatcher.submit(f"📈 **SYM{i}**: **Bullish**\n- EMA: ✔️\n- VWAP: Above\n- MACD: Positive")
+    dispatcher.stop()
+    result = dispatcher.summary()
+    result.update(elapsed_s=round(time.monotonic() - started, 3), server_rejections=transport.rejected)
+    return result
+
+
+if __name__ == "__main__":
+    print(measure_fake_throughput())
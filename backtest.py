@@ -0,0 +1,268 @@
+# backtest.py
+#
+# Walk-forward replay of stored bars through the live decision path:
+# analyze_signals -> score_signals -> evaluate_entry_conditions -> 0.5% trigger,
+# with the trend/entry rules applied through their compiled form (rules.py).
+# The live run only analyzes its DEFAULT_PERIOD window ("1d": today's session),
+# so its indicators restart with every session and the first 30 bars of a
+# session are "Not enough data". session_indicators() reproduces that: bar t
+# sees the bars of its own lookback window up to t, exactly as if the bot had
+# run at that bar. The windows are computed as extra panel columns, so this is
+# still one compute_indicator_panel() pass per session offset (one for "1d").
+# --lookback max runs the indicators over the whole series instead. Long-term
+# trend confirmation is not applied.
+#
+#   python backtest.py --provider replay --interval 5m --period 60d
+
+import os
+import argparse
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from config import (
+    DEFAULT_INTERVAL, STOCK_LIST_PATH, BACKTEST_PERIOD, BACKTEST_PROVIDER, BACKTEST_TRIGGER_WINDOW_BARS,
+    BACKTEST_HORIZONS, BACKTEST_FOLDS, BACKTEST_OUTPUT_PATH, BACKTEST_LOOKBACK
+)
+from price_data import get_price_data_many, set_price_provider
+from signals import build_panel, compute_indicator_panel, signals_from_indicators, ewm_panel
+from rules import get_compiled_rules
+
+BUFFER = 0.005  # Same 0.5% trigger buffer main.py queues entries with
+TREND_LABELS = {1: "Bullish", -1: "Bearish"}
+
+
+def _shift_up(values, k):
+    """values[t + k] at row t; NaN past the end."""
+    out = np.full(values.shape, np.nan)
+    if k < len(values):
+        out[:len(values) - k] = values[k:]
+    return out
+
+
+def _aligned_timestamps(frames, symbols, length):
+    """Bar timestamps laid out like build_panel(): each symbol's bars pushed to the bottom."""
+    stamps = np.full((length, len(symbols)), np.datetime64("NaT"), dtype="datetime64[ns]")
+    for j, symbol in enumerate(symbols):
+        index = pd.DatetimeIndex(frames[symbol].index).to_numpy(dtype="datetime64[ns]")
+        stamps[length - len(index):, j] = index
+    return stamps
+
+
+def lookback_sessions(lookback):
+    """Sessions a yfinance-style "Nd" window spans; None (no restart) for anything else."""
+    if not lookback or not lookback.endswith("d") or not lookback[:-1].isdigit():
+        return None
+    return max(int(lookback[:-1]), 1)
+
+
+def session_indicators(frames, symbols, length, lookback=BACKTEST_LOOKBACK, ema_windows=()):
+    """
+    compute_indicator_panel() arrays laid out like build_panel(), where each
+    bar's indicators only see the bars of its `lookback` window ("Nd": the
+    last N sessions up to and including the bar's own), as the live run
+    does. "bars" counts bars inside that window. ema_windows adds ema<w>
+    arrays computed the same way.
+
+    For N sessions, pass r splits each symbol's sessions into consecutive
+    blocks of N starting at session r; a bar is taken from the pass whose
+    block ends with its session. Every block is its own panel column.
+    """
+    sessions = lookback_sessions(lookback)
+    shape = (length, len(symbols))
+    names = ["close", "volume", "ema9", "ema21", "vwap", "macd_hist", "rsi", "avg_vol"]
+    names += [f"ema{w}" for w in ema_windows if f"ema{w}" not in names]
+    out = {name: np.full(shape, np.nan) for name in names}
+    out["bars"] = np.zeros(shape, dtype=int)
+
+    for offset in range(sessions or 1):
+        columns = []  # (symbol column, bar positions in the frame, positions kept)
+        for j, symbol in enumerate(symbols):
+            index = frames[symbol].index
+            if sessions is None:
+                codes, n = np.zeros(len(index), dtype=int), 1
+            else:
+                codes, n = pd.factorize(index.normalize())[0], sessions
+            block = (codes - offset) // n
+            keep = (codes - offset) % n == n - 1
+            for positions in np.split(np.arange(len(index)), np.flatnonzero(np.diff(block)) + 1):
+                if keep[positions].any():
+                    columns.append((j, positions, keep[positions]))
+        if not columns:
+            continue
+
+        rows = max(len(positions) for _, positions, _ in columns)
+        bars = {field: np.full((rows, len(columns)), np.nan) for field in ("Close", "High", "Low", "Volume")}
+        for c, (j, positions, _) in enumerate(columns):
+            df = frames[symbols[j]]
+            for field in bars:
+                bars[field][rows - len(positions):, c] = df[field].to_numpy(dtype=float)[positions]
+        ind = compute_indicator_panel(bars["Close"], bars["High"], bars["Low"], bars["Volume"])
+        for w in ema_windows:
+            if f"ema{w}" not in ind:
+                ind[f"ema{w}"] = ewm_panel(ind["close"], 2 / (w + 1), w)
+
+        # Panel cell -> output cell, for the bars this pass owns
+        src_rows, src_cols, dst_rows, dst_cols = [], [], [], []
+        for c, (j, positions, kept) in enumerate(columns):
+            first = rows - len(positions)
+            src_rows.append(first + np.flatnonzero(kept))
+            src_cols.append(np.full(kept.sum(), c))
+            dst_rows.append(length - len(frames[symbols[j]]) + positions[kept])
+            dst_cols.append(np.full(kept.sum(), j))
+        src = (np.concatenate(src_rows), np.concatenate(src_cols))
+        dst = (np.concatenate(dst_rows), np.concatenate(dst_cols))
+        for name in out:
+            out[name][dst] = ind[name][src]
+    return out
+
+
+def simulate(frames, window=BACKTEST_TRIGGER_WINDOW_BARS, horizons=BACKTEST_HORIZONS, lookback=BACKTEST_LOOKBACK):
+    """
+    Runs every bar of every symbol through the strategy. Returns one row per
+    entry signal: trend, trigger, whether/when price broke the trigger within
+    `window` bars, and the direction-adjusted return `h` bars after the fill.
+    Indicators restart with each `lookback` window (session_indicators()).
+    """
+    panel = build_panel(frames)
+    if panel.empty:
+        return pd.DataFrame()
+
+    symbols = list(panel["Close"].columns)
+    close = panel["Close"][symbols].to_numpy()
+    high = panel["High"][symbols].to_numpy()
+    low = panel["Low"][symbols].to_numpy()
+
+    ind = session_indicators(frames, symbols, len(close), lookback)
+    signals = signals_from_indicators(ind, slice(None))
+    stamps = _aligned_timestamps(frames, symbols, len(close))
+    return simulate_signals(symbols, stamps, close, high, low, signals, ind["bars"] >= 30, window, horizons)
+
+
+def simulate_signals(symbols, stamps, close, high, low, signals, enough, window=BACKTEST_TRIGGER_WINDOW_BARS,
+                     horizons=BACKTEST_HORIZONS, buffer=BUFFER, rules=None):
+    """
+    The part of simulate() after the indicators: trend, entry, trigger and
+    fills for panel-shaped signal arrays. `rules` defaults to the compiled
+    config rules; sweep.py passes its own along with the buffer.
+    """
+    rules = rules or get_compiled_rules()
+    masks = rules.pack(signals)
+    trend = rules.classify(masks, enough)
+    entry = rules.entries(masks, trend) & ~np.isnan(close)
+
+    bullish, bearish = entry & (trend == 1), entry & (trend == -1)
+    trigger = np.where(bullish, np.round(high * (1 + buffer), 2), np.round(low * (1 - buffer), 2))
+
+    # First bar after the signal whose range crosses the trigger
+    fill_offset = np.zeros(close.shape, dtype=int)
+    for k in range(1, window + 1):
+        crossed = (bullish & (_shift_up(high, k) >= trigger)) | (bearish & (_shift_up(low, k) <= trigger))
+        fill_offset = np.where((fill_offset == 0) & crossed, k, fill_offset)
+
+    rows, cols = np.nonzero(entry)
+    offsets = fill_offset[rows, cols]
+    direction = trend[rows, cols]
+    entry_price = trigger[rows, cols]
+    fill_rows = rows + offsets
+
+    trades = pd.DataFrame({
+        "Symbol": np.asarray(symbols)[cols],
+        "Signal Time": stamps[rows, cols],
+        "Trend": np.where(direction == 1, TREND_LABELS[1], TREND_LABELS[-1]),
+        "Trigger Price": entry_price,
+        "Triggered": offsets > 0,
+        "Entry Time": np.where(offsets > 0, stamps[np.minimum(fill_rows, len(close) - 1), cols], np.datetime64("NaT")),
+    })
+    for h in horizons:
+        exit_rows = fill_rows + h
+        in_range = (offsets > 0) & (exit_rows < len(close))
+        exit_close = np.full(len(rows), np.nan)
+        exit_close[in_range] = close[exit_rows[in_range], cols[in_range]]
+        trades[f"Return {h}"] = (exit_close / entry_price - 1) * direction * 100
+    return trades.sort_values(["Signal Time", "Symbol"], ignore_index=True)
+
+
+def summarize(trades, horizons=BACKTEST_HORIZONS):
+    """Hit rate and forward-return stats for a block of simulate() rows."""
+    triggered = trades[trades["Triggered"]] if not trades.empty else trades
+    summary = {
+        "signals": len(trades),
+        "bullish": int((trades["Trend"] == "Bullish").sum()) if not trades.empty else 0,
+        "bearish": int((trades["Trend"] == "Bearish").sum()) if not trades.empty else 0,
+        "triggered": len(triggered),
+        "hit_rate": round(len(triggered) / len(trades), 3) if len(trades) else None,
+    }
+    for h in horizons:
+        returns = triggered[f"Return {h}"].dropna() if not triggered.empty else pd.Series(dtype=float)
+        summary[f"ret{h}_n"] = len(returns)
+        summary[f"ret{h}_mean_pct"] = round(float(returns.mean()), 3) if len(returns) else None
+        summary[f"ret{h}_win_rate"] = round(float((returns > 0).mean()), 3) if len(returns) else None
+    return summary
+
+
+def walk_forward(trades, folds=BACKTEST_FOLDS, horizons=BACKTEST_HORIZONS):
+    """Splits signals into `folds` consecutive time slices and summarizes each."""
+    if trades.empty or folds <= 1:
+        return []
+    times = trades["Signal Time"]
+    edges = pd.date_range(times.min(), times.max(), periods=folds + 1)
+    results = []
+    for i in range(folds):
+        last = i == folds - 1
+        mask = (times >= edges[i]) & ((times <= edges[i + 1]) if last else (times < edges[i + 1]))
+        results.append({"from": edges[i], "to": edges[i + 1], **summarize(trades[mask], horizons)})
+    return results
+
+
+def load_symbols(path):
+    return pd.read_csv(path)["Symbol"].dropna().astype(str).str.strip().str.upper().tolist()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Replay stored bars through the entry strategy.")
+    parser.add_argument("--interval", type=str, default=DEFAULT_INTERVAL)
+    parser.add_argument("--period", type=str, default=BACKTEST_PERIOD)
+    parser.add_argument("--provider", type=str, default=BACKTEST_PROVIDER)
+    parser.add_argument("--symbols", type=str, default=None, help="Comma-separated; defaults to the stock list")
+    parser.add_argument("--window", type=int, default=BACKTEST_TRIGGER_WINDOW_BARS, help="Bars a trigger stays live")
+    parser.add_argument("--horizons", type=str, default=",".join(str(h) for h in BACKTEST_HORIZONS))
+    parser.add_argument("--folds", type=int, default=BACKTEST_FOLDS)
+    parser.add_argument("--lookback", type=str, default=BACKTEST_LOOKBACK,
+                        help='Window the indicators see, like the live --period ("1d"); "max" for the whole series')
+    parser.add_argument("--out", type=str, default=BACKTEST_OUTPUT_PATH)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    horizons = [int(h) for h in args.horizons.split(",") if h.strip()]
+    symbols = [s.strip().upper() for s in args.symbols.split(",")] if args.symbols else load_symbols(STOCK_LIST_PATH)
+
+    set_price_provider(args.provider)
+    started = datetime.datetime.now()
+    frames = get_price_data_many(symbols, interval=args.interval, period=args.period)
+    loaded = datetime.datetime.now()
+    trades = simulate(frames, window=args.window, horizons=horizons, lookback=args.lookback)
+    finished = datetime.datetime.now()
+
+    bars = sum(len(df) for df in frames.values())
+    print(f"[BACKTEST] {len(frames)} symbols, {bars} bars: load {(loaded - started).total_seconds():.2f}s, "
+          f"simulate {(finished - loaded).total_seconds():.2f}s")
+    restart = f"every {args.lookback} window" if lookback_sessions(args.lookback) else "never (whole series)"
+    print(f"[BACKTEST] Indicators restart {restart}")
+    print(f"[BACKTEST] Overall: {summarize(trades, horizons)}")
+    for fold in walk_forward(trades, args.folds, horizons):
+        print(f"[BACKTEST] {fold['from']:%Y-%m-%d %H:%M} -> {fold['to']:%Y-%m-%d %H:%M}: "
+              f"{ {k: v for k, v in fold.items() if k not in ('from', 'to')} }")
+
+    if args.out and not trades.empty:
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        trades.to_csv(args.out, index=False)
+        print(f"[BACKTEST] Trades written to {args.out}")
+    return trades
+
+
+if __name__ == "__main__":
+    main()
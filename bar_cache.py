@@ -0,0 +1,252 @@
+# bar_cache.py
+
+import os
+import time
+import pandas as pd
+
+from config import BAR_CACHE_DIR, BAR_CACHE_MAX_AGE_DAYS, BAR_CACHE_MAX_MB, BAR_CACHE_FRESH_SECONDS
+from bars import BarBuffer, capacity_for
+
+
+def period_start(index, period):
+    """
+    Earliest bar time a yfinance-style period needs from a sorted DatetimeIndex,
+    or None when the period puts no bound on it.
+    "Nd" is the last N trading dates present; "wk"/"mo"/"y" are calendar offsets.
+    """
+    if len(index) == 0 or not period or period == "ytd":
+        return None
+    if period == "max":
+        return index[0]
+
+    number = "".join(ch for ch in period if ch.isdigit())
+    unit = period[len(number):]
+    n = int(number) if number else 1
+
+    if unit == "d":
+        return index.normalize().unique()[-n:][0]
+
+    offsets = {"wk": pd.DateOffset(weeks=n), "mo": pd.DateOffset(months=n), "y": pd.DateOffset(years=n)}
+    if unit not in offsets:
+        return None
+    return index[index.searchsorted(index[-1] - offsets[unit], side="right")]
+
+
+def trim_to_period(df, period):
+    """Cuts a bar frame back to a yfinance-style period (see period_start)."""
+    if df.empty or not period or period in ("max", "ytd"):
+        return df
+    start = period_start(df.index, period)
+    return df if start is None else df[df.index >= start]
+
+
+def covers_period(df, period):
+    """True when the cached bars (a frame, or just its DatetimeIndex) already reach back far enough for the period."""
+    index = df.index if isinstance(df, pd.DataFrame) else df
+    if len(index) == 0:
+        return False
+    if not period or period in ("max", "ytd"):
+        return False
+
+    number = "".join(ch for ch in period if ch.isdigit())
+    unit = period[len(number):]
+    n = int(number) if number else 1
+
+    if unit == "d":
+        return index.normalize().nunique() >= n
+
+    offsets = {"wk": pd.DateOffset(weeks=n), "mo": pd.DateOffset(months=n), "y": pd.DateOffset(years=n)}
+    if unit not in offsets:
+        return False
+    return index[0] <= pd.Timestamp.now() - offsets[unit]
+
+
+def _buffer_for(df, interval):
+    # Room for a quarter more than held, so a window longer than the default
+    # capacity (a long period) still takes the in-place path on later fetches
+    return BarBuffer.from_frame(df, max(capacity_for(interval), len(df) + len(df) // 4))
+
+
+class BarCache:
+    """
+    On-disk OHLCV store, one pickle per (provider, interval, symbol).
+    Bars are kept in memory after first load, as compact BarBuffers, so
+    long-running processes only touch disk on writes; load() hands out a
+    fresh DataFrame. Alongside the bars we keep synced_until: the
+    point up to which the network has been asked for bars, so gaps between
+    cached and locally derived bars can be told apart from market closures.
+    Bars are kept for max_age_days, or for the longest period ever stored for
+    the symbol when that reaches further back (retain), so long-period callers
+    don't re-download everything on each run.
+    """
+
+    def __init__(self, cache_dir=BAR_CACHE_DIR, max_age_days=BAR_CACHE_MAX_AGE_DAYS,
+                 max_mb=BAR_CACHE_MAX_MB, fresh_seconds=BAR_CACHE_FRESH_SECONDS):
+        self.cache_dir = cache_dir
+        self.max_age_days = max_age_days
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.fresh_seconds = fresh_seconds
+        self._bars = {}
+        self._fetched_at = {}
+        self._synced = {}
+        self._retain = {}
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = {"hits": 0, "partial": 0, "misses": 0, "bars_fetched": 0}
+
+    def record(self, kind, bars_fetched=0):
+        """kind is "hits" (served from cache), "partial" (incremental fetch) or "misses" (full fetch)."""
+        self.stats[kind] += 1
+        self.stats["bars_fetched"] += bars_fetched
+
+    def summary(self):
+        s = self.stats
+        return f"hits={s['hits']} partial={s['partial']} misses={s['misses']} bars_fetched={s['bars_fetched']}"
+
+    def _path(self, provider, interval, symbol):
+        return os.path.join(self.cache_dir, provider, interval, f"{symbol}.pkl")
+
+    def bars(self, provider, interval, symbol):
+        """The cached bars as a BarBuffer (read from disk on first use). Don't write to it."""
+        key = (provider, interval, symbol)
+        if key in self._bars:
+            return self._bars[key]
+
+        path = self._path(provider, interval, symbol)
+        df = pd.DataFrame()
+        if os.path.exists(path):
+            try:
+                payload = pd.read_pickle(path)
+                df = payload["bars"]
+                self._synced[key] = payload.get("synced_until")
+                self._retain[key] = payload.get("retain")
+                self._fetched_at[key] = os.path.getmtime(path)
+            except Exception as e:
+                print(f"[WARN] Discarding unreadable bar cache {path}: {e}")
+                os.remove(path)
+        self._bars[key] = _buffer_for(df, interval)
+        return self._bars[key]
+
+    def load(self, provider, interval, symbol):
+        return self.bars(provider, interval, symbol).to_frame()
+
+    def resident_bytes(self):
+        """Memory held by the in-memory bars."""
+        return sum(buffer.nbytes for buffer in self._bars.values())
+
+    def is_fresh(self, provider, interval, symbol):
+        """True when the symbol was fetched within fresh_seconds, so no new bar can exist yet."""
+        fetched_at = self._fetched_at.get((provider, interval, symbol))
+        return fetched_at is not None and time.time() - fetched_at < self.fresh_seconds
+
+    def synced_until(self, provider, interval, symbol):
+        self.load(provider, interval, symbol)
+        return self._synced.get((provider, interval, symbol))
+
+    def store(self, provider, interval, symbol, new_bars, synced_until=None, period=None):
+        """
+        Merges new bars into the cached frame (newest wins on duplicate timestamps) and persists it.
+        synced_until defaults to the newest fetched bar, i.e. "the network had nothing newer".
+        period is what the caller asked for; bars it needs are kept even past max_age_days.
+        """
+        key = (provider, interval, symbol)
+        buffer = self.bars(provider, interval, symbol)
+
+        if synced_until is None and not new_bars.empty:
+            synced_until = new_bars.index[-1]
+        if synced_until is not None:
+            synced_until = pd.Timestamp(synced_until)
+            previous = self._synced.get(key)
+            self._synced[key] = synced_until if previous is None else max(previous, synced_until)
+
+        if new_bars.empty:
+            # Nothing new: just remember that we asked
+            self._fetched_at[key] = time.time()
+            return buffer.to_frame()
+
+        # Usual incremental case: the fetch restamps the newest cached bars and
+        # continues from there, so it is written in place (newest wins). Anything
+        # else (gaps filled behind the window, revised history, unsorted input)
+        # is merged through pandas into a new buffer.
+        index = new_bars.index
+        overlap = buffer.overlap(index) if index.is_monotonic_increasing and index.is_unique else None
+        if overlap is not None and len(buffer) - overlap + len(index) <= buffer.capacity:
+            buffer.extend(index, {field: new_bars[field].to_numpy(dtype=float)
+                                  for field in buffer.fields if field in new_bars.columns})
+        else:
+            buffer = self._rebuild(key, buffer, new_bars)
+
+        if len(buffer) and self.max_age_days:
+            start = period_start(buffer.index(), period)
+            if start is not None:
+                span = buffer.last_time - start
+                previous = self._retain.get(key)
+                self._retain[key] = span if previous is None else max(previous, span)
+            keep = pd.Timedelta(days=self.max_age_days)
+            if self._retain.get(key) is not None:
+                keep = max(keep, self._retain[key])
+            buffer.drop_before(buffer.last_time - keep)
+
+        self._fetched_at[key] = time.time()
+        merged = buffer.to_frame()
+
+        path = self._path(provider, interval, symbol)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        pd.to_pickle({"bars": merged, "synced_until": self._synced.get(key), "retain": self._retain.get(key)}, path)
+        return merged
+
+    def _rebuild(self, key, buffer, new_bars):
+        """Slow path: merge through pandas (newest wins on duplicate timestamps) into a new buffer."""
+        cached = buffer.to_frame()
+        if cached.empty:
+            merged = new_bars.sort_index()
+        else:
+            merged = pd.concat([cached, new_bars])
+            merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+        self._bars[key] = _buffer_for(merged, key[1])
+        return self._bars[key]
+
+    def evict(self):
+        """Deletes files untouched for max_age_days, then the oldest files until under max_mb."""
+        if not os.path.isdir(self.cache_dir):
+            return 0
+
+        files = []
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                path = os.path.join(root, name)
+                stat = os.stat(path)
+                files.append((stat.st_mtime, stat.st_size, path))
+        files.sort()
+
+        now = time.time()
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        for mtime, size, path in files:
+            too_old = self.max_age_days and now - mtime > self.max_age_days * 86400
+            if not too_old and total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            removed += 1
+
+        if removed:
+            # Drop in-memory copies of anything that was evicted from disk
+            for key in list(self._bars):
+                if not os.path.exists(self._path(*key)):
+                    self._bars.pop(key, None)
+                    self._fetched_at.pop(key, None)
+                    self._synced.pop(key, None)
+                    self._retain.pop(key, None)
+        return removed
+
+
+_cache = None
+
+
+def get_bar_cache():
+    global _cache
+    if _cache is None:
+        _cache = BarCache()
+    return _cache
@@ -0,0 +1,214 @@
+# bars.py
+#
+# Compact in-memory bars for one symbol. A BarBuffer keeps OHLCV and timestamp
+# columns as flat arrays (OHLCV as BAR_DTYPE, times as int64 ns) and holds a sliding window of at most `capacity` newest bars:
+#
+#   [ dropped ... | window: start .. end | free slack ]
+#
+# New bars are written in place after the window; bars aging out (or past
+# capacity) just move `start`. When the slack runs out the window is moved back
+# to the front of the arrays, which grow (by a quarter) only until they reach
+# capacity plus a quarter of slack: memory follows the bars held and is capped
+# per symbol. Every column of the window is one contiguous slice, so columns()
+# hands out views, not copies. DataFrames only appear at the edges:
+# from_frame() and to_frame().
+
+import numpy as np
+import pandas as pd
+
+from config import BAR_DTYPE, BAR_BUFFER_CAPACITY, BAR_BUFFER_DEFAULT_CAPACITY
+
+FIELDS = ("Open", "High", "Low", "Close", "Volume")
+
+
+def capacity_for(interval):
+    return BAR_BUFFER_CAPACITY.get(interval, BAR_BUFFER_DEFAULT_CAPACITY)
+
+
+def _as_ns(times):
+    """int64 ns since the epoch for a DatetimeIndex, datetime64 array or list of timestamps."""
+    return np.asarray(pd.DatetimeIndex(times).astype("datetime64[ns]")).view(np.int64)
+
+
+class BarBuffer:
+
+    def __init__(self, capacity=BAR_BUFFER_DEFAULT_CAPACITY, dtype=BAR_DTYPE, fields=FIELDS,
+                 index_name=None, reserve=64):
+        self.capacity = int(capacity)
+        self.dtype = np.dtype(dtype)
+        self.fields = tuple(fields)          # Columns the source frame actually had
+        self.index_name = index_name
+        self._max_size = self.capacity + max(self.capacity // 4, 16)
+        self._start = 0
+        self._end = 0
+        self._allocate(min(max(int(reserve), 16), self._max_size))
+
+    def _allocate(self, size):
+        """(Re)allocates the columns at `size` slots, moving the window to the front."""
+        times = np.zeros(size, dtype=np.int64)
+        data = {field: np.full(size, np.nan, dtype=self.dtype) for field in FIELDS}
+        count = len(self)
+        if count:
+            times[:count] = self._times[self._start:self._end]
+            for field in FIELDS:
+                data[field][:count] = self._data[field][self._start:self._end]
+        self._times, self._data = times, data
+        self._start, self._end = 0, count
+
+    def __len__(self):
+        return self._end - self._start
+
+    @property
+    def nbytes(self):
+        """Bytes allocated (window plus slack), at most about capacity * 1.25 bars."""
+        return self._times.nbytes + sum(column.nbytes for column in self._data.values())
+
+    @property
+    def last_time(self):
+        return pd.Timestamp(self._times[self._end - 1]) if len(self) else None
+
+    @property
+    def first_time(self):
+        return pd.Timestamp(self._times[self._start]) if len(self) else None
+
+    # --- Views ---
+
+    def times(self):
+        """Window timestamps as a read-only datetime64[ns] view."""
+        return self._view(self._times).view("datetime64[ns]")
+
+    def index(self):
+        return pd.DatetimeIndex(self.times(), name=self.index_name)
+
+    def column(self, field):
+        """Read-only view of one column over the window, oldest bar first."""
+        return self._view(self._data[field])
+
+    def columns(self, fields=FIELDS):
+        return {field: self.column(field) for field in fields}
+
+    def position(self, time):
+        """How many window bars are stamped before `time` (0 for None)."""
+        if time is None or not len(self):
+            return 0
+        return int(np.searchsorted(self._times[self._start:self._end], _as_ns([time])[0], side="left"))
+
+    def _view(self, array):
+        view = array[self._start:self._end]
+        view.flags.writeable = False
+        return view
+
+    # --- Writes ---
+
+    def _make_room(self, count):
+        """Ensures `count` more bars fit after the window, dropping the oldest beyond capacity."""
+        if len(self) + count > self.capacity:
+            self._start = self._end - max(self.capacity - count, 0)
+        if self._end + count <= len(self._times):
+            return
+        needed = len(self) + count
+        size = len(self._times)
+        if size < self._max_size:
+            self._allocate(min(self._max_size, max(size + size // 4, needed + needed // 8)))
+        else:
+            # Full size: slide the window back to the front
+            keep = len(self)
+            for array in (self._times, *self._data.values()):
+                array[:keep] = array[self._start:self._end]
+            self._start, self._end = 0, keep
+
+    def overlap(self, times):
+        """
+        How many of the window's newest bars `times` (ascending) restamps, or
+        None if they don't line up with the window's tail.
+        """
+        stamps = _as_ns(times)
+        if not len(self) or not len(stamps):
+            return 0
+        window = self._times[self._start:self._end]
+        pos = int(np.searchsorted(window, stamps[0], side="left"))
+        overlap = len(window) - pos
+        if overlap > len(stamps) or not np.array_equal(window[pos:], stamps[:overlap]):
+            return None
+        return overlap
+
+    def extend(self, times, values):
+        """
+        Appends bars: `times` (DatetimeIndex or datetime64 values, ascending,
+        unique) and {field: array}. Bars restamping the window's newest bars
+        replace them (a still-forming bar, an overlapping fetch); anything that
+        doesn't line up with the tail raises ValueError. Returns the number of
+        bars written; more than `capacity` keeps the newest.
+        """
+        stamps = _as_ns(times)
+        overlap = self.overlap(stamps)
+        if overlap is None:
+            raise ValueError("bars don't line up with the buffer's newest bars")
+        self._end -= overlap  # Rewritten below
+        if not len(stamps):
+            return 0
+        if len(stamps) > self.capacity:
+            stamps = stamps[-self.capacity:]
+            values = {field: np.asarray(column)[-self.capacity:] for field, column in values.items()}
+
+        count = len(stamps)
+        self._make_room(count)
+        end = self._end + count
+        self._times[self._end:end] = stamps
+        for field in FIELDS:
+            column = values.get(field)
+            self._data[field][self._end:end] = np.nan if column is None else column
+        self._end = end
+        return count
+
+    def append(self, time, open_, high, low, close, volume):
+        """One bar, e.g. from a stream: a new bar, or an update of the newest one."""
+        return self.extend([time], {"Open": [open_], "High": [high], "Low": [low], "Close": [close],
+                                    "Volume": [volume]})
+
+    def drop_before(self, cutoff):
+        """Forgets bars stamped before `cutoff`; no data moves."""
+        cut = self.position(cutoff)
+        self._start += cut
+        return cut
+
+    # --- DataFrame edges ---
+
+    @classmethod
+    def from_frame(cls, df, capacity=BAR_BUFFER_DEFAULT_CAPACITY, dtype=BAR_DTYPE):
+        """Buffer holding `df`'s bars (sorted by time); grows past `capacity` rather than dropping any."""
+        if not df.index.is_monotonic_increasing:
+            df = df.sort_index()
+        fields = [field for field in FIELDS if field in df.columns] or FIELDS
+        buffer = cls(max(capacity, len(df)), dtype, fields, df.index.name, reserve=len(df))
+        if not df.empty:
+            buffer.extend(df.index, {field: df[field].to_numpy(dtype=float) for field in fields})
+        return buffer
+
+    def to_frame(self):
+        """The window as a new OHLCV DataFrame (float64 columns, DatetimeIndex), like the providers return."""
+        if not len(self):
+            return pd.DataFrame()
+        return pd.DataFrame(
+            {field: self.column(field).astype(np.float64) for field in self.fields},
+            index=pd.DatetimeIndex(self.times().copy(), name=self.index_name),
+        )
+
+
+def stack(buffers, fields=("Close", "High", "Low", "Volume"), starts=None):
+    """
+    (bars x symbols) float64 arrays per field from {symbol: BarBuffer}, right-aligned
+    like signals.build_panel() so every column ends on its latest bar. `starts`
+    ({symbol: time}) leaves out each symbol's bars before that time. Returns
+    (symbols, {field: array}); feeds signals.compute_indicator_panel() directly.
+    """
+    starts = starts or {}
+    skips = {symbol: buffer.position(starts.get(symbol)) for symbol, buffer in buffers.items() if buffer is not None}
+    symbols = [symbol for symbol, skip in skips.items() if len(buffers[symbol]) > skip]
+    length = max((len(buffers[symbol]) - skips[symbol] for symbol in symbols), default=0)
+    arrays = {field: np.full((length, len(symbols)), np.nan) for field in fields}
+    for i, symbol in enumerate(symbols):
+        buffer, skip = buffers[symbol], skips[symbol]
+        for field in fields:
+            arrays[field][length - (len(buffer) - skip):, i] = buffer.column(field)[skip:]
+    return symbols, arrays
@@ -0,0 +1,9 @@
+# benchmarks
+#
+# Speed checks for the signal pipeline on synthetic universes. Run from the repo root:
+#
+#   python -m benchmarks.run --preset small
+#   python -m benchmarks.run --preset medium --save-baseline
+#   python -m benchmarks.run --preset medium --threshold 0.2
+#   python -m benchmarks.import_budget
+#   python -m benchmarks.checks
@@ -0,0 +1,189 @@
+# benchmarks/checks.py
+#
+# Correctness checks for the fast paths that reimplement something slower.
+# Each check runs offline and prints what it compared; the run fails (exit 1)
+# on any mismatch.
+#
+#   streaming   StreamingIndicators.signals() against analyze_signals() on every
+#               prefix of the bars, on a synthetic universe and on the replay
+#               captures in data/history. Every few bars a distorted version is
+#               fed first and then revised, so the same-timestamp path is covered.
+#
+#   dispatcher  The alert dispatcher's Discord client stays connected once its
+#               ready event has fired (the one-shot client logs out at that
+#               point). Login is faked, so no token is needed; skipped when
+#               discord.py or python-dotenv aren't installed.
+#
+#   python -m benchmarks.checks
+#   python -m benchmarks.checks --check streaming --symbols 5 --bars 300
+
+import os
+import sys
+import math
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+TOLERANCE = 1e-6    # Relative, on the indicator values and on a flag's margin
+REVISE_EVERY = 7    # Every Nth bar is fed twice: distorted first, then the real bar
+
+
+def _close(a, b, tolerance=TOLERANCE):
+    if isinstance(a, float) and isinstance(b, float) and math.isnan(a) and math.isnan(b):
+        return True
+    return abs(float(a) - float(b)) <= tolerance * max(1.0, abs(float(a)), abs(float(b)))
+
+
+def _margins(state):
+    """How far each flag's comparison is from flipping, for StreamingIndicators' latest bar."""
+    ind = state.indicators()
+    return {
+        "ema_bullish": ind["ema9"] - ind["ema21"], "ema_bearish": ind["ema9"] - ind["ema21"],
+        "vwap_above": state.close - ind["vwap"], "vwap_below": state.close - ind["vwap"],
+        "macd_positive": ind["macd_hist"], "macd_negative": ind["macd_hist"],
+        "rsi_bullish": ind["rsi"] - 50, "rsi_bearish": ind["rsi"] - 50,
+        "volume_spike": state.volume - ind["avg_vol"] * 1.5,
+    }
+
+
+def compare_streaming(symbol, df, tolerance=TOLERANCE):
+    """Mismatches between the streaming and the batch signals after each bar of `df`."""
+    from signals import analyze_signals
+    from indicator_state import StreamingIndicators
+
+    state = StreamingIndicators(symbol)
+    mismatches = []
+    high, low = df["High"].to_numpy(dtype=float), df["Low"].to_numpy(dtype=float)
+    close, volume = df["Close"].to_numpy(dtype=float), df["Volume"].to_numpy(dtype=float)
+    for i, ts in enumerate(df.index):
+        if i % REVISE_EVERY == REVISE_EVERY - 1:
+            state.update(high[i] * 1.01, low[i] * 0.99, close[i] * 1.005, volume[i] * 3, timestamp=ts)
+        state.update(high[i], low[i], close[i], volume[i], timestamp=ts)
+
+        batch = analyze_signals(df.iloc[:i + 1])
+        streamed = state.signals()
+        if "error" in batch or "error" in streamed:
+            if batch.get("error") != streamed.get("error"):
+                mismatches.append((symbol, ts, "error", batch.get("error"), streamed.get("error")))
+            continue
+
+        if not _close(batch["rsi"], streamed["rsi"], tolerance):
+            mismatches.append((symbol, ts, "rsi", batch["rsi"], streamed["rsi"]))
+        margins = _margins(state)
+        for name, margin in margins.items():
+            # A flag may only differ when its comparison is a rounding error away from a tie
+            if bool(batch[name]) != bool(streamed[name]) and not abs(margin) <= tolerance * max(1.0, abs(state.close)):
+                mismatches.append((symbol, ts, name, batch[name], streamed[name]))
+    return mismatches
+
+
+def check_streaming(symbols=5, bars=300, tolerance=TOLERANCE):
+    from price_data import ReplayProvider
+    from benchmarks.synthetic import make_universe
+
+    universes = {"synthetic": make_universe(symbols, bars)}
+    replay_dir = os.path.join(ROOT, "data", "history")
+    names = sorted(name[:-len("_latest.csv")] for name in os.listdir(replay_dir) if name.endswith("_latest.csv")) \
+        if os.path.isdir(replay_dir) else []
+    universes["replay"] = ReplayProvider(replay_dir).fetch(names, "5m") if names else {}
+
+    problems = []
+    for universe, frames in universes.items():
+        compared, mismatches = 0, []
+        for symbol, df in frames.items():
+            if df is None or df.empty:
+                continue
+            mismatches += compare_streaming(symbol, df, tolerance)
+            compared += len(df)
+        print(f"[CHECK] streaming vs batch on {universe}: {len(frames)} symbols, {compared} bars, {len(mismatches)} mismatches")
+        for symbol, ts, name, batch, streamed in mismatches[:10]:
+            print(f"  {symbol} {ts} {name}: batch={batch} streaming={streamed}")
+        if mismatches:
+            problems.append(f"streaming signals differ from analyze_signals on {universe} ({len(mismatches)} bars)")
+    return problems
+
+
+def _closes_on_ready(client):
+    """
+    True when `client` logs itself out once ready. Only the network side of
+    login is faked: the client is set up on the loop, marked ready and the
+    "ready" event is fired the way discord.py's gateway does it.
+    """
+    import asyncio
+    from alert_dispatcher import DiscordTransport
+
+    async def fake_login(token):
+        await client._async_setup_hook()
+
+    async def fake_connect():
+        client._ready.set()
+        client.dispatch("ready")
+        await asyncio.Event().wait()  # Stays "connected" until cancelled
+
+    async def run():
+        client.login, client.connect = fake_login, fake_connect
+        transport = DiscordTransport(client, "token", 0)
+        await transport.connect()
+        await asyncio.sleep(0.2)  # Let the scheduled on_ready run
+        closed = client.is_closed()
+        transport._task.cancel()
+        await asyncio.gather(transport._task, return_exceptions=True)
+        if not closed:
+            await client.close()
+        return closed
+
+    return asyncio.run(run())
+
+
+def check_dispatcher():
+    try:
+        import discord  # noqa: F401
+        import discord_alert
+    except ImportError as e:
+        print(f"[CHECK] dispatcher client: skipped ({e})")
+        return []
+
+    problems = []
+    survives = not _closes_on_ready(discord_alert._new_client(one_shot=False))
+    print(f"[CHECK] dispatcher client survives on_ready: {'yes' if survives else 'no'}")
+    if not survives:
+        problems.append("the dispatcher's Discord client closes itself once ready")
+    # The one-shot client must still log out, or the check above proves nothing
+    if not _closes_on_ready(discord_alert.get_client()):
+        problems.append("the one-shot Discord client no longer closes once ready (check harness out of date?)")
+    return problems
+
+
+# name -> fn(args) returning a list of problems
+CHECKS = {
+    "streaming": lambda args: check_streaming(args.symbols, args.bars, args.tolerance),
+    "dispatcher": lambda args: check_dispatcher(),
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Check the fast paths against the reference implementations.")
+    parser.add_argument("--check", action="append", choices=sorted(CHECKS), help="Check to run (repeatable; default: all)")
+    parser.add_argument("--symbols", type=int, default=5, help="Synthetic symbols for the streaming check")
+    parser.add_argument("--bars", type=int, default=300, help="Synthetic bars per symbol for the streaming check")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    problems = []
+    for name in args.check or list(CHECKS):
+        problems += CHECKS[name](args)
+
+    for problem in problems:
+        print(f"[CHECK ❌] {problem}")
+    if not problems:
+        print("[CHECK ✅] All checks passed.")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
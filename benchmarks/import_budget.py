@@ -0,0 +1,121 @@
+# benchmarks/import_budget.py
+#
+# Start-up cost check for the CLI entry points. Each module is imported in a
+# fresh interpreter with `-X importtime`; the report lists what it pulls in,
+# costliest first, and the run fails (exit 1) when an import goes over its
+# budget or drags in one of the heavy libraries that should only load with the
+# stage that needs them. `main.py --help` is timed end to end as well.
+#
+#   python -m benchmarks.import_budget
+#   python -m benchmarks.import_budget --module main --budget-ms 80 --top 20
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# module -> import budget in ms (a cold interpreter, so leave headroom). daemon.py
+# is left out on purpose: it is resident and loads every stage up front.
+BUDGETS = {
+    "main": 60,
+}
+# Never loaded just by importing the entry points
+HEAVY_MODULES = ("pandas", "numpy", "yfinance", "ta", "discord")
+HELP_BUDGET_MS = 250  # python main.py --help, interpreter start-up included
+
+
+def import_times(module):
+    """
+    [(name, self_us, cumulative_us, depth)] for everything importing `module`
+    loads, in the order -X importtime reports them (children before their
+    parent; interpreter start-up imports excluded), plus the error text if the
+    import failed.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    rows, errors = [], []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            errors.append(line)
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # header
+        name = fields[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(fields[0]), int(fields[1]), depth))
+    # Keep the last top-level entry (the module itself) and what it pulled in
+    roots = [i for i, row in enumerate(rows) if row[3] == 0]
+    if len(roots) > 1:
+        rows = rows[roots[-2] + 1:]
+    return rows, ("\n".join(errors).strip() if proc.returncode else None)
+
+
+def report(module, budget_ms, top=15):
+    """Prints the breakdown for `module`; returns a list of budget violations."""
+    rows, error = import_times(module)
+    if error:
+        print(f"[IMPORT] {module}: import failed\n{error}")
+        return [f"{module} does not import"]
+
+    total_ms = next((cum for name, _, cum, depth in rows if name == module and depth == 0), 0) / 1000
+    loaded = {name for name, *_ in rows}
+    # The module's own imports (one level down), costliest first
+    direct = sorted((r for r in rows if r[3] == 1), key=lambda r: r[2], reverse=True)
+
+    print(f"[IMPORT] {module}: {total_ms:.1f} ms (budget {budget_ms} ms), {len(rows)} modules")
+    for name, self_us, cum_us, _ in direct[:top]:
+        print(f"  {name:<28} {cum_us / 1000:>8.1f} ms  (self {self_us / 1000:.1f} ms)")
+
+    problems = []
+    if total_ms > budget_ms:
+        problems.append(f"{module} took {total_ms:.1f} ms, budget {budget_ms} ms")
+    heavy = [name for name in HEAVY_MODULES if name in loaded]
+    if heavy:
+        problems.append(f"{module} loads {', '.join(heavy)} at import time")
+    return problems
+
+
+def time_help(budget_ms=HELP_BUDGET_MS):
+    # From a scratch directory, so the run's log line doesn't land in output/logs
+    with tempfile.TemporaryDirectory(prefix="signal-import-") as workdir:
+        started = time.perf_counter()
+        proc = subprocess.run([sys.executable, os.path.join(ROOT, "main.py"), "--help"],
+                              cwd=workdir, capture_output=True, text=True)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+    print(f"[IMPORT] main.py --help: {elapsed_ms:.0f} ms (budget {budget_ms} ms)")
+    if proc.returncode:
+        return [f"main.py --help exited with {proc.returncode}"]
+    return [f"main.py --help took {elapsed_ms:.0f} ms, budget {budget_ms} ms"] if elapsed_ms > budget_ms else []
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Per-module import cost of the entry points, checked against a budget.")
+    parser.add_argument("--module", action="append", help="Module to check (repeatable; default: all in BUDGETS)")
+    parser.add_argument("--budget-ms", type=float, help="Override the budget for every checked module")
+    parser.add_argument("--top", type=int, default=15, help="Imports listed per module")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    problems = []
+    for module in args.module or list(BUDGETS):
+        problems += report(module, args.budget_ms or BUDGETS.get(module, 60), args.top)
+    problems += time_help()
+
+    for problem in problems:
+        print(f"[IMPORT ❌] {problem}")
+    if not problems:
+        print("[IMPORT ✅] Within budget.")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,249 @@
+# benchmarks/run.py
+#
+# Times each pipeline stage on its own and the whole run_pipeline() end to end
+# against a synthetic universe, inside a throwaway working directory so the
+# pending store, prediction partitions, bar cache and logs never touch the real
+# output/. Results go to benchmarks/results/; --save-baseline stores them as the
+# reference the next runs are compared against.
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import contextlib
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import bar_cache
+import logger
+import pending_store
+import prediction_logger
+from price_data import set_price_provider
+from bars import BarBuffer
+from signals import (
+    analyze_signals, analyze_signals_panel, analyze_signals_bars, build_panel, compute_indicator_panel,
+    signals_from_indicators
+)
+from predictor import score_signals, score_signals_panel
+from strategy_engine import evaluate_entry_conditions, evaluate_entry_panel
+from prediction_logger import log_prediction, flush_predictions
+from entry_exit_tracker import TradeTracker
+from evaluate_pending_entries import check_pending_entries
+from benchmarks.synthetic import PRESETS, BARS_PER_SESSION, make_universe, SyntheticProvider
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+BASELINE_DIR = os.path.join(ROOT, "benchmarks", "baselines")
+NOISE_FLOOR_S = 0.005  # Stages faster than this are too noisy to flag
+
+
+@contextlib.contextmanager
+def sandbox():
+    """Runs the body in a temp working directory with fresh stores, quietly."""
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="signal-bench-") as workdir:
+        os.chdir(workdir)
+        os.makedirs("data/history", exist_ok=True)
+        os.makedirs("output/logs", exist_ok=True)
+        if logger._writer is not None:
+            logger._writer.close()
+        logger._writer = None
+        bar_cache._cache = None
+        pending_store._store = None
+        prediction_logger._sink = None
+        try:
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                yield workdir
+        finally:
+            logger.flush_logs()
+            if pending_store._store is not None:
+                pending_store._store.close()
+            if logger._writer is not None:
+                logger._writer.close()
+            logger._writer = None
+            bar_cache._cache = None
+            pending_store._store = None
+            prediction_logger._sink = None
+            os.chdir(previous)
+
+
+def timed(results, name, fn, calls=1, repeat=1):
+    """Best-of-`repeat` wall time for fn(); recorded with the per-call cost."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    results[name] = {"calls": calls, "total_s": round(best, 6), "per_call_ms": round(best / max(calls, 1) * 1000, 4)}
+    return best
+
+
+def run_benchmarks(symbols, bars, sample, repeat=1, workers=None):
+    frames = make_universe(symbols, bars)
+    names = list(frames)
+    sampled = names[:sample]
+    period = f"{-(-bars // BARS_PER_SESSION)}d"
+    results = {}
+
+    with sandbox():
+        provider = set_price_provider(SyntheticProvider(frames))
+
+        # Per-symbol functions, called the way process_symbol() calls them
+        timed(results, "analyze_signals", lambda: [analyze_signals(frames[s]) for s in sampled], len(sampled), repeat)
+
+        panel_signals = {}
+        def panel():
+            panel_signals.update(analyze_signals_panel(build_panel(frames)))
+        timed(results, "analyze_signals_panel", panel, len(names), repeat)
+
+        # The same indicators from compact bar buffers, and what each form keeps resident
+        buffers = {s: BarBuffer.from_frame(df, len(df)) for s, df in frames.items()}
+        timed(results, "analyze_signals_bars", lambda: analyze_signals_bars(buffers), len(names), repeat)
+        results["analyze_signals_bars"]["frames_mb"] = round(
+            sum(df.memory_usage(deep=True).sum() for df in frames.values()) / 2**20, 2)
+        results["analyze_signals_bars"]["buffers_mb"] = round(sum(b.nbytes for b in buffers.values()) / 2**20, 2)
+
+        trends = {}
+        def score():
+            trends.update({s: score_signals(panel_signals[s]) for s in names})
+        timed(results, "score_signals", score, len(names), repeat)
+
+        decisions = {}
+        def evaluate():
+            decisions.update({s: evaluate_entry_conditions(s, frames[s], panel_signals[s], trends[s]) for s in names})
+        timed(results, "evaluate_entry_conditions", evaluate, len(names), repeat)
+
+        # Compiled rules over every bar of every symbol, as backtest.py runs them
+        block = build_panel(frames)
+        columns = list(block["Close"].columns)
+        ind = compute_indicator_panel(*(block[field][columns].to_numpy() for field in ("Close", "High", "Low", "Volume")))
+        bar_signals = signals_from_indicators(ind, slice(None))
+        def rules_panel():
+            evaluate_entry_panel(bar_signals, score_signals_panel(bar_signals, ind["bars"] >= 30))
+        timed(results, "rules_panel", rules_panel, ind["bars"].size, repeat)
+
+        def predictions():
+            for s in sampled:
+                log_prediction(s, panel_signals[s], trends[s], frames[s])
+            flush_predictions()
+        timed(results, "log_prediction", predictions, len(sampled), repeat)
+
+        def queue():
+            now = datetime.now().isoformat()
+            for s in names:
+                last = frames[s].iloc[-1]
+                TradeTracker.queue_pending_entry(
+                    symbol=s, trend="Bullish", signal_time=now, signal_high=last["High"], signal_low=last["Low"],
+                    vwap=last["Close"], entry_condition=f"Break above {last['High'] * 1.005:.2f} (0.5% buffer)",
+                    trigger_price=round(last["High"] * 1.005, 2),
+                )
+        timed(results, "queue_pending_entry", queue, len(names), 1)
+
+        waiting = len(TradeTracker.pending_store().entries(status="waiting"))
+        timed(results, "check_pending_entries", check_pending_entries, waiting, 1)
+
+    # End to end: the same run_pipeline() the bot and daemon use, on a fresh sandbox
+    try:
+        from main import parse_args, run_pipeline
+        import discord_alert  # Loaded lazily by run_pipeline() to send alerts
+    except ImportError as e:
+        results["end_to_end"] = {"skipped": f"main.py not importable here: {e}"}
+    else:
+        with sandbox():
+            provider = set_price_provider(SyntheticProvider(frames))
+            argv = ["--interval", "5m", "--period", period]
+            if workers:
+                argv += ["--workers", str(workers)]
+            args = parse_args(argv)
+            args.provider = provider
+            timed(results, "end_to_end", lambda: run_pipeline(args, names), len(names), 1)
+            results["end_to_end"]["provider_calls"] = provider.calls
+
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Stages whose time grew by more than `threshold` (fraction) over the baseline."""
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base or "total_s" not in base or "total_s" not in current:
+            continue
+        if base["total_s"] < NOISE_FLOOR_S and current["total_s"] < NOISE_FLOOR_S:
+            continue
+        change = current["total_s"] / base["total_s"] - 1 if base["total_s"] else 0.0
+        current["vs_baseline"] = round(change, 3)
+        if change > threshold:
+            regressions.append((name, base["total_s"], current["total_s"], change))
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the signal pipeline on a synthetic universe.")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="small")
+    parser.add_argument("--symbols", type=int, default=None, help="Overrides the preset's symbol count")
+    parser.add_argument("--bars", type=int, default=None, help="Overrides the preset's bars per symbol")
+    parser.add_argument("--sample", type=int, default=200, help="Symbols used for the slow per-symbol stages")
+    parser.add_argument("--repeat", type=int, default=3, help="Best-of-N for stages without side effects")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown vs. baseline (0.25 = 25%%)")
+    parser.add_argument("--baseline", type=str, default=None, help="Baseline JSON; defaults to baselines/<preset>.json")
+    parser.add_argument("--save-baseline", action="store_true")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    symbols, bars = PRESETS[args.preset]
+    symbols = args.symbols or symbols
+    bars = args.bars or bars
+
+    results = run_benchmarks(symbols, bars, args.sample, args.repeat, args.workers)
+    report = {
+        "meta": {
+            "preset": args.preset, "symbols": symbols, "bars": bars, "sample": args.sample,
+            "python": platform.python_version(), "machine": platform.machine(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+        },
+        "results": results,
+    }
+
+    baseline_path = args.baseline or os.path.join(BASELINE_DIR, f"{args.preset}.json")
+    regressions = []
+    if os.path.exists(baseline_path) and not args.save_baseline:
+        with open(baseline_path, "r") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    out_path = os.path.join(RESULTS_DIR, f"{args.preset}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(out_path, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"[BENCH] {args.preset}: {symbols} symbols x {bars} bars")
+    for name, result in results.items():
+        if "skipped" in result:
+            print(f"  {name:<28} skipped ({result['skipped']})")
+            continue
+        delta = f"  ({result['vs_baseline']:+.0%} vs baseline)" if "vs_baseline" in result else ""
+        print(f"  {name:<28} {result['total_s']:>9.4f}s  {result['per_call_ms']:>10.4f} ms/call{delta}")
+    print(f"[BENCH] Results written to {out_path}")
+
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        with open(baseline_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"[BENCH] Baseline saved to {baseline_path}")
+
+    for name, base, current, change in regressions:
+        print(f"[REGRESSION] {name}: {base:.4f}s -> {current:.4f}s ({change:+.0%}, threshold {args.threshold:+.0%})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+# benchmarks/synthetic.py
+
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from price_data import PriceProvider
+
+BARS_PER_SESSION = 78  # 5m bars from 9:30 to 16:00
+
+# name -> (symbols, bars per symbol)
+PRESETS = {
+    "small": (10, 390),
+    "medium": (500, 390),
+    "large": (5000, 390),
+}
+
+
+def session_index(bars, end=None):
+    """5m bar timestamps over consecutive weekday sessions, ending with the session of `end`."""
+    end = pd.Timestamp(end or pd.Timestamp.now()).normalize()
+    sessions = -(-bars // BARS_PER_SESSION)
+    days = pd.bdate_range(end=end, periods=sessions)
+    stamps = [day + pd.Timedelta(hours=9, minutes=30) + pd.Timedelta(minutes=5 * i)
+              for day in days for i in range(BARS_PER_SESSION)]
+    return pd.DatetimeIndex(stamps[-bars:])
+
+
+def make_bars(symbol, bars, end=None, seed=0):
+    """Random-walk OHLCV for one symbol; the same symbol and seed always give the same bars."""
+    rng = np.random.default_rng(zlib.crc32(f"{symbol}:{seed}".encode()))
+    index = session_index(bars, end)
+    start = rng.uniform(20, 500)
+    close = start * np.exp(np.cumsum(rng.normal(0, 0.002, bars)))
+    open_ = np.concatenate([[start], close[:-1]])
+    spread = np.abs(rng.normal(0, 0.0015, (2, bars)))
+    high = np.maximum(open_, close) * (1 + spread[0])
+    low = np.minimum(open_, close) * (1 - spread[1])
+    volume = rng.lognormal(11, 0.6, bars).round()
+    return pd.DataFrame({"Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume}, index=index)
+
+
+def make_universe(symbols, bars, end=None, seed=0):
+    """{symbol: frame} for `symbols` names SYN0000... (or the given list)."""
+    if isinstance(symbols, int):
+        symbols = [f"SYN{i:04d}" for i in range(symbols)]
+    return {symbol: make_bars(symbol, bars, end, seed) for symbol in symbols}
+
+
+class SyntheticProvider(PriceProvider):
+    """
+    Offline provider serving a generated universe. Coarser intervals are
+    resampled from the 5m bars; finer ones (the latest-price snapshot) get the
+    5m bars as they are.
+    """
+
+    name = "synthetic"
+
+    def __init__(self, frames):
+        self.frames = frames
+        self.calls = 0
+
+    def fetch(self, symbols, interval, period=None, start=None, end=None):
+        from timeframes import INTERVAL_RULES, resample_bars
+
+        self.calls += 1
+        frames = {}
+        for symbol in symbols:
+            df = self.frames.get(symbol, pd.DataFrame())
+            if not df.empty and interval in INTERVAL_RULES and pd.Timedelta(INTERVAL_RULES[interval]) > pd.Timedelta("5min"):
+                df = resample_bars(df, interval)
+            if not df.empty and start is not None:
+                df = df[df.index >= pd.Timestamp(start)]
+            if not df.empty and end is not None:
+                df = df[df.index < pd.Timestamp(end)]
+            frames[symbol] = df
+        return frames
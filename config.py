@@ -5,17 +5,67 @@ MARKET_OPEN_TIME = "09:30"
 START_ANALYSIS_TIME = "09:35"
 END_ANALYSIS_TIME = "10:00"
 INTERVAL_MINUTES = 5
+DAEMON_LATENCY_HISTORY = 500    # Per-tick timings kept in memory by daemon.py
+
+# Discord alert dispatcher (alert_dispatcher.py), used by the daemon
+USE_ALERT_DISPATCHER = True
+ALERT_QUEUE_SIZE = 1000             # Bounded queue; submit waits up to ALERT_MAX_WAIT_SECONDS for space
+ALERT_COALESCE_SECONDS = 1.0        # Alerts arriving within this quiet window share one message
+ALERT_MAX_WAIT_SECONDS = 5.0        # No alert is held back for coalescing longer than this
+ALERT_ROUTE_LIMIT = 5               # Sends allowed per channel...
+ALERT_ROUTE_PERIOD_SECONDS = 5.0    # ...per this many seconds
+ALERT_MAX_RETRIES = 5               # 429 retries (with backoff) before a message is given up on
 
 # Paths
 STOCK_LIST_PATH = "data/stocks.csv"
-LOG_PATH = "output/logs/"
-PENDING_ENTRIES_PATH = "output/logs/pending_entries.csv"
+LOG_PATH = "output/logs/tasklog.txt"
+PENDING_ENTRIES_PATH = "output/logs/pending_entries.csv"   # CSV export of the pending store, for journaling
+PENDING_DB_PATH = "output/logs/pending_entries.db"          # SQLite store (source of truth)
 ENTRY_LOG_PATH = "output/logs/entry_log.csv"
+TRADES_PATH = "output/logs/trades.csv"                       # CSV export of the trade store (read by cleanup_bot)
+TRADES_DB_PATH = "output/logs/trades.db"                     # SQLite trades + P&L ledger (source of truth)
+PREDICTIONS_PATH = "output/logs/predictions.csv"             # Legacy single-file log (read once for migration)
+PREDICTIONS_DIR = "output/logs/predictions"                  # Day partitions: YYYY-MM-DD.csv (open) / .npz (closed)
+
+# Run metrics (metrics.py): stage spans and counters, exported after each run
+METRICS_ENABLED = True
+METRICS_PROM_PATH = "output/metrics/signal_bot_{run}.prom"  # Prometheus textfile-collector format; {run} = pipeline/evaluator/tick
+METRICS_JSON_PATH = "output/metrics/{run}_last_run.json"
+
+# Task log (logger.py): written from a background thread
+LOG_QUEUE_SIZE = 10000          # Lines waiting for the writer; beyond this they are counted and dropped
+LOG_FLUSH_SECONDS = 1.0         # File is flushed at least this often while lines are coming in
+LOG_FLUSH_LINES = 500           # ...or after this many lines
+LOG_MAX_BYTES = 5 * 1024 * 1024 # Rotate tasklog.txt -> tasklog.txt.1 past this size
+LOG_BACKUP_COUNT = 3
+LOG_JSON = False                # One JSON object per line instead of "[time] message"
 
 # Data Fetching Settings
 DEFAULT_INTERVAL = "5m"         # or "1h", "15m", etc.
 DEFAULT_PERIOD = "1d"           # or "5d", "7d" for extended lookback
 
+# Price provider: "yfinance" for live bars, "replay" to serve data/history/*_latest.csv offline
+PRICE_PROVIDER = "yfinance"
+PRICE_FETCH_CHUNK_SIZE = 50     # Max symbols per batched yf.download call
+REPLAY_HISTORY_DIR = "data/history"
+
+# Snapshot used to resolve pending entries: smallest bars, shortest window
+LATEST_PRICE_INTERVAL = "1m"
+LATEST_PRICE_PERIOD = "1d"
+
+# Incremental bar cache: only bars newer than the last cached timestamp are downloaded
+BAR_CACHE_ENABLED = True
+BAR_CACHE_DIR = "data/cache/bars"
+BAR_CACHE_MAX_AGE_DAYS = 30     # Bars (and untouched files) older than this are evicted, unless a longer period was requested
+BAR_CACHE_MAX_MB = 200          # Oldest files are evicted once the cache grows past this
+BAR_CACHE_FRESH_SECONDS = 60    # Re-requests within this window are served without a fetch
+
+# In-memory bars (bars.BarBuffer): preallocated columns per symbol, sized per interval
+# to hold BAR_CACHE_MAX_AGE_DAYS (~22 sessions) of regular-session bars; grown only if a window outgrows it
+BAR_DTYPE = "float64"           # "float32" halves the memory but rounds prices to ~7 digits and volumes past 2**24, on disk too
+BAR_BUFFER_CAPACITY = {"1m": 8600, "2m": 4300, "5m": 1800, "15m": 640, "30m": 320, "1h": 192, "1d": 32}
+BAR_BUFFER_DEFAULT_CAPACITY = 512
+
 # Long-Term Trend Evaluation Settings
 ENABLE_LONG_TERM_TREND_CONFIRMATION = True
 
@@ -23,6 +73,38 @@ ENABLE_LONG_TERM_TREND_CONFIRMATION = True
 LONG_TERM_INTERVAL = "1h"    # Options: "1h", "1d"
 LONG_TERM_PERIOD = "7d"      # Options: "7d", "1mo", etc.
 
+# Build the long-term frame by resampling the intraday bars already fetched,
+# only going to the network for older history the bar cache doesn't hold
+DERIVE_LONG_TERM_FROM_INTRADAY = True
+
+# Compute indicators for all symbols in one NumPy pass (signals.analyze_signals_bars over
+# the bar cache's buffers, or analyze_signals_panel) instead of one `ta` call chain
+# per symbol; results are identical
+USE_PANEL_SIGNALS = True
+
+# Keep per-symbol indicator state between runs and only feed it new bars
+# (indicator_state.py). State is saved here so a restart resumes where it left off.
+USE_STREAMING_INDICATORS = False
+INDICATOR_STATE_PATH = "data/cache/indicator_state.json"
+
+# Per-symbol pipeline threads in main(); 1 = strictly serial.
+# Shared CSV writes, logs and alerts are always applied in stock-list order.
+PIPELINE_WORKERS = 4
+
+# Pre-screen (prescreen.py): one batched daily-bar snapshot filters the stock list
+# before the full pipeline runs; survivors are ranked and capped
+SCREEN_ENABLED = False
+SCREEN_INTERVAL = "1d"
+SCREEN_PERIOD = "1mo"
+SCREEN_AVERAGE_DAYS = 20                # Days behind the volume / dollar-volume averages
+SCREEN_MIN_PRICE = 5.0
+SCREEN_MAX_PRICE = 1000.0
+SCREEN_MIN_DOLLAR_VOLUME = 20_000_000   # Average daily Close * Volume
+SCREEN_MIN_GAP_PCT = 0.0                # Absolute open-vs-previous-close gap, in %
+SCREEN_MIN_REL_VOLUME = 0.0             # Today's volume / average daily volume (today is partial intraday)
+SCREEN_RANK_BY = "rel_volume"           # "rel_volume", "gap_pct" or "dollar_volume"
+SCREEN_MAX_SYMBOLS = 100                # Shortlist cap; 0 = no cap
+
 # Optionally require exact match
 REQUIRE_TREND_MATCH = True  # True = entry only if short-term and long-term agree
 
@@ -51,4 +133,50 @@ MIN_MATCH_THRESHOLD = 0.8  # Used for scoring mode (e.g. 4 out of 5)
 # If not using scoring, this becomes a fixed minimum match count
 # e.g., 4 means at least 4 signals must match
 
+# Trend classification as data, compiled by rules.py for predictor.score_signals()
+# and the panel, backtest and sweep paths: checked in order, first trend whose
+# weighted signal count reaches min_score wins, otherwise Neutral.
+TREND_RULES = {
+    "Bullish": {"signals": ["ema_bullish", "vwap_above", "macd_positive", "rsi_bullish", "volume_spike"], "min_score": 3},
+    "Bearish": {"signals": ["ema_bearish", "vwap_below", "macd_negative", "rsi_bearish"], "min_score": 2},
+}
+
+# Optional per-signal weights for rules.py (trend scores and entry matching, live and backtest); unlisted signals weigh 1
+RULE_WEIGHTS = {}
 
+# Backtest (backtest.py)
+BACKTEST_PROVIDER = "replay"            # Stored bars by default; "yfinance" to pull (and cache) history
+BACKTEST_PERIOD = "60d"                 # yfinance keeps ~60 days of 5m bars
+BACKTEST_LOOKBACK = DEFAULT_PERIOD      # Window the live run analyzes; indicators restart with it ("max": never)
+BACKTEST_TRIGGER_WINDOW_BARS = 78       # A queued trigger stays live this many bars (one session of 5m bars)
+BACKTEST_HORIZONS = [6, 12, 78]         # Forward-return horizons, in bars after the fill
+BACKTEST_FOLDS = 4                      # Consecutive time slices reported separately
+BACKTEST_OUTPUT_PATH = "output/backtest/trades.csv"
+
+# Exits for open trades (entry_exit_tracker.py), checked against the latest completed bars
+EXIT_TARGET_PCT = 1.0                   # Take profit this far past the entry, in %
+EXIT_STOP_PCT = 0.5                     # Stop out this far against the entry, in %
+EXIT_SESSION_END = "15:55"              # Time stop: close at the first bar starting at or after this
+EXIT_BAR_INTERVAL = "5m"
+EXIT_BAR_PERIOD = "5d"
+
+# Outcome labeling of logged predictions (label_predictions.py)
+LABEL_INTERVAL = "5m"                   # Bars the fills and exits are read from
+LABEL_PERIOD = "60d"
+LABEL_TRIGGER_WINDOW_BARS = 78          # Bars after the prediction the trigger stays live
+LABEL_HOLD_MINUTES = 60                 # Exit at the last bar at or before fill + this
+LABEL_BUFFER = 0.005                    # Same 0.5% trigger buffer main.py queues entries with
+
+# Parameter sweep (sweep.py); runs on the backtest settings above
+SWEEP_DIR = "output/sweeps"             # One subdirectory per sweep: shared bar arrays + results
+SWEEP_WORKERS = None                    # Worker processes; None = one per CPU
+SWEEP_GRID = {
+    "threshold": [0.6, 0.8, 1.0],       # MIN_MATCH_THRESHOLD
+    "buffer": [0.003, 0.005, 0.01],     # Trigger buffer (0.5% live)
+    "ema_fast": [5, 9, 12],
+    "ema_slow": [21, 34],
+    "rsi_cutoff": [45, 50, 55],
+    "volume_multiplier": [1.25, 1.5, 2.0],
+}
+SWEEP_RANK_BY = "ret12_mean_pct"        # Any summarize() column
+SWEEP_MIN_TRIGGERED = 30                # Settings with fewer filled triggers rank below the rest
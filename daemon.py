@@ -0,0 +1,154 @@
+# daemon.py
+#
+# Long-running alternative to launching main.py once per run. Imports, the
+# stock list, the bar cache and indicator state stay resident between ticks.
+# Accepts the same flags as main.py; --force ticks every INTERVAL_MINUTES
+# regardless of the analysis window, --dry-run analyzes without writing or alerting.
+
+import os
+import time
+import datetime
+import threading
+from collections import deque
+
+from config import (
+    START_ANALYSIS_TIME, END_ANALYSIS_TIME, INTERVAL_MINUTES, DAEMON_LATENCY_HISTORY,
+    STOCK_LIST_PATH, USE_STREAMING_INDICATORS, USE_ALERT_DISPATCHER
+)
+from main import parse_args, load_stock_list, clean_old_pending_entries, run_pipeline, _parse_hhmm
+from indicator_state import IndicatorStateStore
+from evaluate_pending_entries import check_pending_entries
+from discord_alert import alert_queue, run_discord_bot, start_alert_dispatcher, stop_alert_dispatcher
+from logger import log
+from metrics import begin_run, end_run
+
+
+class SignalDaemon:
+
+    def __init__(self, args):
+        self.args = args
+        self.start_time = _parse_hhmm(START_ANALYSIS_TIME)
+        self.end_time = _parse_hhmm(END_ANALYSIS_TIME)
+        self.interval = datetime.timedelta(minutes=INTERVAL_MINUTES)
+        self.history = deque(maxlen=DAEMON_LATENCY_HISTORY)
+        self.indicator_store = IndicatorStateStore().load() if USE_STREAMING_INDICATORS else None
+        self.stock_list = []
+        self._stock_list_mtime = None
+        self._tick_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._worker = None
+        self.dispatcher = None
+
+    def next_tick(self, now):
+        """Next scheduled tick at or after `now`: START + k * INTERVAL up to END, weekdays only."""
+        if self.args.force:
+            return now
+
+        day = now.date()
+        while True:
+            if day.weekday() < 5:
+                tick = datetime.datetime.combine(day, self.start_time)
+                end = datetime.datetime.combine(day, self.end_time)
+                while tick <= end:
+                    if tick >= now:
+                        return tick
+                    tick += self.interval
+            day += datetime.timedelta(days=1)
+            now = datetime.datetime.combine(day, datetime.time(0, 0))
+
+    def _refresh_stock_list(self):
+        """Re-reads data/stocks.csv only when it has changed on disk."""
+        try:
+            mtime = os.path.getmtime(STOCK_LIST_PATH)
+        except OSError:
+            mtime = None
+        if mtime != self._stock_list_mtime or not self.stock_list:
+            self.stock_list = load_stock_list()
+            self._stock_list_mtime = mtime
+
+    def tick(self):
+        """One full run: pipeline, pending entry evaluation, alert flush. Records timings."""
+        record = {"tick": datetime.datetime.now().isoformat(), "skipped": False}
+        started = time.perf_counter()
+        begin_run("tick")
+        dry_run = getattr(self.args, "dry_run", False)
+        try:
+            if not dry_run:
+                clean_old_pending_entries(days_old=2)
+            self._refresh_stock_list()
+
+            stage = time.perf_counter()
+            if self.stock_list:
+                run_pipeline(self.args, self.stock_list, self.indicator_store)
+            record["pipeline_s"] = round(time.perf_counter() - stage, 3)
+
+            stage = time.perf_counter()
+            if not dry_run:
+                check_pending_entries()
+            record["evaluator_s"] = round(time.perf_counter() - stage, 3)
+
+            # With the dispatcher running, alerts were already handed off as they were produced
+            stage = time.perf_counter()
+            if alert_queue and not self.dispatcher:
+                run_discord_bot()
+            record["alerts_s"] = round(time.perf_counter() - stage, 3)
+        except Exception as e:
+            record["error"] = str(e)
+            log(f"[ERROR] Daemon tick failed: {e}")
+        finally:
+            end_run()
+            record["total_s"] = round(time.perf_counter() - started, 3)
+            self.history.append(record)
+            self._tick_lock.release()
+            log(f"[DAEMON] Tick finished in {record['total_s']}s")
+
+    def latency_history(self):
+        """Per-tick timing records, oldest first."""
+        return list(self.history)
+
+    def run(self):
+        log(f"[DAEMON] Started: {START_ANALYSIS_TIME}-{END_ANALYSIS_TIME} every {INTERVAL_MINUTES} min")
+        if USE_ALERT_DISPATCHER and not getattr(self.args, "dry_run", False):
+            try:
+                self.dispatcher = start_alert_dispatcher()
+            except Exception as e:
+                log(f"[ERROR] Alert dispatcher failed to start; falling back to per-tick logins: {e}")
+        try:
+            while not self._stop.is_set():
+                now = datetime.datetime.now()
+                due = self.next_tick(now)
+                if due > now and self._stop.wait((due - now).total_seconds()):
+                    break
+
+                # Skip rather than queue up behind a tick that is still running
+                if not self._tick_lock.acquire(blocking=False):
+                    log("[DAEMON] Previous tick still running; skipping this one.")
+                    self.history.append({"tick": datetime.datetime.now().isoformat(), "skipped": True})
+                else:
+                    self._worker = threading.Thread(target=self.tick, daemon=True)
+                    self._worker.start()
+
+                # Step past the tick we just handled
+                self._stop.wait(1 if not self.args.force else self.interval.total_seconds())
+        except KeyboardInterrupt:
+            log("[DAEMON] Interrupted.")
+        finally:
+            self.shutdown()
+
+    def stop(self):
+        self._stop.set()
+
+    def shutdown(self):
+        self._stop.set()
+        if self._worker is not None:
+            self._worker.join()
+        if self.indicator_store is not None and not getattr(self.args, "dry_run", False):
+            self.indicator_store.save()
+        if self.dispatcher is not None:
+            stop_alert_dispatcher()
+            self.dispatcher = None
+        log("[DAEMON] Stopped.")
+
+
+if __name__ == "__main__":
+    SignalDaemon(parse_args()).run()
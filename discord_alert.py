@@ -1,23 +1,66 @@
 # output/discord_alert.py
 
-import discord
 from dotenv import load_dotenv
 import os
-import asyncio
 
 # === REQUIRED: Replace with your actual Discord bot token and channel ID ===
 load_dotenv()
 TOKEN = os.getenv("Discord_Alert_Bot_Token")
 CHANNEL_ID = 1373889877002944593  # Your channel ID where alerts should go
 
-# === Initialize client ===
-intents = discord.Intents.default()
-intents.messages = True  # Allow receiving message events (needed to suppress command errors)
-client = discord.Client(intents=intents)
+# === Client is created on first use, so importing this module stays cheap ===
+_client = None
+
+def _new_client(one_shot=True):
+    """
+    A discord.Client with the command-suppressing on_message. one_shot also
+    registers on_ready, which flushes alert_queue and logs out again; the
+    dispatcher's client must not get it, or it would close right after login.
+    """
+    import discord
+
+    intents = discord.Intents.default()
+    intents.messages = True  # Allow receiving message events (needed to suppress command errors)
+    client = discord.Client(intents=intents)
+    if one_shot:
+        client.event(on_ready)
+    client.event(on_message)
+    return client
+
+def get_client():
+    """The one-shot client run_discord_bot() logs in with."""
+    global _client
+    if _client is None:
+        _client = _new_client()
+    return _client
 
 # This queue holds messages until the bot is ready
 alert_queue = []
 
+# Persistent dispatcher (alert_dispatcher.py); when running, alerts go straight to it
+_dispatcher = None
+
+def start_alert_dispatcher():
+    """Logs the client in once and keeps it connected; queued alerts are handed over."""
+    global _dispatcher
+    from alert_dispatcher import AlertDispatcher, DiscordTransport
+
+    if _dispatcher is None:
+        # Its own client: the shared one logs out as soon as on_ready has flushed the queue
+        _dispatcher = AlertDispatcher(DiscordTransport(_new_client(one_shot=False), TOKEN, CHANNEL_ID)).start()
+        for content in alert_queue:
+            _dispatcher.submit(content)
+        alert_queue.clear()
+    return _dispatcher
+
+def stop_alert_dispatcher():
+    """Flushes pending alerts and disconnects."""
+    global _dispatcher
+    if _dispatcher is not None:
+        _dispatcher.stop()
+        print(f"[DISCORD ✅] Dispatcher stopped: {_dispatcher.summary()}")
+        _dispatcher = None
+
 def send_discord_alert(symbol, trend, signals):
     """Builds a formatted alert message and queues it for Discord posting."""
     emoji = "📈" if trend == "Bullish" else "📉" if trend == "Bearish" else "⚖️"
@@ -31,11 +74,14 @@ def send_discord_alert(symbol, trend, signals):
         f"- Volume Spike: {'🚀' if signals.get('volume_spike') else '—'}"
     )
 
-    alert_queue.append(content)
+    if _dispatcher is not None:
+        _dispatcher.submit(content)
+    else:
+        alert_queue.append(content)
 
-@client.event
 async def on_ready():
     """Triggered when the bot logs in successfully."""
+    client = get_client()
     print(f"[DISCORD BOT ✅] Logged in as {client.user}")
     channel = client.get_channel(CHANNEL_ID)
 
@@ -50,11 +96,11 @@ async def on_ready():
             print("[DISCORD ✅] Alert sent.")
         except Exception as e:
             print(f"[DISCORD ❌] Failed to send alert: {e}")
+    alert_queue.clear()
 
     # Close the bot once alerts are sent
     await client.close()
 
-@client.event
 async def on_message(message):
     """
     Suppresses accidental command inputs like `!clear`.
@@ -66,6 +112,10 @@ async def on_message(message):
 def run_discord_bot():
     """Safely runs the bot."""
     try:
+        # A long-running process calls this once per tick; a closed client must be reset first
+        client = get_client()
+        if client.is_closed():
+            client.clear()
         client.run(TOKEN)
     except Exception as e:
         print(f"[DISCORD ERROR] Bot failed to run: {e}")
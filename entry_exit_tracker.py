@@ -1,14 +1,101 @@
 import os
 import csv
-from config import PENDING_ENTRIES_PATH, ENTRY_LOG_PATH
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from config import ENTRY_LOG_PATH, EXIT_SESSION_END, EXIT_BAR_INTERVAL, EXIT_BAR_PERIOD
+from pending_store import get_pending_store
+from trade_store import get_trade_store
+from price_data import get_price_data_many
+from timeframes import interval_to_timedelta
+from logger import log
+
+
+def evaluate_exits(trades, frames, now=None, interval=EXIT_BAR_INTERVAL, session_end=EXIT_SESSION_END):
+    """
+    Exit rules for every open trade at once. `trades` is TradeStore.open_trades();
+    `frames` maps symbol -> bars. Only completed bars after the trade's entry
+    and after its last checked bar are looked at. Per bar, in order:
+    stop (Low/High through the stop; wins a tie with the target, to stay
+    conservative), target, then the time stop at the first bar starting at or
+    after `session_end` or on a later day than the entry (exit at that bar's close).
+
+    Returns (closes, last_bars): one row per trade that exited, and the newest
+    bar checked per trade id.
+    """
+    now = pd.Timestamp(now or datetime.now())
+    bar_length = interval_to_timedelta(interval)
+    parts = []
+    for symbol, df in frames.items():
+        if df is None or df.empty:
+            continue
+        parts.append(pd.DataFrame({
+            "symbol": symbol, "time": pd.DatetimeIndex(df.index).astype("datetime64[ns]"),
+            "high": df["High"].to_numpy(dtype=float), "low": df["Low"].to_numpy(dtype=float),
+            "close": df["Close"].to_numpy(dtype=float),
+        }))
+    empty = pd.DataFrame(columns=["id", "symbol", "exit_time", "exit_price", "exit_reason", "change_pct", "pnl", "outcome"])
+    if trades.empty or not parts:
+        return empty, {}
+    bars = pd.concat(parts, ignore_index=True)
+    bars = bars[bars["time"] + bar_length <= now]
+    first_bar = bars.groupby("symbol")["time"].min()
+
+    # Trades whose entry session is older than any bar we hold can't be priced any more
+    stale = trades["entry_time"].dt.normalize() < trades["symbol"].map(first_bar).dt.normalize()
+    expired, trades = trades[stale], trades[~stale]
+
+    # Every open trade against every new bar of its symbol
+    rows = trades.merge(bars, on="symbol")
+    start = rows["last_bar"].where(rows["last_bar"] > rows["entry_time"], rows["entry_time"])
+    rows = rows[rows["time"] > start].sort_values(["id", "time"], kind="stable")
+
+    long = rows["direction"] == 1
+    hit_stop = np.where(long, rows["low"] <= rows["stop"], rows["high"] >= rows["stop"])
+    hit_target = np.where(long, rows["high"] >= rows["target"], rows["low"] <= rows["target"])
+    cutoff = pd.Timestamp(session_end).time()
+    hit_time = (rows["time"].dt.time >= cutoff) | (rows["time"].dt.normalize() > rows["entry_time"].dt.normalize())
+
+    rows = rows.assign(
+        exit_reason=np.select([hit_stop, hit_target, hit_time], ["stop", "target", "session_end"], ""),
+        exit_price=np.select([hit_stop, hit_target], [rows["stop"], rows["target"]], rows["close"]),
+    )
+    last_bars = rows.groupby("id")["time"].max().to_dict()
+    exits = rows[rows["exit_reason"] != ""].groupby("id", sort=False).head(1)
+
+    closes = pd.DataFrame({
+        "id": exits["id"], "symbol": exits["symbol"], "exit_time": exits["time"],
+        "exit_price": exits["exit_price"], "exit_reason": exits["exit_reason"],
+    })
+    change = (exits["exit_price"] / exits["entry_price"] - 1) * exits["direction"] * 100
+    closes["change_pct"] = change.round(4)
+    closes["pnl"] = ((exits["exit_price"] - exits["entry_price"]) * exits["direction"]).round(4)
+    closes["outcome"] = np.where(change > 0, "win", np.where(change < 0, "loss", "flat"))
+
+    if not expired.empty:
+        closes = pd.concat([closes, pd.DataFrame({
+            "id": expired["id"], "symbol": expired["symbol"], "exit_time": expired["symbol"].map(first_bar),
+            "exit_price": np.nan, "exit_reason": "expired", "change_pct": np.nan, "pnl": np.nan, "outcome": "expired",
+        })], ignore_index=True)
+    return closes.reset_index(drop=True), last_bars
+
 
 class TradeTracker:
 
     @staticmethod
-    def queue_pending_entry(symbol, trend, signal_time, signal_high, signal_low, vwap, entry_condition, notes=""):
-        os.makedirs(os.path.dirname(PENDING_ENTRIES_PATH), exist_ok=True)
-        headers = ["Symbol", "Trend", "Signal Source Time", "High", "Low", "VWAP", "Entry Condition", "Notes", "Status", "Trigger Price", "Direction"]
-        row = {
+    def pending_store():
+        return get_pending_store()
+
+    @staticmethod
+    def trade_store():
+        return get_trade_store()
+
+    @staticmethod
+    def queue_pending_entry(symbol, trend, signal_time, signal_high, signal_low, vwap, entry_condition, notes="", trigger_price=None):
+        # trigger_price falls back to the number in entry_condition when not given
+        return get_pending_store().add({
             "Symbol": symbol,
             "Trend": trend,
             "Signal Source Time": signal_time,
@@ -18,15 +105,13 @@ class TradeTracker:
             "Entry Condition": entry_condition,
             "Notes": notes,
             "Status": "waiting",
-            "Trigger Price": 0.0,
+            "Trigger Price": trigger_price,
             "Direction": trend.lower()
-        }
-        file_exists = os.path.exists(PENDING_ENTRIES_PATH)
-        with open(PENDING_ENTRIES_PATH, "a", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=headers)
-            if not file_exists:
-                writer.writeheader()
-            writer.writerow(row)
+        })
+
+    @staticmethod
+    def is_already_queued(symbol, trigger_price):
+        return get_pending_store().is_queued(symbol, trigger_price)
 
     @staticmethod
     def mark_trade_entry(entry_data):
@@ -37,3 +122,50 @@ class TradeTracker:
             if not file_exists:
                 writer.writeheader()
             writer.writerow(entry_data)
+
+    @staticmethod
+    def open_trades(entries):
+        """Opens a trade for each entered pending entry (store dicts); already-opened ones are skipped."""
+        opened = get_trade_store().add_many({
+            "pending_id": entry.get("id"),
+            "Symbol": entry.get("Symbol"),
+            "Trend at Entry": entry.get("Trend"),
+            "Direction": entry.get("Direction"),
+            "Entry Time": entry.get("Entry Time"),
+            "Entry Price": entry.get("Entry Price"),
+            "Rationale": entry.get("Entry Condition"),
+            "Signal Source Time": entry.get("Signal Source Time"),
+            "Notes": entry.get("Notes"),
+        } for entry in entries)
+        if opened:
+            get_trade_store().export_csv()
+        return opened
+
+    @staticmethod
+    def update_open_trades(now=None):
+        """
+        Checks every open trade against the bars since it was last checked (one
+        batched fetch), closes the ones that hit an exit rule and books them in
+        the P&L ledger. Returns the closes.
+        """
+        store = get_trade_store()
+        trades = store.open_trades()
+        if trades.empty:
+            return pd.DataFrame()
+        frames = get_price_data_many(sorted(trades["symbol"].unique()), interval=EXIT_BAR_INTERVAL, period=EXIT_BAR_PERIOD)
+        closes, last_bars = evaluate_exits(trades, frames, now=now)
+        # Only what this pass closed; a concurrent evaluator may have closed some first
+        closes = store.apply_exits(closes, last_bars)
+        for close in closes.itertuples(index=False):
+            if close.exit_reason == "expired":
+                log(f"[EXIT] {close.symbol} trade #{close.id} expired: no bars left from its entry session")
+            else:
+                log(f"[EXIT] {close.symbol} {close.exit_reason} @ {close.exit_price} ({close.change_pct:+.2f}%, {close.outcome})")
+        if not closes.empty:
+            store.export_csv()
+        return closes
+
+    @staticmethod
+    def pnl_summary(scope="day"):
+        """Running P&L per "day" or per "symbol" from the ledger."""
+        return get_trade_store().ledger(scope)
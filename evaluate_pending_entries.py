@@ -1,102 +1,129 @@
-import os
-import csv
-from price_data import get_recent_price_data  # Fetches latest 1-minute OHLC data
+from datetime import datetime
+from price_data import get_latest_prices  # Batched last-close snapshot (1-minute bars)
 from logger import log  # Centralized logging
+from entry_exit_tracker import TradeTracker
+from trigger_index import get_trigger_index
+from metrics import span, incr, begin_run, end_run
 
 # File paths (used for tracking pending and confirmed entries)
-PENDING_FILE = "output/logs/pending_entries.csv"
 LOG_FILE = "output/logs/entry_log.txt"
 
 def get_current_price(symbol):
     """
-    Gets the most recent price from yfinance using get_recent_price_data().
+    Gets the most recent price for one symbol via get_latest_prices().
     Returns float or None if unavailable.
     """
     try:
-        df = get_recent_price_data(symbol)
-        if df is not None and not df.empty:
-            return df["Close"].iloc[-1].item()
+        return get_latest_prices([symbol]).get(symbol)
     except Exception as e:
         log(f"[ERROR] Failed to fetch price for {symbol}: {e}")
     return None
 
-def load_pending_entries():
+def load_pending_entries(status=None):
     """
-    Loads entries from the pending_entries.csv file.
-    Each row is returned as a dict.
+    Loads entries from the pending entry store, optionally only one status.
+    Each row is returned as a dict (CSV column names plus "id").
     """
-    entries = []
-    if os.path.exists(PENDING_FILE):
-        with open(PENDING_FILE, mode="r", newline="") as csvfile:
-            reader = csv.DictReader(csvfile)
-            for row in reader:
-                entries.append(row)
-    else:
-        log(f"[WARNING] No pending entries file found: {PENDING_FILE}")
-    return entries
+    return TradeTracker.pending_store().entries(status=status)
 
 def save_pending_entries(entries):
     """
-    Saves the updated list of pending entries back to CSV.
+    Writes status changes back to the store in one transaction.
+    Only rows whose Status/Entry Time/Entry Price changed are touched.
     """
     if not entries:
         return
-    with open(PENDING_FILE, mode="w", newline="") as csvfile:
-        fieldnames = entries[0].keys()
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(entries)
+    TradeTracker.pending_store().update_many(
+        (entry["id"], entry["Status"], entry.get("Entry Time"), entry.get("Entry Price"))
+        for entry in entries
+        if entry.get("_dirty")
+    )
 
 def check_pending_entries():
     """
     Core logic that reviews all pending trades:
-    - Loads entries from CSV
-    - Checks if current price meets the trigger condition
-    - If so, marks as 'entered' and logs it
+    - Syncs the trigger index with the waiting entries in the store
+    - Fetches one price per symbol and resolves it against the index
+    - Marks every triggered entry as 'entered' and opens a trade for it
+    - Runs the exit rules over the open trades and books closes in the P&L ledger
     """
-    all_entries = load_pending_entries()
-    updated_entries = []
-
-    for entry in all_entries:
-        symbol = entry.get("Symbol")
-        status = entry.get("Status", "waiting").lower()
-        direction = entry.get("Direction", "bullish").lower()
+    begin_run("evaluator")
+    try:
+        with span("evaluate_pending"):
+            _check_pending_entries()
+        with span("exits"):
+            try:
+                TradeTracker.update_open_trades()
+            except Exception as e:
+                log(f"[ERROR] Exit check failed: {e}")
+    finally:
+        end_run()
 
-        if status == "entered":
-            updated_entries.append(entry)  # Already handled
-            continue
+def _check_pending_entries():
+    store = TradeTracker.pending_store()
+    index = get_trigger_index()
+    with span("index_sync"):
+        index.sync(store)
 
-        try:
-            trigger_price = float(entry.get("Trigger Price", 0))
-        except ValueError:
-            log(f"[ERROR] Invalid trigger price for {symbol}. Skipping.")
-            entry["Status"] = "waiting"
-            updated_entries.append(entry)
-            continue
+    # One batched snapshot for the symbols with waiting entries instead of a fetch per row
+    symbols = index.symbols()
+    try:
+        with span("price_snapshot"):
+            prices = get_latest_prices(symbols) if symbols else {}
+    except Exception as e:
+        log(f"[ERROR] Failed to fetch prices: {e}")
+        prices = {}
+    waiting = len(index)
+    log(f"[EVAL] Fetched {len(symbols)} symbols for {waiting} waiting entries")
+    incr("entries_checked", waiting)
 
-        current_price = get_current_price(symbol)
-        if current_price is None:
-            log(f"[SKIP] {symbol} — could not fetch current price")
-            entry["Status"] = "waiting"
-            updated_entries.append(entry)
-            continue
+    for symbol in symbols:
+        if prices.get(symbol) is None:
+            misses = index.count(symbol)
+            log(f"[SKIP] {symbol} — could not fetch current price ({misses} waiting)")
+            incr("price_misses", misses)
 
-        # Trigger logic based on direction
-        triggered = (
-            direction == "bullish" and current_price >= trigger_price or
-            direction == "bearish" and current_price <= trigger_price
-        )
+    with span("store_update"):
+        resolve({symbol: price for symbol, price in prices.items() if price is not None})
+        store.export_csv()
 
-        if triggered:
-            log(f"[ENTRY ✅] {symbol} triggered @ {current_price} (Target: {trigger_price})")
+def resolve(prices):
+    """
+    Marks every waiting entry that {symbol: price} triggers as entered, in one
+    store transaction. Bullish entries trigger at price >= trigger, bearish at
+    price <= trigger. Returns the entered entries.
+    """
+    index = get_trigger_index()
+    store = TradeTracker.pending_store()
+    entered = []
+    for symbol, current_price in prices.items():
+        for entry in index.on_price(symbol, current_price):
+            log(f"[ENTRY ✅] {symbol} triggered @ {current_price} (Target: {entry.get('Trigger Price')})")
             entry["Status"] = "entered"
-            # TODO: TradeTracker.mark_trade_entry(entry)  # Optional integration
-        else:
-            entry["Status"] = "waiting"
-
-        updated_entries.append(entry)
+            entry["Entry Time"] = datetime.now().isoformat()
+            entry["Entry Price"] = current_price
+            entry["_dirty"] = True
+            incr("entries_triggered")
+            entered.append(entry)
+    try:
+        save_pending_entries(entered)
+    except Exception:
+        # on_price() already took these out of the index; reload them from the store next time
+        index.clear()
+        raise
+    index.mark_synced(store, len(entered))
+    if entered:
+        TradeTracker.open_trades(entered)
+    return entered
 
-    save_pending_entries(updated_entries)
+def on_price(symbol, price):
+    """
+    Event hook for streaming prices: resolves `symbol`'s waiting entries against
+    one new price through the trigger index. The index only reloads from the
+    store when the store has changed, so calling this per tick is cheap.
+    """
+    get_trigger_index().sync(TradeTracker.pending_store())
+    return resolve({symbol.upper(): price})
 
 if __name__ == "__main__":
     check_pending_entries()
@@ -0,0 +1,236 @@
+# indicator_state.py
+
+import os
+import json
+import math
+from collections import deque
+
+import pandas as pd
+
+from config import INDICATOR_STATE_PATH
+
+NAN = float("nan")
+
+
+class _Ema:
+    """adjust=False EWM that ignores leading NaNs and honours min_periods, like pandas."""
+
+    __slots__ = ("alpha", "min_periods", "value", "count")
+
+    def __init__(self, alpha, min_periods, value=None, count=0):
+        self.alpha = alpha
+        self.min_periods = min_periods
+        self.value = value
+        self.count = count
+
+    def update(self, x):
+        if math.isnan(x):
+            return
+        self.value = x if self.value is None else self.alpha * x + (1 - self.alpha) * self.value
+        self.count += 1
+
+    def current(self):
+        return self.value if self.count >= self.min_periods else NAN
+
+    def to_dict(self):
+        return {"value": self.value, "count": self.count}
+
+
+class StreamingIndicators:
+    """
+    Per-symbol indicator state updated one bar at a time in constant work:
+    EMA 9/21, MACD 12/26/9 histogram, Wilder RSI 14, 14-bar VWAP and a
+    20-bar volume ring buffer. signals() returns the same dict as
+    analyze_signals() would for the bars fed so far.
+
+    Feeding a bar with the same timestamp as the previous one revises it,
+    so the in-progress bar can be refreshed on every run.
+    """
+
+    VWAP_WINDOW = 14
+    VOLUME_WINDOW = 20
+    MIN_BARS = 30
+
+    def __init__(self, symbol=""):
+        self.symbol = symbol
+        self._reset()
+
+    def _reset(self):
+        self.bars = 0
+        self.last_ts = None
+        self.close = NAN
+        self.volume = NAN
+        self.ema9 = _Ema(2 / (9 + 1), 9)
+        self.ema21 = _Ema(2 / (21 + 1), 21)
+        self.ema12 = _Ema(2 / (12 + 1), 12)
+        self.ema26 = _Ema(2 / (26 + 1), 26)
+        self.macd_signal = _Ema(2 / (9 + 1), 9)
+        self.rsi_up = _Ema(1 / 14, 14)
+        self.rsi_down = _Ema(1 / 14, 14)
+        self.pv = deque(maxlen=self.VWAP_WINDOW)
+        self.vwap_volume = deque(maxlen=self.VWAP_WINDOW)
+        self.volumes = deque(maxlen=self.VOLUME_WINDOW)
+        self._before_last = None
+
+    def update(self, high, low, close, volume, timestamp=None):
+        """Feeds one bar. A repeated timestamp replaces the last bar instead of appending."""
+        if timestamp is not None:
+            timestamp = pd.Timestamp(timestamp).isoformat()
+            if timestamp == self.last_ts and self._before_last is not None:
+                self._restore(self._before_last)
+            elif self.last_ts is not None and timestamp < self.last_ts:
+                return
+        self._before_last = self._state()
+
+        high, low, close, volume = float(high), float(low), float(close), float(volume)
+
+        # Matches ta: the first bar's move is NaN, which counts as a 0.0 move
+        diff = close - self.close if self.bars else NAN
+        self.rsi_up.update(diff if diff > 0 else 0.0)
+        self.rsi_down.update(-diff if diff < 0 else 0.0)
+
+        self.ema9.update(close)
+        self.ema21.update(close)
+        self.ema12.update(close)
+        self.ema26.update(close)
+        macd = self.ema12.current() - self.ema26.current()
+        self.macd_signal.update(macd)
+
+        self.pv.append((high + low + close) / 3.0 * volume)
+        self.vwap_volume.append(volume)
+        self.volumes.append(volume)
+
+        self.close = close
+        self.volume = volume
+        self.bars += 1
+        self.last_ts = timestamp
+
+    def update_frame(self, df):
+        """Feeds every bar of a frame that is not older than the last bar already seen."""
+        high, low = df["High"].squeeze(), df["Low"].squeeze()
+        close, volume = df["Close"].squeeze(), df["Volume"].squeeze()
+        for ts, h, l, c, v in zip(df.index, high, low, close, volume):
+            self.update(h, l, c, v, timestamp=ts)
+        return self
+
+    def indicators(self):
+        ema12, ema26 = self.ema12.current(), self.ema26.current()
+        macd = ema12 - ema26
+        signal = self.macd_signal.current()
+
+        up, down = self.rsi_up.current(), self.rsi_down.current()
+        if down == 0:
+            rsi = 100.0
+        elif math.isnan(up) or math.isnan(down):
+            rsi = NAN
+        else:
+            rsi = 100 - (100 / (1 + up / down))
+
+        vwap = NAN
+        if len(self.pv) == self.VWAP_WINDOW:
+            total_volume = sum(self.vwap_volume)
+            vwap = sum(self.pv) / total_volume if total_volume else NAN
+
+        avg_vol = sum(self.volumes) / self.VOLUME_WINDOW if len(self.volumes) == self.VOLUME_WINDOW else NAN
+
+        return {
+            "ema9": self.ema9.current(), "ema21": self.ema21.current(), "vwap": vwap,
+            "macd_hist": macd - signal, "rsi": rsi, "avg_vol": avg_vol,
+        }
+
+    def signals(self):
+        if self.bars < self.MIN_BARS:
+            return {"error": "Not enough data"}
+
+        ind = self.indicators()
+        return {
+            "ema_bullish": ind["ema9"] > ind["ema21"],
+            "ema_bearish": ind["ema9"] < ind["ema21"],
+            "vwap_above": self.close > ind["vwap"],
+            "vwap_below": self.close < ind["vwap"],
+            "macd_positive": ind["macd_hist"] > 0,
+            "macd_negative": ind["macd_hist"] < 0,
+            "rsi": ind["rsi"],
+            "rsi_bullish": ind["rsi"] > 50,
+            "rsi_bearish": ind["rsi"] < 50,
+            "volume_spike": self.volume > ind["avg_vol"] * 1.5,
+        }
+
+    # --- Serialization ---
+
+    def _state(self):
+        return {
+            "bars": self.bars, "last_ts": self.last_ts, "close": self.close, "volume": self.volume,
+            "ema9": self.ema9.to_dict(), "ema21": self.ema21.to_dict(),
+            "ema12": self.ema12.to_dict(), "ema26": self.ema26.to_dict(),
+            "macd_signal": self.macd_signal.to_dict(),
+            "rsi_up": self.rsi_up.to_dict(), "rsi_down": self.rsi_down.to_dict(),
+            "pv": list(self.pv), "vwap_volume": list(self.vwap_volume), "volumes": list(self.volumes),
+        }
+
+    def _restore(self, state):
+        self.bars = state["bars"]
+        self.last_ts = state["last_ts"]
+        self.close = state["close"]
+        self.volume = state["volume"]
+        for name in ("ema9", "ema21", "ema12", "ema26", "macd_signal", "rsi_up", "rsi_down"):
+            ema = getattr(self, name)
+            ema.value, ema.count = state[name]["value"], state[name]["count"]
+        self.pv = deque(state["pv"], maxlen=self.VWAP_WINDOW)
+        self.vwap_volume = deque(state["vwap_volume"], maxlen=self.VWAP_WINDOW)
+        self.volumes = deque(state["volumes"], maxlen=self.VOLUME_WINDOW)
+
+    def to_dict(self):
+        return {"symbol": self.symbol, "state": self._state(), "before_last": self._before_last}
+
+    @classmethod
+    def from_dict(cls, data):
+        obj = cls(data.get("symbol", ""))
+        obj._restore(data["state"])
+        obj._before_last = data.get("before_last")
+        return obj
+
+
+class IndicatorStateStore:
+    """Keeps one StreamingIndicators per symbol and persists them as JSON between runs."""
+
+    def __init__(self, path=INDICATOR_STATE_PATH):
+        self.path = path
+        self.states = {}
+
+    def load(self):
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r") as f:
+                    data = json.load(f)
+                self.states = {s: StreamingIndicators.from_dict(d) for s, d in data.items()}
+            except Exception as e:
+                print(f"[WARN] Could not load indicator state from {self.path}: {e}")
+                self.states = {}
+        return self
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({s: state.to_dict() for s, state in self.states.items()}, f)
+        os.replace(tmp_path, self.path)
+
+    def sync(self, symbol, df):
+        """
+        Brings a symbol's state up to date with the bars in df. If df starts after
+        the last bar we saw (a hole in history), the state is rebuilt from df.
+        """
+        state = self.states.get(symbol)
+        if state is not None and state.last_ts is not None and not df.empty:
+            if pd.Timestamp(df.index[0]) > pd.Timestamp(state.last_ts):
+                state = None
+
+        if state is None:
+            state = StreamingIndicators(symbol)
+            self.states[symbol] = state
+
+        last_ts = pd.Timestamp(state.last_ts) if state.last_ts is not None else None
+        new_bars = df if last_ts is None else df[df.index >= last_ts]
+        state.update_frame(new_bars)
+        return state
@@ -0,0 +1,211 @@
+# label_predictions.py
+#
+# Fills in Entry Time / Entry Price / Exit Time / Exit Price / Change % / Outcome
+# for logged predictions, in bulk. Every unlabeled row of the closed days is
+# joined against the bar history with merge_asof grouped by symbol:
+#
+#   1. forward as-of join: first bar at or after the prediction
+#   2. the same 0.5% trigger main.py queues, checked over the next
+#      LABEL_TRIGGER_WINDOW_BARS bars for all rows at once -> fill bar
+#   3. backward as-of join at fill time + LABEL_HOLD_MINUTES -> exit bar
+#
+# Rows whose window or hold runs past the available bars stay unlabeled and are
+# picked up on a later run, as do rows older than the bars the provider returned
+# (nothing is decided about them). Bars come straight from the provider: the
+# bar cache is sized for the live runs, not for LABEL_PERIOD of history. Each
+# touched day is rewritten once.
+#
+#   python label_predictions.py --provider replay
+
+import argparse
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from config import (
+    LABEL_INTERVAL, LABEL_PERIOD, LABEL_TRIGGER_WINDOW_BARS, LABEL_HOLD_MINUTES, LABEL_BUFFER, PRICE_PROVIDER
+)
+from price_data import get_price_data_many, set_price_provider
+from prediction_logger import get_prediction_sink
+
+DIRECTIONS = {"Bullish": 1, "Bearish": -1}
+LABEL_COLUMNS = ["Entry Time", "Entry Price", "Exit Time", "Exit Price", "Change %", "Outcome"]
+
+
+def _bar_table(frames):
+    """All bars in one frame sorted by (Symbol, Time), with each row's position and its symbol's last position and time span."""
+    parts = []
+    for symbol, df in frames.items():
+        if df is None or df.empty:
+            continue
+        parts.append(pd.DataFrame({
+            "Symbol": symbol, "Time": pd.DatetimeIndex(df.index).astype("datetime64[ns]"),
+            "High": df["High"].to_numpy(dtype=float), "Low": df["Low"].to_numpy(dtype=float),
+            "Close": df["Close"].to_numpy(dtype=float),
+        }))
+    if not parts:
+        return pd.DataFrame(columns=["Symbol", "Time", "High", "Low", "Close", "pos", "end", "first_time", "last_time"])
+    bars = pd.concat(parts, ignore_index=True).sort_values(["Symbol", "Time"], ignore_index=True)
+    bars["pos"] = np.arange(len(bars))
+    grouped = bars.groupby("Symbol")
+    bars["end"] = grouped["pos"].transform("max")
+    bars["first_time"] = grouped["Time"].transform("min")
+    bars["last_time"] = grouped["Time"].transform("max")
+    return bars
+
+
+def label(predictions, frames, window=LABEL_TRIGGER_WINDOW_BARS, hold_minutes=LABEL_HOLD_MINUTES,
+          buffer=LABEL_BUFFER):
+    """
+    Labels for `predictions` (typed rows, any index) from {symbol: bars}.
+    Returns a frame of LABEL_COLUMNS on the same index; rows that can't be
+    decided yet keep an empty Outcome.
+    """
+    out = pd.DataFrame(index=predictions.index)
+    out["Entry Time"] = pd.Series(pd.NaT, index=out.index, dtype="datetime64[ns]")
+    out["Exit Time"] = pd.Series(pd.NaT, index=out.index, dtype="datetime64[ns]")
+    for col in ("Entry Price", "Exit Price", "Change %"):
+        out[col] = np.nan
+    out["Outcome"] = ""
+
+    # Bullish triggers sit above the signal bar's high, bearish below its low
+    direction = predictions["Trend"].map(DIRECTIONS).fillna(0).astype(int)
+    level = predictions["Signal High"].where(direction == 1, predictions["Signal Low"])
+    tradeable = (direction != 0) & (level > 0)
+    out.loc[~tradeable, "Outcome"] = "no_trade"
+
+    rows = predictions[tradeable & predictions["Timestamp"].notna()]
+    bars = _bar_table(frames)
+    if rows.empty or bars.empty:
+        return out
+
+    # 1. First bar at or after each prediction, per symbol
+    left = pd.DataFrame({"row": rows.index, "Symbol": rows["Symbol"].to_numpy(),
+                         "Timestamp": rows["Timestamp"].astype("datetime64[ns]").to_numpy()})
+    left = left.sort_values("Timestamp", kind="stable")
+    starts = pd.merge_asof(left, bars[["Symbol", "Time", "pos", "end", "first_time", "last_time"]].sort_values("Time"),
+                           left_on="Timestamp", right_on="Time", by="Symbol", direction="forward")
+    starts = starts.set_index("row").reindex(rows.index)
+
+    # Predictions older than the history we have can't be placed; left for a run with more bars
+    too_old = starts["first_time"].notna() & (starts["first_time"] > rows["Timestamp"])
+    placed = starts["pos"].notna() & ~too_old
+    rows, starts = rows[placed], starts[placed]
+    if rows.empty:
+        return out
+
+    # 2. Trigger fill: first bar of the window whose range reaches the trigger
+    dirs = direction[rows.index].to_numpy()
+    base = level[rows.index].to_numpy()
+    trigger = np.where(dirs == 1, np.round(base * (1 + buffer), 2), np.round(base * (1 - buffer), 2))
+    first, end = starts["pos"].to_numpy(dtype=np.int64), starts["end"].to_numpy(dtype=np.int64)
+    high, low = bars["High"].to_numpy(), bars["Low"].to_numpy()
+    times = bars["Time"].to_numpy()
+
+    fill = np.full(len(rows), -1, dtype=np.int64)
+    for k in range(window):
+        pos = first + k
+        valid = (fill < 0) & (pos <= end)
+        at = np.minimum(pos, len(bars) - 1)
+        crossed = valid & np.where(dirs == 1, high[at] >= trigger, low[at] <= trigger)
+        fill[crossed] = pos[crossed]
+    window_done = first + window - 1 <= end
+
+    no_fill = (fill < 0) & window_done
+    out.loc[rows.index[no_fill], "Outcome"] = "no_fill"
+    filled = fill >= 0
+    if not filled.any():
+        return out
+
+    # 3. Exit: last bar at or before fill time + hold, once the history reaches that far
+    idx = rows.index[filled]
+    entry_time = times[fill[filled]]
+    target = entry_time + np.timedelta64(int(hold_minutes), "m")
+    right = pd.DataFrame({"Symbol": rows["Symbol"].to_numpy()[filled], "Target": target, "row": idx})
+    right = right.sort_values("Target", kind="stable")
+    exits = pd.merge_asof(right, bars[["Symbol", "Time", "Close", "last_time"]].sort_values("Time"),
+                          left_on="Target", right_on="Time", by="Symbol", direction="backward")
+    exits = exits.set_index("row").reindex(idx)
+
+    entry_price = trigger[filled]
+    out.loc[idx, "Entry Time"] = entry_time
+    out.loc[idx, "Entry Price"] = entry_price
+
+    closed = (exits["last_time"] >= exits["Target"]).to_numpy()
+    exit_price = exits["Close"].to_numpy()
+    change = (exit_price / entry_price - 1) * dirs[filled] * 100
+    done = idx[closed]
+    out.loc[done, "Exit Time"] = exits["Time"].to_numpy()[closed]
+    out.loc[done, "Exit Price"] = exit_price[closed]
+    out.loc[done, "Change %"] = np.round(change[closed], 4)
+    out.loc[done, "Outcome"] = np.where(change[closed] > 0, "win", np.where(change[closed] < 0, "loss", "flat"))
+    return out
+
+
+def label_predictions(interval=LABEL_INTERVAL, period=LABEL_PERIOD, window=LABEL_TRIGGER_WINDOW_BARS,
+                      hold_minutes=LABEL_HOLD_MINUTES, buffer=LABEL_BUFFER):
+    """Labels every unlabeled prediction of the closed days and writes each touched day back once."""
+    sink = get_prediction_sink()
+    sink.flush()
+    sink.compact()
+    today = datetime.now().strftime("%Y-%m-%d")
+
+    frames, days = [], {}
+    for day, _ in sink.days():
+        if day >= today:
+            continue
+        df = sink.load_day(day)
+        days[day] = df
+        # "no_data" was once written for rows older than the bars; they are retried too
+        pending = df[df["Outcome"].fillna("").isin(["", "no_data"])]
+        if not pending.empty:
+            frames.append(pending.assign(_day=day, _row=pending.index))
+    if not frames:
+        return {"unlabeled": 0, "labeled": 0, "days": 0}
+
+    unlabeled = pd.concat(frames, ignore_index=True)
+    symbols = sorted(unlabeled["Symbol"].unique())
+    bars = get_price_data_many(symbols, interval=interval, period=period, use_cache=False)
+    labels = label(unlabeled, bars, window, hold_minutes, buffer)
+
+    decided = labels["Outcome"] != ""
+    cleared = unlabeled["Outcome"].fillna("") == "no_data"
+    touched = 0
+    for day, group in labels[decided | labels["Entry Time"].notna() | cleared].groupby(unlabeled["_day"]):
+        df = days[day]
+        target_rows = unlabeled.loc[group.index, "_row"].to_numpy()
+        before = df.loc[target_rows, LABEL_COLUMNS].copy()
+        for col in LABEL_COLUMNS:
+            df.loc[target_rows, col] = group[col].to_numpy()
+        if df.loc[target_rows, LABEL_COLUMNS].equals(before):
+            continue  # Fills already recorded on an earlier run, exits still out of reach
+        sink.rewrite_day(day, df)
+        touched += 1
+
+    return {"unlabeled": len(unlabeled), "labeled": int(decided.sum()),
+            "entered": int(labels["Entry Time"].notna().sum()), "days": touched,
+            **labels.loc[decided, "Outcome"].value_counts().to_dict()}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Label logged predictions with trigger fills and outcomes.")
+    parser.add_argument("--provider", type=str, default=PRICE_PROVIDER)
+    parser.add_argument("--interval", type=str, default=LABEL_INTERVAL)
+    parser.add_argument("--period", type=str, default=LABEL_PERIOD)
+    parser.add_argument("--window", type=int, default=LABEL_TRIGGER_WINDOW_BARS, help="Bars a trigger stays live")
+    parser.add_argument("--hold", type=int, default=LABEL_HOLD_MINUTES, help="Minutes from fill to exit")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    set_price_provider(args.provider)
+    started = datetime.now()
+    result = label_predictions(args.interval, args.period, args.window, args.hold)
+    print(f"[LABEL] {result} in {(datetime.now() - started).total_seconds():.2f}s")
+    return result
+
+
+if __name__ == "__main__":
+    main()
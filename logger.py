@@ -1,32 +1,192 @@
 import os
 import re
+import json
+import time
+import queue
+import atexit
+import threading
 
 from datetime import datetime
-from config import LOG_PATH
+from config import (
+    LOG_PATH, LOG_QUEUE_SIZE, LOG_FLUSH_SECONDS, LOG_FLUSH_LINES,
+    LOG_MAX_BYTES, LOG_BACKUP_COUNT, LOG_JSON
+)
+
+EMOJI_PATTERN = re.compile(r"["
+    "\U0001F600-\U0001F64F"
+    "\U0001F300-\U0001F5FF"
+    "\U0001F680-\U0001F6FF"
+    "\U0001F700-\U0001F77F"
+    "\U0001F780-\U0001F7FF"
+    "\U0001F800-\U0001F8FF"
+    "\U0001F900-\U0001F9FF"
+    "\U0001FA00-\U0001FA6F"
+    "\U0001FA70-\U0001FAFF"
+    "\u2600-\u26FF"
+    "\u2700-\u27BF"
+    "]+", flags=re.UNICODE)
+
+_STOP = object()
+
 
 def strip_emoji(text):
-    emoji_pattern = re.compile(r"["
-        "\U0001F600-\U0001F64F"
-        "\U0001F300-\U0001F5FF"
-        "\U0001F680-\U0001F6FF"
-        "\U0001F700-\U0001F77F"
-        "\U0001F780-\U0001F7FF"
-        "\U0001F800-\U0001F8FF"
-        "\U0001F900-\U0001F9FF"
-        "\U0001FA00-\U0001FA6F"
-        "\U0001FA70-\U0001FAFF"
-        "\u2600-\u26FF"
-        "\u2700-\u27BF"
-        "]+", flags=re.UNICODE)
-    return emoji_pattern.sub(r'', text)
-
-def log(message):
-    timestamped = f"[{datetime.now()}] {message}"
-    print(timestamped)
-    try:
-        safe_message = strip_emoji(timestamped)
-        os.makedirs(os.path.dirname(LOG_PATH), exist_ok=True)
-        with open(LOG_PATH, "a", encoding="utf-8") as f:
-            f.write(safe_message + "\n")
-    except Exception as e:
-        print(f"[Log Error] Could not write log entry: {e}")
+    return EMOJI_PATTERN.sub(r'', text)
+
+
+class LogWriter:
+    """
+    Writes log lines to LOG_PATH from a background thread. Callers only format
+    and enqueue; the writer keeps the file open, writes whatever has queued up
+    in one go, flushes every LOG_FLUSH_SECONDS (or LOG_FLUSH_LINES lines) and
+    rotates the file once it passes LOG_MAX_BYTES.
+    """
+
+    def __init__(self, path=LOG_PATH, queue_size=LOG_QUEUE_SIZE, flush_seconds=LOG_FLUSH_SECONDS,
+                 flush_lines=LOG_FLUSH_LINES, max_bytes=LOG_MAX_BYTES, backup_count=LOG_BACKUP_COUNT,
+                 json_mode=LOG_JSON):
+        self.path = path
+        self.flush_seconds = flush_seconds
+        self.flush_lines = flush_lines
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.json_mode = json_mode
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self._file = None
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, when, message, fields):
+        """Queues one entry without blocking; if the queue is full the entry is counted and dropped."""
+        try:
+            self.queue.put_nowait((when, message, fields))
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout=5):
+        """Blocks until everything queued so far is on disk."""
+        done = threading.Event()
+        try:
+            self.queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self, timeout=5):
+        if self._thread.is_alive():
+            try:
+                self.queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                pass
+            self._thread.join(timeout)
+
+    def _format(self, when, message, fields):
+        message = strip_emoji(message)
+        if self.json_mode:
+            return json.dumps({"time": when.isoformat(), "message": message, **fields}, default=str)
+        return f"[{when}] {message}"
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def _rotate(self):
+        self._file.close()
+        for i in range(self.backup_count - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._open()
+
+    def _write_lines(self, lines):
+        if self.dropped:
+            lines.append(self._format(datetime.now(), f"[Log Error] Queue full; dropped {self.dropped} log lines", {}))
+            self.dropped = 0
+        try:
+            if self._file is None:
+                self._open()
+            text = "\n".join(lines) + "\n"
+            if self.max_bytes and self._file.tell() + len(text) > self.max_bytes and self._file.tell() > 0:
+                self._rotate()
+            self._file.write(text)
+        except Exception as e:
+            print(f"[Log Error] Could not write log entry: {e}")
+
+    def _flush_file(self):
+        if self._file is not None:
+            try:
+                self._file.flush()
+            except Exception as e:
+                print(f"[Log Error] Could not flush log: {e}")
+
+    def _run(self):
+        pending = []
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = self.queue.get(timeout=self.flush_seconds)
+            except queue.Empty:
+                item = None
+
+            # Drain whatever else is already waiting so it goes out in the same write
+            items = [] if item is None else [item]
+            while len(items) < self.flush_lines:
+                try:
+                    items.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop, waiters = False, []
+            for entry in items:
+                if entry is _STOP:
+                    stop = True
+                elif isinstance(entry, threading.Event):
+                    waiters.append(entry)
+                else:
+                    pending.append(self._format(*entry))
+
+            if pending:
+                self._write_lines(pending)
+                pending = []
+            if (item is None or waiters or stop or len(items) >= self.flush_lines
+                    or time.monotonic() - last_flush >= self.flush_seconds):
+                self._flush_file()
+                last_flush = time.monotonic()
+            for waiter in waiters:
+                waiter.set()
+
+            if stop:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                return
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def _get_writer():
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = LogWriter()
+                atexit.register(_writer.close)
+    return _writer
+
+
+def log(message, **fields):
+    """Prints immediately; the file write happens on the log thread. Extra fields go into JSON mode output."""
+    now = datetime.now()
+    print(f"[{now}] {message}")
+    _get_writer().write(now, str(message), fields)
+
+
+def flush_logs(timeout=5):
+    if _writer is not None:
+        return _writer.flush(timeout)
+    return True
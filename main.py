@@ -1,47 +1,35 @@
-import os
 import datetime
 import argparse
-import pandas as pd
 import re
+from concurrent.futures import ThreadPoolExecutor
 
 # Import config constants
-from config import DEFAULT_INTERVAL, DEFAULT_PERIOD, STOCK_LIST_PATH
-from price_data import get_recent_price_data
-from signals import analyze_signals
-from predictor import score_signals
-from prediction_logger import log_prediction
-from discord_alert import send_discord_alert, run_discord_bot
-from strategy_engine import evaluate_entry_conditions
+from config import (
+    DEFAULT_INTERVAL, DEFAULT_PERIOD, STOCK_LIST_PATH, PRICE_PROVIDER,
+    USE_PANEL_SIGNALS, USE_STREAMING_INDICATORS, PIPELINE_WORKERS,
+    ENABLE_LONG_TERM_TREND_CONFIRMATION, LONG_TERM_INTERVAL, LONG_TERM_PERIOD,
+    REQUIRE_TREND_MATCH, DERIVE_LONG_TERM_FROM_INTRADAY, SCREEN_ENABLED,
+    START_ANALYSIS_TIME, END_ANALYSIS_TIME
+)
 from logger import log
-from entry_exit_tracker import TradeTracker
+from metrics import span, incr, begin_run, end_run
+
+# Only the standard library, config, logger and metrics load at import time.
+# pandas, yfinance, ta and discord come in with the stage that needs them
+# (imports inside the functions below), so a run that exits early, or --help,
+# stays fast. Check with: python benchmarks/import_budget.py
 
 # Clean out stale or expired pending entries
 def clean_old_pending_entries(days_old=2):
-    path = "output/logs/pending_entries.csv"
-    if not os.path.exists(path):
-        return
+    from entry_exit_tracker import TradeTracker
+
     try:
-        df = pd.read_csv(path)
-        if "Signal Source Time" not in df.columns or "Status" not in df.columns:
-            return
-        df["Signal Source Time"] = pd.to_datetime(df["Signal Source Time"], errors='coerce')
-        now = pd.Timestamp.now()
-        mask = (df["Status"] == "waiting") & ((now - df["Signal Source Time"]).dt.days >= days_old)
-        removed = df[mask]
-        df = df[~mask]
-        df.to_csv(path, index=False)
-        if not removed.empty:
-            log(f"[CLEANUP] Removed {len(removed)} stale pending entries older than {days_old} days.")
+        removed = TradeTracker.pending_store().expire(days_old)
+        if removed:
+            log(f"[CLEANUP] Removed {removed} stale pending entries older than {days_old} days.")
     except Exception as e:
         log(f"[ERROR] Failed to clean old pending entries: {e}")
 
-# Clean up any malformed entries in the pending queue
-if os.path.exists("output/logs/pending_entries.csv"):
-    df = pd.read_csv("output/logs/pending_entries.csv")
-    cleaned = df[~df["Entry Condition"].str.contains("Ticker", na=False)]
-    cleaned.to_csv("output/logs/pending_entries.csv", index=False)
-    print("Cleaned malformed entries from pending_entries.csv.")
-
 # Deprecated — now handled by logger.py
 # Kept in case you want to re-integrate emoji stripping elsewhere
 LOG_PATH = "output/logs/tasklog.txt"
@@ -61,14 +49,18 @@ def strip_emoji(text):
     return emoji_pattern.sub(r'', text)
 
 # Parse CLI args or fallback to defaults
-def parse_args():
+def parse_args(argv=None):
     try:
         parser = argparse.ArgumentParser()
         parser.add_argument('--interval', type=str, default=DEFAULT_INTERVAL)
         parser.add_argument('--period', type=str, default=DEFAULT_PERIOD)
         parser.add_argument('--force', action='store_true')  # Forces run even outside market hours
-        args = parser.parse_args()
-        log(f"Args parsed: interval={args.interval}, period={args.period}, force={args.force}")
+        parser.add_argument('--provider', type=str, default=PRICE_PROVIDER)  # "yfinance" or "replay" (offline)
+        parser.add_argument('--workers', type=int, default=PIPELINE_WORKERS)  # 1 = strictly serial
+        parser.add_argument('--screen', action=argparse.BooleanOptionalAction, default=SCREEN_ENABLED)  # Pre-screen the stock list
+        parser.add_argument('--dry-run', action='store_true')  # Analyze only: no alerts, queue, prediction or history writes
+        args = parser.parse_args(argv)
+        log(f"Args parsed: interval={args.interval}, period={args.period}, force={args.force}, provider={args.provider}, workers={args.workers}, screen={args.screen}, dry_run={args.dry_run}")
         return args
     except Exception as e:
         log(f"[ERROR] parse_args() failed: {e}")
@@ -77,10 +69,16 @@ def parse_args():
             interval = DEFAULT_INTERVAL
             period = DEFAULT_PERIOD
             force = True
+            provider = PRICE_PROVIDER
+            workers = PIPELINE_WORKERS
+            screen = SCREEN_ENABLED
+            dry_run = False
         return Args()
 
 # Load symbols from CSV
 def load_stock_list():
+    import pandas as pd
+
     try:
         log(f"Loading stock list from: {STOCK_LIST_PATH}")
         df = pd.read_csv(STOCK_LIST_PATH)
@@ -93,117 +91,289 @@ def load_stock_list():
 
 # Prevent duplicate entries for the same trigger price
 def is_already_queued(symbol, trigger_price):
-    path = "output/logs/pending_entries.csv"
-    if not os.path.exists(path):
-        return False
-    df = pd.read_csv(path)
-    return any((df["Symbol"] == symbol) & (df["Status"] == "waiting") & (df["Entry Condition"].str.contains(f"{trigger_price}")))
+    from entry_exit_tracker import TradeTracker
 
-# MAIN LOGIC
-def main():
-    log("main.py started successfully.")
-    clean_old_pending_entries(days_old=2)
-    args = parse_args()
+    return TradeTracker.is_already_queued(symbol, trigger_price)
 
-    now = datetime.datetime.now()
-    if not args.force and not (datetime.time(9, 35) <= now.time() <= datetime.time(10, 0)):
-        log("Outside analysis time window. Exiting.")
-        return
+# Per-symbol part of the pipeline that is safe to run on worker threads:
+# nothing here touches shared files or logs directly; messages and the writes
+# to perform are returned for apply_symbol_result() to carry out in order.
+def process_symbol(symbol, ctx):
+    import pandas as pd
+    from signals import analyze_signals
+    from predictor import score_signals
+    from strategy_engine import evaluate_entry_conditions
 
-    log("Signal bot started")
-    stock_list = load_stock_list()
-    if not stock_list:
-        log("No stocks to analyze. Exiting.")
-        return
+    result = {"symbol": symbol, "logs": [], "prediction": None, "pending": None, "alert": None}
+    try:
+        df = ctx["price_frames"].get(symbol, pd.DataFrame())
+        if df.empty:
+            result["logs"].append(f"No data retrieved for {symbol}")
+            incr("symbols_no_data")
+            return result
+        incr("symbols_processed")
 
-    for symbol in stock_list:
-        try:
-            log(f"Fetching data for {symbol}")
-            df = get_recent_price_data(symbol, interval=args.interval, period=args.period)
-            if df.empty:
-                log(f"No data retrieved for {symbol}")
-                continue
+        # Save fetched data for review/debug
+        if not ctx.get("dry_run"):
+            with span("history_dump", symbol):
+                df.to_csv(f"data/history/{symbol}_latest.csv")
 
-            # Save fetched data for review/debug
-            df.to_csv(f"data/history/{symbol}_latest.csv")
+        # Generate signals and trend score
+        with span("indicators", symbol):
+            if ctx["indicator_store"] is not None:
+                signals = ctx["indicator_store"].sync(f"{symbol}@{ctx['interval']}", df).signals()
+            else:
+                signals = ctx["signal_panel"].get(symbol) or analyze_signals(df)
 
-            # Generate signals and trend score
-            signals = analyze_signals(df)
+        with span("scoring", symbol):
             trend = score_signals(signals)
 
-            # Long-term trend filter (optional)
-            from config import (
-                ENABLE_LONG_TERM_TREND_CONFIRMATION,
-                LONG_TERM_INTERVAL,
-                LONG_TERM_PERIOD,
-                REQUIRE_TREND_MATCH
-            )
-
             if ENABLE_LONG_TERM_TREND_CONFIRMATION:
-                df_long = get_recent_price_data(symbol, interval=LONG_TERM_INTERVAL, period=LONG_TERM_PERIOD)
+                df_long = ctx["long_frames"].get(symbol, pd.DataFrame())
                 if df_long.empty:
-                    log(f"[LONG TREND] Skipped {symbol}: No long-term data.")
-                    continue
-                long_signals = analyze_signals(df_long)
+                    result["logs"].append(f"[LONG TREND] Skipped {symbol}: No long-term data.")
+                    incr("symbols_filtered")
+                    return result
+                long_signals = ctx["long_signal_panel"].get(symbol) or analyze_signals(df_long)
                 long_trend = score_signals(long_signals)
 
                 if REQUIRE_TREND_MATCH and trend != long_trend:
-                    log(f"[FILTER ❌] {symbol}: {trend} trend rejected by long-term {long_trend}")
-                    continue
+                    result["logs"].append(f"[FILTER ❌] {symbol}: {trend} trend rejected by long-term {long_trend}")
+                    incr("symbols_filtered")
+                    return result
 
             # Log trend and indicators to prediction file
-            log_prediction(symbol, signals, trend, df)
+            result["prediction"] = (symbol, signals, trend, df)
 
             # Decide if entry condition is valid
             entry_decision = evaluate_entry_conditions(symbol, df, signals, trend)
-            if not entry_decision:
-                continue
-
-            # Calculate entry signal values
-            signal_high = float(df["High"].iloc[-1].item())
-            signal_low = float(df["Low"].iloc[-1].item())
-            vwap = round((df["Close"] * df["Volume"]).cumsum() / df["Volume"].cumsum(), 2).iloc[-1].item()
-
-            if trend == "Bullish":
-                trigger_price = round(signal_high * 1.005, 2)
-                entry_condition = f"Break above {trigger_price} (0.5% buffer)"
-            elif trend == "Bearish":
-                trigger_price = round(signal_low * 0.995, 2)
-                entry_condition = f"Break below {trigger_price} (0.5% buffer)"
-            else:
-                continue
-
-            # Prevent duplicate queues
-            if is_already_queued(symbol, trigger_price):
-                log(f"[SKIP] {symbol} already queued for {trigger_price}")
-                continue
-
-            # Save pending entry for later evaluation
-            TradeTracker.queue_pending_entry(
-                symbol=symbol,
-                trend=trend,
-                signal_time=datetime.datetime.now().isoformat(),
-                signal_high=signal_high,
-                signal_low=signal_low,
-                vwap=vwap,
-                entry_condition=entry_condition,
-                notes="Auto-queued by strategy engine"
-            )
-            log(f"[PENDING] {symbol} queued for confirmation at {trigger_price}")
+        if not entry_decision:
+            return result
+        incr("entry_signals")
+
+        # Calculate entry signal values
+        signal_high = float(df["High"].iloc[-1].item())
+        signal_low = float(df["Low"].iloc[-1].item())
+        vwap = round((df["Close"] * df["Volume"]).cumsum() / df["Volume"].cumsum(), 2).iloc[-1].item()
+
+        if trend == "Bullish":
+            trigger_price = round(signal_high * 1.005, 2)
+            entry_condition = f"Break above {trigger_price} (0.5% buffer)"
+        elif trend == "Bearish":
+            trigger_price = round(signal_low * 0.995, 2)
+            entry_condition = f"Break below {trigger_price} (0.5% buffer)"
+        else:
+            return result
+
+        # Save pending entry for later evaluation (duplicate check happens in the writer)
+        result["pending"] = dict(
+            symbol=symbol,
+            trend=trend,
+            signal_time=datetime.datetime.now().isoformat(),
+            signal_high=signal_high,
+            signal_low=signal_low,
+            vwap=vwap,
+            entry_condition=entry_condition,
+            notes="Auto-queued by strategy engine",
+            trigger_price=trigger_price
+        )
+        result["trigger_price"] = trigger_price
+        result["alert"] = (symbol, trend, signals)
+
+    except Exception as e:
+        result["logs"].append(f"[ERROR] Failed to process {symbol}: {e}")
+        incr("errors")
+    return result
+
+# Serialized writer: the only place per-symbol results touch shared CSVs, logs and alerts
+def apply_symbol_result(result, dry_run=False):
+    symbol = result["symbol"]
+    for message in result["logs"]:
+        log(message)
+    if dry_run:
+        if result["pending"]:
+            log(f"[DRY RUN] {symbol} would be queued for confirmation at {result['trigger_price']}")
+        if result["alert"]:
+            log(f"[DRY RUN] {symbol} - {result['alert'][1]} alert not sent.")
+        return
 
+    from prediction_logger import log_prediction
+    from discord_alert import send_discord_alert
+    from entry_exit_tracker import TradeTracker
+
+    try:
+        if result["prediction"]:
+            with span("prediction_logging", symbol):
+                log_prediction(*result["prediction"])
+
+        if result["pending"]:
+            with span("queueing", symbol):
+                # Prevent duplicate queues
+                if is_already_queued(symbol, result["trigger_price"]):
+                    log(f"[SKIP] {symbol} already queued for {result['trigger_price']}")
+                    incr("duplicates_skipped")
+                    return
+                TradeTracker.queue_pending_entry(**result["pending"])
+            log(f"[PENDING] {symbol} queued for confirmation at {result['trigger_price']}")
+            incr("entries_queued")
+
+        if result["alert"]:
             # Send alert to Discord
-            send_discord_alert(symbol, trend, signals)
-            log(f"[ALERT ✅] {symbol} - {trend} alert sent.")
+            with span("alerting", symbol):
+                send_discord_alert(*result["alert"])
+            log(f"[ALERT ✅] {symbol} - {result['alert'][1]} alert sent.")
+            incr("alerts_sent")
+
+    except Exception as e:
+        log(f"[ERROR] Failed to process {symbol}: {e}")
+        incr("errors")
+
+# MAIN LOGIC
+def _parse_hhmm(text):
+    hours, minutes = text.split(":")
+    return datetime.time(int(hours), int(minutes))
 
-        except Exception as e:
-            log(f"[ERROR] Failed to process {symbol}: {e}")
+def in_analysis_window(now=None):
+    now = now or datetime.datetime.now()
+    return _parse_hhmm(START_ANALYSIS_TIME) <= now.time() <= _parse_hhmm(END_ANALYSIS_TIME)
+
+def main(argv=None):
+    log("main.py started successfully.")
+    args = parse_args(argv)
+
+    # Window and arguments first: nothing heavy is loaded before this returns
+    if not args.force and not in_analysis_window():
+        log("Outside analysis time window. Exiting.")
+        return
+
+    if args.dry_run:
+        log("[DRY RUN] No alerts, queued entries, predictions or history files will be written.")
+    else:
+        clean_old_pending_entries(days_old=2)
+
+    log("Signal bot started")
+    stock_list = load_stock_list()
+    if not stock_list:
+        log("No stocks to analyze. Exiting.")
+        return
+
+    # Streaming mode: resume saved per-symbol state and only feed it the new bars
+    indicator_store = None
+    if USE_STREAMING_INDICATORS:
+        from indicator_state import IndicatorStateStore
+        indicator_store = IndicatorStateStore().load()
+    run_pipeline(args, stock_list, indicator_store)
+    if args.dry_run:
+        return
 
     # Launch Discord bot responder (emoji handler, etc.)
+    from discord_alert import run_discord_bot
     try:
         run_discord_bot()
     except Exception as e:
         log(f"[ERROR] Failed to run Discord bot: {e}")
 
+# One pass of the signal pipeline over stock_list. Long-running callers (daemon.py)
+# pass the same indicator_store every time so its state stays warm in memory.
+# Stage timings and counters for the pass are exported by metrics.end_run().
+def run_pipeline(args, stock_list, indicator_store=None):
+    begin_run("pipeline")
+    try:
+        with span("pipeline"):
+            _run_pipeline(args, stock_list, indicator_store)
+    finally:
+        end_run()
+
+def _run_pipeline(args, stock_list, indicator_store=None):
+    from price_data import get_price_data_many, get_cached_bars, set_price_provider
+    from bar_cache import get_bar_cache
+    from timeframes import build_higher_timeframe
+    from signals import analyze_signals_panel, analyze_signals_bars, build_panel
+    from prescreen import prescreen
+    from prediction_logger import flush_predictions
+    from entry_exit_tracker import TradeTracker
+
+    dry_run = getattr(args, "dry_run", False)
+
+    # Fetch the whole universe up front: one batched call per timeframe instead of one per symbol
+    set_price_provider(args.provider)
+    get_bar_cache().reset_stats()
+
+    # Narrow a large universe to a ranked shortlist before anything expensive runs
+    if getattr(args, "screen", SCREEN_ENABLED):
+        stock_list = prescreen(stock_list)
+        if not stock_list:
+            log("[SCREEN] No symbols passed the pre-screen.")
+            return
+    fetch_start = datetime.datetime.now()
+    log(f"Fetching data for {len(stock_list)} symbols via {args.provider}")
+    with span("fetch"):
+        price_frames = get_price_data_many(stock_list, interval=args.interval, period=args.period)
+    long_frames = {}
+    with span("long_term_fetch"):
+        if ENABLE_LONG_TERM_TREND_CONFIRMATION and DERIVE_LONG_TERM_FROM_INTRADAY:
+            long_frames = build_higher_timeframe(price_frames, args.interval, LONG_TERM_INTERVAL, LONG_TERM_PERIOD)
+        elif ENABLE_LONG_TERM_TREND_CONFIRMATION:
+            long_frames = get_price_data_many(stock_list, interval=LONG_TERM_INTERVAL, period=LONG_TERM_PERIOD)
+    incr("symbols_requested", len(stock_list))
+    log(f"Fetch complete in {(datetime.datetime.now() - fetch_start).total_seconds():.2f}s")
+    log(f"[CACHE] {get_bar_cache().summary()}")
+
+    # Indicators for the whole universe in one vectorized pass, stacked straight from
+    # the bar cache's buffers when it served every frame (skips the DataFrame and
+    # build_panel() step; stack() still copies the bars into fresh arrays)
+    signal_panel, long_signal_panel = {}, {}
+    if USE_PANEL_SIGNALS:
+        with span("indicator_panel"):
+            fetched = [symbol for symbol, df in price_frames.items() if not df.empty]
+            buffers, starts = get_cached_bars(fetched, args.interval, args.period)
+            if fetched and len(buffers) == len(fetched):
+                signal_panel = analyze_signals_bars(buffers, starts)
+            else:
+                signal_panel = analyze_signals_panel(build_panel(price_frames))
+            long_signal_panel = analyze_signals_panel(build_panel(long_frames))
+
+    ctx = {
+        "interval": args.interval,
+        "price_frames": price_frames,
+        "long_frames": long_frames,
+        "signal_panel": signal_panel,
+        "long_signal_panel": long_signal_panel,
+        "indicator_store": indicator_store,
+        "dry_run": dry_run,
+    }
+
+    # Symbols are processed on a bounded thread pool; results come back in
+    # stock-list order and are applied by this thread only, so CSV writes,
+    # log lines and alerts are serialized and deterministic per run.
+    workers = max(1, int(getattr(args, "workers", PIPELINE_WORKERS)))
+    if workers == 1:
+        for symbol in stock_list:
+            apply_symbol_result(process_symbol(symbol, ctx), dry_run)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for result in pool.map(lambda symbol: process_symbol(symbol, ctx), stock_list):
+                apply_symbol_result(result, dry_run)
+
+    if dry_run:
+        return
+
+    if indicator_store is not None:
+        indicator_store.save()
+
+    # The run's predictions go out in one write per day partition
+    try:
+        with span("prediction_flush"):
+            flush_predictions()
+    except Exception as e:
+        log(f"[ERROR] Failed to write predictions: {e}")
+
+    # Journal copy of the pending queue
+    try:
+        TradeTracker.pending_store().export_csv()
+    except Exception as e:
+        log(f"[ERROR] Failed to export pending entries: {e}")
+
 if __name__ == "__main__":
     try:
         main()
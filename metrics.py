@@ -0,0 +1,199 @@
+# metrics.py
+#
+# Stage timings and counters for one run of the bot. Code wraps a stage in
+#
+#     with span("fetch"):             # run-level stage
+#     with span("scoring", symbol):   # also attributed to one symbol
+#
+# and bumps counters with incr("symbols_queued"). begin_run()/end_run() bracket
+# a run (they nest, so the daemon can wrap the pipeline and the evaluator in
+# one tick); the outermost end_run() writes a Prometheus textfile and a JSON
+# summary, one pair per run name. With METRICS_ENABLED off, span() hands back
+# a shared no-op object.
+
+import os
+import json
+import time
+import threading
+from datetime import datetime
+
+from config import METRICS_ENABLED, METRICS_PROM_PATH, METRICS_JSON_PATH
+
+PREFIX = "signal_bot"
+SLOWEST_SYMBOLS = 10
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("registry", "name", "symbol", "started")
+
+    def __init__(self, registry, name, symbol):
+        self.registry = registry
+        self.name = name
+        self.symbol = symbol
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.record(self.name, time.perf_counter() - self.started, self.symbol)
+        return False
+
+
+class MetricsRegistry:
+
+    def __init__(self, enabled=METRICS_ENABLED, prom_path=METRICS_PROM_PATH, json_path=METRICS_JSON_PATH):
+        self.enabled = enabled
+        self.prom_path = prom_path
+        self.json_path = json_path
+        self._lock = threading.Lock()
+        self._depth = 0
+        self.reset()
+
+    def reset(self, name="run"):
+        self.name = name
+        self.started_at = datetime.now()
+        self._started = time.perf_counter()
+        self.stages = {}      # stage -> [calls, total_s, max_s]
+        self.counters = {}
+        self.symbols = {}     # symbol -> {stage: seconds}
+
+    def span(self, name, symbol=None):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, symbol)
+
+    def record(self, name, seconds, symbol=None):
+        with self._lock:
+            stage = self.stages.setdefault(name, [0, 0.0, 0.0])
+            stage[0] += 1
+            stage[1] += seconds
+            stage[2] = max(stage[2], seconds)
+            if symbol is not None:
+                per_symbol = self.symbols.setdefault(symbol, {})
+                per_symbol[name] = per_symbol.get(name, 0.0) + seconds
+
+    def incr(self, name, amount=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def begin_run(self, name="run"):
+        with self._lock:
+            self._depth += 1
+            outermost = self._depth == 1
+        if outermost:
+            self.reset(name)
+
+    def end_run(self):
+        with self._lock:
+            self._depth = max(0, self._depth - 1)
+            outermost = self._depth == 0
+        if outermost and self.enabled:
+            try:
+                self.export()
+            except Exception as e:
+                print(f"[METRICS] Could not export run metrics: {e}")
+
+    # --- Export ---
+
+    def summary(self):
+        with self._lock:
+            symbol_totals = {s: sum(stages.values()) for s, stages in self.symbols.items()}
+            slowest = sorted(symbol_totals, key=symbol_totals.get, reverse=True)[:SLOWEST_SYMBOLS]
+            return {
+                "run": self.name,
+                "started": self.started_at.isoformat(timespec="seconds"),
+                "duration_s": round(time.perf_counter() - self._started, 4),
+                "stages": {
+                    name: {"calls": calls, "total_s": round(total, 4), "max_s": round(peak, 4)}
+                    for name, (calls, total, peak) in self.stages.items()
+                },
+                "counters": dict(self.counters),
+                "slowest_symbols": [
+                    {"symbol": s, "total_s": round(symbol_totals[s], 4),
+                     "stages": {k: round(v, 4) for k, v in self.symbols[s].items()}}
+                    for s in slowest
+                ],
+                "symbols": {s: {k: round(v, 5) for k, v in stages.items()} for s, stages in self.symbols.items()},
+            }
+
+    def prometheus_text(self, summary=None):
+        summary = summary or self.summary()
+        run = summary["run"]
+        lines = [
+            f"# HELP {PREFIX}_run_duration_seconds Wall time of the last run.",
+            f"# TYPE {PREFIX}_run_duration_seconds gauge",
+            f'{PREFIX}_run_duration_seconds{{run="{run}"}} {summary["duration_s"]}',
+            f"# HELP {PREFIX}_run_timestamp_seconds When the last run started.",
+            f"# TYPE {PREFIX}_run_timestamp_seconds gauge",
+            f'{PREFIX}_run_timestamp_seconds{{run="{run}"}} {self.started_at.timestamp():.0f}',
+            f"# HELP {PREFIX}_stage_seconds Time spent in each stage during the last run.",
+            f"# TYPE {PREFIX}_stage_seconds gauge",
+        ]
+        for name, stage in summary["stages"].items():
+            lines.append(f'{PREFIX}_stage_seconds{{run="{run}",stage="{name}"}} {stage["total_s"]}')
+        lines += [f"# HELP {PREFIX}_stage_max_seconds Slowest single call of each stage.",
+                  f"# TYPE {PREFIX}_stage_max_seconds gauge"]
+        for name, stage in summary["stages"].items():
+            lines.append(f'{PREFIX}_stage_max_seconds{{run="{run}",stage="{name}"}} {stage["max_s"]}')
+        lines += [f"# HELP {PREFIX}_stage_calls Calls of each stage during the last run.",
+                  f"# TYPE {PREFIX}_stage_calls gauge"]
+        for name, stage in summary["stages"].items():
+            lines.append(f'{PREFIX}_stage_calls{{run="{run}",stage="{name}"}} {stage["calls"]}')
+        lines += [f"# HELP {PREFIX}_events Counters from the last run.",
+                  f"# TYPE {PREFIX}_events gauge"]
+        for name, value in summary["counters"].items():
+            lines.append(f'{PREFIX}_events{{run="{run}",event="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def export(self):
+        summary = self.summary()
+        for path, text in ((self.prom_path, self.prometheus_text(summary)),
+                           (self.json_path, json.dumps(summary, indent=2))):
+            if not path:
+                continue
+            path = path.format(run=self.name)
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w") as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+        return summary
+
+
+_registry = MetricsRegistry()
+
+
+def get_metrics():
+    return _registry
+
+
+def span(name, symbol=None):
+    return _registry.span(name, symbol)
+
+
+def incr(name, amount=1):
+    _registry.incr(name, amount)
+
+
+def begin_run(name="run"):
+    _registry.begin_run(name)
+
+
+def end_run():
+    _registry.end_run()
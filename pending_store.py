@@ -0,0 +1,254 @@
+# pending_store.py
+
+import os
+import re
+import csv
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+from config import PENDING_DB_PATH, PENDING_ENTRIES_PATH
+
+# CSV-style column name -> SQLite column
+COLUMNS = {
+    "Symbol": "symbol",
+    "Trend": "trend",
+    "Signal Source Time": "signal_time",
+    "High": "high",
+    "Low": "low",
+    "VWAP": "vwap",
+    "Entry Condition": "entry_condition",
+    "Notes": "notes",
+    "Status": "status",
+    "Trigger Price": "trigger_price",
+    "Direction": "direction",
+    "Entry Time": "entry_time",
+    "Entry Price": "entry_price",
+}
+
+# Older pending_entries.csv files used these headers
+LEGACY_COLUMNS = {"Signal Trend": "Trend", "Signal High": "High", "Signal Low": "Low"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pending_entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    symbol TEXT NOT NULL,
+    trend TEXT,
+    signal_time TEXT,
+    high REAL,
+    low REAL,
+    vwap REAL,
+    entry_condition TEXT,
+    notes TEXT,
+    status TEXT NOT NULL DEFAULT 'waiting',
+    trigger_price REAL,
+    direction TEXT,
+    entry_time TEXT,
+    entry_price REAL
+);
+CREATE INDEX IF NOT EXISTS idx_pending_symbol_status ON pending_entries (symbol, status);
+CREATE INDEX IF NOT EXISTS idx_pending_trigger ON pending_entries (trigger_price);
+CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+TRIGGER_PATTERN = re.compile(r"(\d+(?:\.\d+)?)")
+
+
+def parse_trigger_price(entry_condition):
+    """Pulls the trigger out of text like "Break above 194.05 (0.5% buffer)"."""
+    match = TRIGGER_PATTERN.search(entry_condition or "")
+    return float(match.group(1)) if match else None
+
+
+def _to_float(value):
+    try:
+        return float(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_iso(value):
+    if value in (None, ""):
+        return None
+    try:
+        return datetime.fromisoformat(str(value)).isoformat()
+    except ValueError:
+        return None
+
+
+class PendingEntryStore:
+    """
+    Pending entries in a WAL-mode SQLite database. Dedup checks and status
+    updates are indexed point operations; expiry is a single DELETE.
+    Rows come back as dicts keyed by the familiar CSV column names plus "id".
+    """
+
+    def __init__(self, path=PENDING_DB_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def _row_to_entry(self, row):
+        entry = {"id": row["id"]}
+        for csv_name, column in COLUMNS.items():
+            entry[csv_name] = row[column]
+        return entry
+
+    def _prepare(self, entry):
+        """Normalizes a CSV-style dict into column values."""
+        entry = {LEGACY_COLUMNS.get(k, k): v for k, v in entry.items()}
+        values = {column: entry.get(csv_name) for csv_name, column in COLUMNS.items()}
+        for column in ("high", "low", "vwap", "trigger_price", "entry_price"):
+            values[column] = _to_float(values[column])
+        values["signal_time"] = _to_iso(values["signal_time"])
+        values["entry_time"] = _to_iso(values["entry_time"])
+        if not values["trigger_price"]:
+            values["trigger_price"] = parse_trigger_price(values["entry_condition"])
+        if not values["direction"] and values["trend"]:
+            values["direction"] = str(values["trend"]).lower()
+        values["symbol"] = str(values["symbol"] or "").strip().upper()
+        values["status"] = (values["status"] or "waiting").lower()
+        return values
+
+    def change_token(self):
+        """
+        (data_version, total_changes): moves whenever another connection commits
+        to the database or this one changes rows. Cheap enough to poll.
+        """
+        with self._lock:
+            version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+            return version, self.conn.total_changes
+
+    def add(self, entry):
+        values = self._prepare(entry)
+        columns = ", ".join(values)
+        placeholders = ", ".join("?" for _ in values)
+        with self._lock, self.conn:
+            cursor = self.conn.execute(
+                f"INSERT INTO pending_entries ({columns}) VALUES ({placeholders})", list(values.values())
+            )
+        return cursor.lastrowid
+
+    def is_queued(self, symbol, trigger_price):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT 1 FROM pending_entries WHERE symbol = ? AND status = 'waiting' AND trigger_price = ? LIMIT 1",
+                (symbol.upper(), float(trigger_price)),
+            ).fetchone()
+        return row is not None
+
+    def entries(self, status=None, symbol=None):
+        query, params = "SELECT * FROM pending_entries", []
+        clauses = []
+        if symbol is not None:
+            clauses.append("symbol = ?")
+            params.append(symbol.upper())
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        with self._lock:
+            rows = self.conn.execute(query + " ORDER BY id", params).fetchall()
+        return [self._row_to_entry(row) for row in rows]
+
+    def latest_waiting(self, symbol):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT * FROM pending_entries WHERE symbol = ? AND status = 'waiting' ORDER BY id DESC LIMIT 1",
+                (symbol.upper(),),
+            ).fetchone()
+        return self._row_to_entry(row) if row else None
+
+    def update_status(self, entry_id, status, entry_time=None, entry_price=None):
+        self.update_many([(entry_id, status, entry_time, entry_price)])
+
+    def update_many(self, updates):
+        """updates: iterable of (id, status, entry_time, entry_price); one transaction."""
+        rows = [(status, _to_iso(entry_time), _to_float(entry_price), entry_id)
+                for entry_id, status, entry_time, entry_price in updates]
+        if not rows:
+            return
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "UPDATE pending_entries SET status = ?, "
+                "entry_time = COALESCE(?, entry_time), entry_price = COALESCE(?, entry_price) WHERE id = ?",
+                rows,
+            )
+
+    def expire(self, days_old=2):
+        """Deletes waiting entries whose signal is at least days_old days old. Returns the count."""
+        cutoff = (datetime.now() - timedelta(days=days_old)).isoformat()
+        with self._lock, self.conn:
+            cursor = self.conn.execute(
+                "DELETE FROM pending_entries WHERE status = 'waiting' AND signal_time <= ?", (cutoff,)
+            )
+        return cursor.rowcount
+
+    def migrate_from_csv(self, csv_path=PENDING_ENTRIES_PATH):
+        """
+        One-shot import of the legacy pending_entries.csv. Malformed rows (header
+        fragments such as "Ticker" in the condition) are skipped. Returns rows imported.
+        """
+        with self._lock:
+            done = self.conn.execute("SELECT value FROM store_meta WHERE key = 'csv_migrated'").fetchone()
+        if done:
+            return 0
+
+        rows = []
+        if os.path.exists(csv_path):
+            with open(csv_path, "r", newline="") as f:
+                rows = list(csv.DictReader(f))
+
+        values = []
+        for row in rows:
+            if not row.get("Symbol") or "Ticker" in (row.get("Entry Condition") or ""):
+                continue
+            values.append(self._prepare(row))
+
+        with self._lock, self.conn:
+            if values:
+                columns = list(values[0])
+                self.conn.executemany(
+                    f"INSERT INTO pending_entries ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+                    [[v[c] for c in columns] for v in values],
+                )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO store_meta (key, value) VALUES ('csv_migrated', ?)", (datetime.now().isoformat(),)
+            )
+        return len(values)
+
+    def export_csv(self, csv_path=PENDING_ENTRIES_PATH):
+        """Writes the whole table out as a CSV for journaling."""
+        entries = self.entries()
+        os.makedirs(os.path.dirname(csv_path) or ".", exist_ok=True)
+        with open(csv_path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(COLUMNS))
+            writer.writeheader()
+            for entry in entries:
+                writer.writerow({k: entry[k] for k in COLUMNS})
+        return len(entries)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_pending_store():
+    """Shared store, migrated from the legacy CSV on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = PendingEntryStore()
+            migrated = _store.migrate_from_csv()
+            if migrated:
+                print(f"[MIGRATION] Imported {migrated} pending entries from {PENDING_ENTRIES_PATH}")
+    return _store
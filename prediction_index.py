@@ -0,0 +1,124 @@
+# prediction_index.py
+
+import io
+import os
+import csv
+import math
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+from prediction_logger import get_prediction_sink, FIELDNAMES
+
+
+def _complete_records(data):
+    """
+    Length of the prefix of `data` (bytes) that ends on a full CSV record.
+    A newline only ends a record when it is outside a quoted field, so
+    multi-line values appended mid-write are left for the next refresh.
+    """
+    end, quoted = 0, False
+    for i, byte in enumerate(data):
+        if byte == 0x22:  # "
+            quoted = not quoted
+        elif byte == 0x0A and not quoted:  # \n
+            end = i + 1
+    return end
+
+
+def _as_text(value):
+    """Archive values rendered the way they read back from the CSV partitions."""
+    if value is None or (isinstance(value, float) and math.isnan(value)) or value is pd.NaT:
+        return ""
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    return str(value)
+
+
+class PredictionIndex:
+    """
+    Latest prediction row per symbol, kept in memory. Closed days are read once
+    from the archive; after that refresh() only reads the bytes appended to
+    today's partition since the last call. A new day, or a partition that shrank
+    or was replaced, triggers a rebuild. Rows are dicts of strings keyed by the
+    partition header, as csv.DictReader would return them.
+    """
+
+    def __init__(self, sink=None):
+        self.sink = sink
+        self.path = None
+        self.latest = {}
+        self.fieldnames = None
+        self._offset = 0
+        self._file_id = None
+        self._lock = threading.Lock()
+
+    def _rebuild(self, path, day):
+        self.path = path
+        self.fieldnames = None
+        self._offset = 0
+        self._file_id = None
+        closed = self.sink.load(end=(pd.Timestamp(day) - pd.Timedelta(days=1)).strftime("%Y-%m-%d"))
+        closed = closed.drop_duplicates("Symbol", keep="last")
+        self.latest = {
+            row["Symbol"]: {col: _as_text(row[col]) for col in FIELDNAMES}
+            for row in closed.to_dict("records") if row["Symbol"]
+        }
+
+    def refresh(self):
+        with self._lock:
+            if self.sink is None:
+                self.sink = get_prediction_sink()
+            day = datetime.now().strftime("%Y-%m-%d")
+            path = self.sink.partition_path(day)
+            if path != self.path:
+                self._rebuild(path, day)
+
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return self.latest
+
+            file_id = (stat.st_dev, stat.st_ino)
+            if self._file_id is not None and (file_id != self._file_id or stat.st_size < self._offset):
+                self._rebuild(path, day)
+            self._file_id = file_id
+
+            if stat.st_size > self._offset:
+                with open(path, "rb") as f:
+                    f.seek(self._offset)
+                    data = f.read(stat.st_size - self._offset)
+                end = _complete_records(data)
+                if end:
+                    self._consume(data[:end].decode("utf-8", errors="replace"))
+                    self._offset += end
+            return self.latest
+
+    def _consume(self, text):
+        reader = csv.reader(io.StringIO(text, newline=""))
+        if self.fieldnames is None:
+            self.fieldnames = next(reader, None)
+            if self.fieldnames is None:
+                return
+        for row in self._rows(reader):
+            symbol = (row.get("Symbol") or "").strip().upper()
+            if symbol:
+                self.latest[symbol] = row
+
+    def _rows(self, reader):
+        # Same shape as csv.DictReader: short rows padded with None, extras under the None key
+        width = len(self.fieldnames)
+        for values in reader:
+            if not values:
+                continue
+            row = dict(zip(self.fieldnames, values))
+            if len(values) > width:
+                row[None] = values[width:]
+            elif len(values) < width:
+                for key in self.fieldnames[len(values):]:
+                    row[key] = None
+            yield row
+
+    def get(self, symbol):
+        return self.refresh().get(symbol.strip().upper())
@@ -1,12 +1,221 @@
+import io
+import re
 import csv
 import os
+import glob
+import atexit
+import threading
 from datetime import datetime
 
-PREDICTIONS_PATH = "output/logs/predictions.csv"
+import numpy as np
+import pandas as pd
 
-def log_prediction(symbol, signals, trend, df):
-    file_exists = os.path.isfile(PREDICTIONS_PATH)
+from config import PREDICTIONS_PATH, PREDICTIONS_DIR
+
+FIELDNAMES = [
+    "Timestamp", "Symbol", "Trend",
+    "EMA", "VWAP Signal", "MACD", "RSI", "Volume Spike",
+    "Signal High", "Signal Low", "Signal VWAP",
+    "Entry Time", "Entry Price",
+    "Exit Time", "Exit Price", "Change %", "Outcome"
+]
+
+# Column dtypes in the compacted archive
+DATETIME_COLUMNS = ["Timestamp", "Entry Time", "Exit Time"]
+BOOL_COLUMNS = ["EMA", "VWAP Signal", "MACD", "Volume Spike"]
+FLOAT_COLUMNS = ["RSI", "Signal High", "Signal Low", "Signal VWAP", "Entry Price", "Exit Price", "Change %"]
+STRING_COLUMNS = ["Symbol", "Trend", "Outcome"]
+
+# Older rows wrote Bull/Above/Pos instead of booleans
+TRUE_VALUES = {"true", "bull", "above", "pos", "1"}
+
+DATE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+def typed_predictions(df):
+    """Applies the archive dtypes to a frame of raw (string) prediction rows."""
+    df = df.reindex(columns=FIELDNAMES)
+    out = {}
+    for col in DATETIME_COLUMNS:
+        out[col] = pd.to_datetime(df[col], errors="coerce", format="mixed")
+    for col in BOOL_COLUMNS:
+        out[col] = df[col].astype(str).str.strip().str.lower().isin(TRUE_VALUES)
+    for col in FLOAT_COLUMNS:
+        out[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+    for col in STRING_COLUMNS:
+        out[col] = df[col].fillna("").astype(str).str.strip()
+    out["Symbol"] = out["Symbol"].str.upper()
+    return pd.DataFrame(out, columns=FIELDNAMES)
+
+
+class PredictionSink:
+    """
+    Prediction log partitioned by trading date. Rows from a run are buffered and
+    appended to {dir}/{date}.csv in one write per partition on flush(). Closed
+    days are compacted into {dir}/{date}.npz: one compressed array per column
+    with fixed dtypes, so a day or a symbol loads without parsing CSV history.
+    """
+
+    def __init__(self, directory=PREDICTIONS_DIR):
+        self.directory = directory
+        self._buffer = []
+        self._lock = threading.Lock()
+
+    def partition_path(self, day, ext="csv"):
+        return os.path.join(self.directory, f"{day}.{ext}")
+
+    def add(self, row):
+        with self._lock:
+            self._buffer.append(row)
+
+    def flush(self):
+        """Writes buffered rows; returns how many were written."""
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+        if not rows:
+            return 0
+
+        by_day = {}
+        for row in rows:
+            by_day.setdefault(str(row["Timestamp"])[:10], []).append(row)
+
+        os.makedirs(self.directory, exist_ok=True)
+        for day, day_rows in by_day.items():
+            path = self.partition_path(day)
+            text = io.StringIO()
+            writer = csv.DictWriter(text, fieldnames=FIELDNAMES)
+            if not os.path.isfile(path):
+                writer.writeheader()
+            writer.writerows(day_rows)
+            with open(path, "a", newline="") as f:
+                f.write(text.getvalue())
+        return len(rows)
+
+    def days(self):
+        """Trading dates with data, oldest first, and whether each is still an open CSV."""
+        found = {}
+        for path in glob.glob(os.path.join(self.directory, "*.npz")) + glob.glob(os.path.join(self.directory, "*.csv")):
+            day, ext = os.path.splitext(os.path.basename(path))
+            found.setdefault(day, ext)
+        return sorted(found.items())
+
+    def compact(self, before=None):
+        """Converts every CSV partition older than `before` (default: today) into .npz."""
+        before = before or datetime.now().strftime("%Y-%m-%d")
+        compacted = []
+        for day, ext in self.days():
+            if day >= before or ext != ".csv":
+                continue
+            path = self.partition_path(day)
+            df = typed_predictions(pd.read_csv(path, dtype=str, keep_default_na=False))
+            self._write_npz(day, df)
+            os.remove(path)
+            compacted.append(day)
+        return compacted
 
+    def _write_npz(self, day, df):
+        arrays = {}
+        for col in FIELDNAMES:
+            values = df[col].to_numpy()
+            if col in DATETIME_COLUMNS:
+                values = values.astype("datetime64[ns]")
+            elif col in STRING_COLUMNS:
+                values = values.astype("U")
+            arrays[col] = values
+        tmp_path = self.partition_path(day, "npz.tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp_path, self.partition_path(day, "npz"))
+
+    def rewrite_day(self, day, df):
+        """Replaces a closed day's rows with `df` (typed, FIELDNAMES) in its .npz partition."""
+        if day >= datetime.now().strftime("%Y-%m-%d"):
+            raise ValueError(f"{day} is still open for appends; only closed days can be rewritten")
+        self._write_npz(day, df)
+        csv_path = self.partition_path(day)
+        if os.path.isfile(csv_path):
+            os.remove(csv_path)
+
+    def load_day(self, day):
+        npz_path = self.partition_path(day, "npz")
+        if os.path.isfile(npz_path):
+            with np.load(npz_path, allow_pickle=False) as data:
+                return pd.DataFrame({col: data[col] for col in FIELDNAMES}, columns=FIELDNAMES)
+        csv_path = self.partition_path(day)
+        if os.path.isfile(csv_path):
+            return typed_predictions(pd.read_csv(csv_path, dtype=str, keep_default_na=False))
+        return pd.DataFrame(columns=FIELDNAMES)
+
+    def load(self, start=None, end=None, symbol=None):
+        """Typed predictions for days in [start, end] (YYYY-MM-DD, inclusive), optionally one symbol."""
+        frames = []
+        for day, _ in self.days():
+            if (start and day < start) or (end and day > end):
+                continue
+            df = self.load_day(day)
+            if symbol is not None:
+                df = df[df["Symbol"] == symbol.upper()]
+            frames.append(df)
+        if not frames:
+            return typed_predictions(pd.DataFrame(columns=FIELDNAMES))
+        return pd.concat(frames, ignore_index=True)
+
+    def migrate_legacy_csv(self, legacy_path=PREDICTIONS_PATH):
+        """
+        One-shot split of the old single predictions.csv into day partitions.
+        Rows are mapped by position, so the 8-column header with 17-field rows
+        appended under it lines up. The legacy file is left in place.
+        """
+        marker = os.path.join(self.directory, ".legacy_migrated")
+        if os.path.exists(marker) or not os.path.isfile(legacy_path):
+            return 0
+
+        with open(legacy_path, "r", newline="") as f:
+            records = list(csv.reader(f))[1:]
+        rows = [dict(zip(FIELDNAMES, record)) for record in records
+                if len(record) >= 3 and record[1].strip() and DATE_PATTERN.match(record[0])]
+        for row in rows:
+            row["Timestamp"] = row["Timestamp"].replace(" ", "T")
+        with self._lock:
+            self._buffer = rows + self._buffer
+        count = self.flush()
+        self.compact()
+        os.makedirs(self.directory, exist_ok=True)
+        with open(marker, "w") as f:
+            f.write(datetime.now().isoformat())
+        return count
+
+
+_sink = None
+_sink_lock = threading.Lock()
+
+
+def get_prediction_sink():
+    """Shared sink; the legacy predictions.csv is split into partitions on first use."""
+    global _sink
+    with _sink_lock:
+        if _sink is None:
+            _sink = PredictionSink()
+            migrated = _sink.migrate_legacy_csv()
+            if migrated:
+                print(f"[MIGRATION] Partitioned {migrated} predictions from {PREDICTIONS_PATH}")
+            atexit.register(_sink.flush)
+    return _sink
+
+
+def flush_predictions():
+    """Writes the predictions buffered this run and compacts days that have closed."""
+    sink = get_prediction_sink()
+    written = sink.flush()
+    sink.compact()
+    return written
+
+
+def load_predictions(start=None, end=None, symbol=None):
+    return get_prediction_sink().load(start=start, end=end, symbol=symbol)
+
+
+def log_prediction(symbol, signals, trend, df):
     # Use the most recent candle
     latest_candle = df.iloc[-1]
     high = round(latest_candle["High"], 2)
@@ -20,35 +229,23 @@ def log_prediction(symbol, signals, trend, df):
     except Exception:
         vwap = ""
 
-    with open(PREDICTIONS_PATH, "a", newline='') as csvfile:
-        fieldnames = [
-            "Timestamp", "Symbol", "Trend",
-            "EMA", "VWAP Signal", "MACD", "RSI", "Volume Spike",
-            "Signal High", "Signal Low", "Signal VWAP",
-            "Entry Time", "Entry Price",
-            "Exit Time", "Exit Price", "Change %", "Outcome"
-        ]
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-
-        if not file_exists:
-            writer.writeheader()
-
-        writer.writerow({
-            "Timestamp": datetime.now().isoformat(),
-            "Symbol": symbol,
-            "Trend": trend,
-            "EMA": signals.get("ema_bullish", False),
-            "VWAP Signal": signals.get("vwap_above", False),
-            "MACD": signals.get("macd_positive", False),
-            "RSI": round(signals.get("rsi", 0), 2),
-            "Volume Spike": signals.get("volume_spike", False),
-            "Signal High": high,
-            "Signal Low": low,
-            "Signal VWAP": vwap,
-            "Entry Time": "",
-            "Entry Price": "",
-            "Exit Time": "",
-            "Exit Price": "",
-            "Change %": "",
-            "Outcome": ""
-        })
+    # Buffered; flush_predictions() writes the run's rows in one go
+    get_prediction_sink().add({
+        "Timestamp": datetime.now().isoformat(),
+        "Symbol": symbol,
+        "Trend": trend,
+        "EMA": signals.get("ema_bullish", False),
+        "VWAP Signal": signals.get("vwap_above", False),
+        "MACD": signals.get("macd_positive", False),
+        "RSI": round(signals.get("rsi", 0), 2),
+        "Volume Spike": signals.get("volume_spike", False),
+        "Signal High": high,
+        "Signal Low": low,
+        "Signal VWAP": vwap,
+        "Entry Time": "",
+        "Entry Price": "",
+        "Exit Time": "",
+        "Exit Price": "",
+        "Change %": "",
+        "Outcome": ""
+    })
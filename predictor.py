@@ -1,30 +1,27 @@
 # predictor.py
 
+from rules import TREND_CODES, get_compiled_rules
+
+TREND_LABELS = {code: trend for trend, code in TREND_CODES.items()}
+
 def score_signals(signals: dict) -> str:
+    """
+    Bullish / Bearish / Neutral from an analyze_signals() dict, by the
+    TREND_RULES in config.py (first trend in order whose weighted signal count
+    reaches its min_score wins). Uses the compiled tables the panel paths use.
+    """
     if "error" in signals:
         return "Neutral"
 
-    bullish_score = 0
-    bearish_score = 0
-
-    if signals.get("ema_bullish"): bullish_score += 1
-    if signals.get("ema_bearish"): bearish_score -= 1
-
-    if signals.get("vwap_above"): bullish_score += 1
-    if signals.get("vwap_below"): bearish_score -= 1
+    rules = get_compiled_rules()
+    return TREND_LABELS[int(rules.classify(rules.mask(signals)))]
 
-    if signals.get("macd_positive"): bullish_score += 1
-    if signals.get("macd_negative"): bearish_score -= 1
 
-    if signals.get("rsi_bullish"): bullish_score += 1
-    if signals.get("rsi_bearish"): bearish_score -= 1
-
-    if signals.get("volume_spike"): bullish_score += 1
-
-    # Final decision
-    if bullish_score >= 3:
-        return "Bullish"
-    elif bearish_score <= -2:
-        return "Bearish"
-    else:
-        return "Neutral"
+def score_signals_panel(signals: dict, enough=True):
+    """
+    score_signals() over arrays: `signals` holds boolean arrays keyed like the
+    analyze_signals dict, `enough` masks bars with too little history (the
+    "error" case). Returns an int array of TREND_CODES.
+    """
+    rules = get_compiled_rules()
+    return rules.classify(rules.pack(signals), enough)
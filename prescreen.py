@@ -0,0 +1,78 @@
+# prescreen.py
+#
+# Cheap first pass over a large universe before the pipeline's intraday fetch,
+# indicators and long-term confirmation. One batched fetch of daily bars gives,
+# per symbol: last price, opening gap vs. the previous close, today's volume
+# relative to the recent daily average, and average dollar volume. Symbols are
+# filtered stage by stage (price range, liquidity, gap, relative volume), ranked
+# and capped at SCREEN_MAX_SYMBOLS. How many survive each stage is logged.
+
+from config import (
+    SCREEN_INTERVAL, SCREEN_PERIOD, SCREEN_AVERAGE_DAYS, SCREEN_MIN_PRICE, SCREEN_MAX_PRICE,
+    SCREEN_MIN_DOLLAR_VOLUME, SCREEN_MIN_GAP_PCT, SCREEN_MIN_REL_VOLUME, SCREEN_RANK_BY, SCREEN_MAX_SYMBOLS
+)
+from price_data import get_price_data_many
+from logger import log
+from metrics import span, incr
+
+
+def snapshot_stats(df, average_days=SCREEN_AVERAGE_DAYS):
+    """Screen inputs from one symbol's daily bars (last bar = today); None without a prior day."""
+    if df is None or len(df) < 2:
+        return None
+    last, prior = df.iloc[-1], df.iloc[-(average_days + 1):-1]
+    prev_close = float(prior["Close"].iloc[-1])
+    avg_volume = float(prior["Volume"].mean())
+    return {
+        "price": float(last["Close"]),
+        "gap_pct": (float(last["Open"]) / prev_close - 1) * 100 if prev_close else 0.0,
+        "rel_volume": float(last["Volume"]) / avg_volume if avg_volume else 0.0,
+        "dollar_volume": float((prior["Close"] * prior["Volume"]).mean()),
+    }
+
+
+# Filter stages in the order they run: (name, test on the snapshot stats)
+STAGES = [
+    ("price", lambda s: SCREEN_MIN_PRICE <= s["price"] <= SCREEN_MAX_PRICE),
+    ("liquidity", lambda s: s["dollar_volume"] >= SCREEN_MIN_DOLLAR_VOLUME),
+    ("gap", lambda s: abs(s["gap_pct"]) >= SCREEN_MIN_GAP_PCT),
+    ("rel_volume", lambda s: s["rel_volume"] >= SCREEN_MIN_REL_VOLUME),
+]
+
+
+def screen(stats, stages=STAGES, rank_by=SCREEN_RANK_BY, max_symbols=SCREEN_MAX_SYMBOLS):
+    """
+    Applies the stages to {symbol: stats or None}. Returns (shortlist, funnel),
+    the shortlist ranked by `rank_by` (absolute value, descending) and capped,
+    the funnel as [(stage, symbols left)].
+    """
+    survivors = [s for s, values in stats.items() if values is not None]
+    funnel = [("universe", len(stats)), ("snapshot", len(survivors))]
+    for name, test in stages:
+        survivors = [s for s in survivors if test(stats[s])]
+        funnel.append((name, len(survivors)))
+
+    # Stable sort, so ties keep the stock-list order
+    survivors.sort(key=lambda s: abs(stats[s][rank_by]), reverse=True)
+    shortlist = survivors[:max_symbols] if max_symbols else survivors
+    funnel.append(("shortlist", len(shortlist)))
+    return shortlist, funnel
+
+
+def prescreen(symbols, interval=SCREEN_INTERVAL, period=SCREEN_PERIOD):
+    """Shortlist of `symbols` worth running the full pipeline on, best first."""
+    with span("prescreen"):
+        frames = get_price_data_many(symbols, interval=interval, period=period)
+        stats = {}
+        for symbol in dict.fromkeys(symbols):
+            try:
+                stats[symbol] = snapshot_stats(frames.get(symbol))
+            except Exception as e:
+                log(f"[SCREEN] Could not read snapshot for {symbol}: {e}")
+                stats[symbol] = None
+        shortlist, funnel = screen(stats)
+
+    for name, count in funnel:
+        incr(f"screen_{name}", count)
+    log("[SCREEN] " + " -> ".join(f"{name} {count}" for name, count in funnel))
+    return shortlist
@@ -1,27 +1,290 @@
 # price_data.py
 
+import os
 import yfinance as yf
 import pandas as pd
 
-def get_recent_price_data(symbol, interval="1h", period="5d"):
+from config import (
+    PRICE_PROVIDER, PRICE_FETCH_CHUNK_SIZE, REPLAY_HISTORY_DIR, BAR_CACHE_ENABLED,
+    LATEST_PRICE_INTERVAL, LATEST_PRICE_PERIOD
+)
+from bar_cache import get_bar_cache, trim_to_period, covers_period, period_start
+
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+def _normalize_frame(data):
+    """
+    Flattens a single symbol's download into plain OHLCV columns,
+    drops the empty rows a batched download pads in, and strips timezone info.
+    """
+    if isinstance(data.columns, pd.MultiIndex):
+        # Single-ticker yfinance frames carry a (Price, Ticker) header
+        data = data.droplevel(1, axis=1)
+    columns = [c for c in OHLCV_COLUMNS if c in data.columns]
+    data = data[columns].dropna(how="all")
+    data.columns.name = None
+    if "Close" in data.columns:
+        data = data[data["Close"].notna()]
+
+    # Drop timezone info if present
+    if getattr(data.index, "tz", None):
+        data.index = data.index.tz_localize(None)
+
+    return data.copy()
+
+
+def _split_download(data, symbols):
+    """Splits a (possibly multi-ticker) download into one frame per symbol."""
+    frames = {}
+    for symbol in symbols:
+        if data is None or data.empty:
+            frames[symbol] = pd.DataFrame()
+            continue
+
+        if isinstance(data.columns, pd.MultiIndex):
+            level = None
+            for i in range(data.columns.nlevels):
+                if symbol in data.columns.get_level_values(i):
+                    level = i
+                    break
+            if level is None:
+                frames[symbol] = pd.DataFrame()
+                continue
+            frame = data.xs(symbol, axis=1, level=level)
+        elif len(symbols) == 1:
+            frame = data
+        else:
+            frames[symbol] = pd.DataFrame()
+            continue
+
+        frames[symbol] = _normalize_frame(frame)
+    return frames
+
+
+class PriceProvider:
+    """
+    Interface for anything that can hand back OHLCV bars.
+    fetch() always returns {symbol: DataFrame}, with an empty frame for misses.
+    """
+
+    name = "base"
+
+    def fetch(self, symbols, interval, period=None, start=None, end=None):
+        raise NotImplementedError
+
+
+class YFinanceProvider(PriceProvider):
+    """Live bars from yfinance, downloading the universe in chunked batch calls."""
+
+    name = "yfinance"
+
+    def __init__(self, chunk_size=PRICE_FETCH_CHUNK_SIZE):
+        self.chunk_size = max(1, int(chunk_size))
+
+    def fetch(self, symbols, interval, period=None, start=None, end=None):
+        frames = {}
+        for i in range(0, len(symbols), self.chunk_size):
+            chunk = symbols[i:i + self.chunk_size]
+            kwargs = {"start": start, "end": end} if start is not None else {"period": period}
+            data = yf.download(
+                tickers=chunk,
+                interval=interval,
+                group_by="ticker",
+                threads=True,
+                progress=False,
+                **kwargs
+            )
+            frames.update(_split_download(data, chunk))
+        return frames
+
+
+class ReplayProvider(PriceProvider):
+    """
+    Offline bars replayed from data/history/{symbol}_latest.csv.
+    Returns whatever was captured on the last live run, resampled when a coarser
+    interval is requested; period is only honoured through the optional start/end filter.
+    """
+
+    name = "replay"
+
+    def __init__(self, history_dir=REPLAY_HISTORY_DIR):
+        self.history_dir = history_dir
+
+    def _read(self, symbol):
+        path = os.path.join(self.history_dir, f"{symbol}_latest.csv")
+        if not os.path.exists(path):
+            return pd.DataFrame()
+
+        with open(path, "r") as f:
+            first_line = f.readline()
+
+        # yfinance writes a 3-line header (Price / Ticker / Datetime)
+        if first_line.startswith("Price,"):
+            df = pd.read_csv(path, header=[0, 1], index_col=0, skiprows=[2])
+        else:
+            df = pd.read_csv(path, index_col=0)
+        df.index = pd.to_datetime(df.index)
+        return _normalize_frame(df)
+
+    def fetch(self, symbols, interval, period=None, start=None, end=None):
+        frames = {}
+        for symbol in symbols:
+            df = self._read(symbol)
+            if len(df) > 1:
+                # Serve coarser intervals by resampling the captured bars
+                from timeframes import INTERVAL_RULES, resample_bars
+                native = df.index.to_series().diff().min()
+                if interval in INTERVAL_RULES and pd.Timedelta(INTERVAL_RULES[interval]) > native:
+                    df = resample_bars(df, interval)
+            if not df.empty and start is not None:
+                df = df[df.index >= pd.Timestamp(start)]
+            if not df.empty and end is not None:
+                df = df[df.index < pd.Timestamp(end)]
+            frames[symbol] = df
+        return frames
+
+
+PROVIDERS = {
+    YFinanceProvider.name: YFinanceProvider,
+    ReplayProvider.name: ReplayProvider,
+}
+
+_provider = None
+
+
+def set_price_provider(provider):
+    """Swaps the active provider. Accepts a PriceProvider or a name from PROVIDERS."""
+    global _provider
+    if isinstance(provider, str):
+        if provider not in PROVIDERS:
+            raise ValueError(f"Unknown price provider: {provider}")
+        provider = PROVIDERS[provider]()
+    _provider = provider
+    return _provider
+
+
+def get_price_provider():
+    if _provider is None:
+        set_price_provider(PRICE_PROVIDER)
+    return _provider
+
+
+def _fetch_with_cache(provider, symbols, interval, period):
+    """
+    Serves bars from the on-disk cache, fetching only what is missing:
+    symbols with enough cached history get an incremental fetch starting at
+    their last cached date, everything else gets a full period download.
+    """
+    cache = get_bar_cache()
+    fresh, incremental, full = [], {}, []
+    for symbol in symbols:
+        cached = cache.bars(provider.name, interval, symbol)
+        if not covers_period(cached.index(), period):
+            full.append(symbol)
+        elif cache.is_fresh(provider.name, interval, symbol):
+            fresh.append(symbol)
+        else:
+            # Date-level start keeps a small overlap, which the merge de-duplicates
+            start = cached.last_time.strftime("%Y-%m-%d")
+            incremental.setdefault(start, []).append(symbol)
+
+    def _safe_fetch(group, **kwargs):
+        try:
+            return provider.fetch(group, interval, **kwargs)
+        except Exception as e:
+            # Keep serving whatever is cached for this group
+            print(f"[ERROR] Fetch failed for {len(group)} symbols: {e}")
+            return {}
+
+    frames = {}
+    for symbol in fresh:
+        cache.record("hits")
+    for start, group in incremental.items():
+        fetched = _safe_fetch(group, start=start)
+        for symbol in group:
+            new_bars = fetched.get(symbol, pd.DataFrame())
+            cache.store(provider.name, interval, symbol, new_bars, period=period)
+            cache.record("partial", len(new_bars))
+    if full:
+        fetched = _safe_fetch(full, period=period)
+        for symbol in full:
+            new_bars = fetched.get(symbol, pd.DataFrame())
+            if not new_bars.empty:
+                cache.store(provider.name, interval, symbol, new_bars, period=period)
+            cache.record("misses", len(new_bars))
+
+    for symbol in symbols:
+        # load() builds a new frame from the in-memory bars, so callers can't mutate the cache
+        frames[symbol] = trim_to_period(cache.load(provider.name, interval, symbol), period)
+
+    if incremental or full:
+        cache.evict()
+    return frames
+
+
+def get_price_data_many(symbols, interval="1h", period="5d", use_cache=BAR_CACHE_ENABLED):
+    """
+    Fetches bars for a whole universe in as few provider calls as possible.
+    Returns {symbol: DataFrame} for every requested symbol (empty on failure).
+    """
+    symbols = list(dict.fromkeys(s for s in symbols if s))
+    if not symbols:
+        return {}
+
+    provider = get_price_provider()
     try:
-        data = yf.download(
-            tickers=symbol,
-            interval=interval,
-            period=period,
-            progress=False
-        )
-
-        if data.empty:
+        if use_cache:
+            frames = _fetch_with_cache(provider, symbols, interval, period)
+        else:
+            frames = provider.fetch(symbols, interval, period=period)
+    except Exception as e:
+        print(f"[ERROR] Batched fetch failed for {len(symbols)} symbols: {e}")
+        frames = {}
+
+    for symbol in symbols:
+        if frames.get(symbol) is None or frames[symbol].empty:
             print(f"[WARN] No data found for {symbol}")
-            return pd.DataFrame()
+            frames[symbol] = pd.DataFrame()
+    return {symbol: frames[symbol] for symbol in symbols}
+
 
-        # Drop timezone info if present
-        if data.index.tz:
-            data.index = data.index.tz_localize(None)
+def get_cached_bars(symbols, interval="1h", period="5d"):
+    """
+    The bar cache buffers behind get_price_data_many()'s frames, for indicator
+    code that reads column views instead of frames: ({symbol: BarBuffer},
+    {symbol: first bar of `period`}). Call it right after get_price_data_many()
+    with the same arguments; symbols the cache holds no bars for are left out,
+    and both dicts are empty with the cache disabled.
+    """
+    if not BAR_CACHE_ENABLED:
+        return {}, {}
+    cache = get_bar_cache()
+    provider = get_price_provider()
+    buffers, starts = {}, {}
+    for symbol in symbols:
+        buffer = cache.bars(provider.name, interval, symbol)
+        if len(buffer):
+            buffers[symbol] = buffer
+            starts[symbol] = period_start(buffer.index(), period)
+    return buffers, starts
 
-        return data
 
+def get_recent_price_data(symbol, interval="1h", period="5d"):
+    try:
+        return get_price_data_many([symbol], interval=interval, period=period)[symbol]
     except Exception as e:
         print(f"[ERROR] Failed to fetch data for {symbol}: {e}")
         return pd.DataFrame()
+
+
+def get_latest_prices(symbols, interval=LATEST_PRICE_INTERVAL, period=LATEST_PRICE_PERIOD):
+    """
+    Last close for each unique symbol from one batched fetch at a fine interval.
+    Returns {symbol: float or None}.
+    """
+    frames = get_price_data_many(symbols, interval=interval, period=period)
+    prices = {}
+    for symbol, df in frames.items():
+        prices[symbol] = float(df["Close"].iloc[-1]) if not df.empty else None
+    return prices
@@ -0,0 +1,97 @@
+# read_model.py
+#
+# In-memory view of pending entries, trades and the latest prediction per
+# symbol for the Discord commands. Commands read from dicts keyed by symbol and
+# status instead of loading whole tables, so their latency doesn't grow with the
+# logs. Each table is reloaded only when its source changed:
+#
+#   pending entries, trades   the store's change token (SQLite data_version
+#                             moves on any commit from the pipeline or evaluator,
+#                             in any process; total_changes on our own writes)
+#   predictions               PredictionIndex (partition size/inode, appended bytes only)
+
+import threading
+
+from pending_store import get_pending_store
+from trade_store import get_trade_store
+from prediction_index import PredictionIndex
+
+
+class _Table:
+    """Rows of one store plus the token they were loaded at."""
+
+    def __init__(self, store, load, index):
+        self.store = store
+        self.load = load        # store -> list of row dicts
+        self.index = index      # rows -> lookup structure
+        self.token = None
+        self.rows = None
+
+    def get(self):
+        token = self.store.change_token()
+        if token != self.token:
+            self.rows = self.index(self.load(self.store))
+            self.token = token
+        return self.rows
+
+
+def _index_pending(entries):
+    # {status: {symbol: [entry, ...]}} plus {status: [entry, ...]}, ids ascending
+    by_symbol, by_status = {}, {}
+    for entry in entries:
+        status = entry.get("Status") or "waiting"
+        by_status.setdefault(status, []).append(entry)
+        by_symbol.setdefault(status, {}).setdefault(entry.get("Symbol"), []).append(entry)
+    return by_symbol, by_status
+
+
+def _index_trades(trades):
+    by_symbol = {}
+    for trade in trades:
+        by_symbol.setdefault(trade.get("Symbol"), []).append(trade)
+    return by_symbol
+
+
+class ReadModel:
+
+    def __init__(self, pending_store=None, trade_store=None, prediction_index=None):
+        self._lock = threading.Lock()
+        self._pending = _Table(pending_store or get_pending_store(), lambda store: store.entries(), _index_pending)
+        self._trades = _Table(trade_store or get_trade_store(), lambda store: store.trades(), _index_trades)
+        self._predictions = prediction_index or PredictionIndex()
+
+    def pending(self, status="waiting", symbol=None):
+        """Pending entries with `status`, oldest first; only `symbol`'s when given."""
+        with self._lock:
+            by_symbol, by_status = self._pending.get()
+        if symbol is None:
+            return list(by_status.get(status, []))
+        return list(by_symbol.get(status, {}).get(symbol.strip().upper(), []))
+
+    def latest_waiting(self, symbol):
+        waiting = self.pending("waiting", symbol)
+        return waiting[-1] if waiting else None
+
+    def trades(self, symbol):
+        with self._lock:
+            return list(self._trades.get().get(symbol.strip().upper(), []))
+
+    def last_trade(self, symbol):
+        trades = self.trades(symbol)
+        return trades[-1] if trades else None
+
+    def latest_prediction(self, symbol):
+        with self._lock:
+            return self._predictions.get(symbol)
+
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_read_model():
+    global _model
+    with _model_lock:
+        if _model is None:
+            _model = ReadModel()
+    return _model
@@ -0,0 +1,139 @@
+# rules.py
+#
+# TREND_RULES and ENTRY_RULES from config.py compiled into weight matrices, so
+# trend classification and entry matching for every symbol and bar is a couple
+# of array operations instead of per-symbol dict walks.
+#
+# Each bar's signals are packed into one integer bitmask (bit i = SIGNAL_KEYS[i]).
+# Because there are only 2**len(SIGNAL_KEYS) possible masks, the trend code and
+# the entry decision are worked out once per mask up front:
+#
+#     scores = bits(all masks) @ weights      # (masks, rules)
+#
+# and classifying a panel is then a table lookup. The live per-symbol path
+# (predictor.score_signals(), strategy_engine.evaluate_entry_conditions()) goes
+# through the same tables, so TREND_RULES, ENTRY_RULES and RULE_WEIGHTS apply
+# to live runs, backtests and sweeps alike.
+
+import numpy as np
+
+from config import TREND_RULES, ENTRY_RULES, RULE_WEIGHTS, USE_SCORING_MODE, MIN_MATCH_THRESHOLD
+
+# Trend codes used by the vectorized paths (predictor, strategy_engine, backtest.py)
+TREND_CODES = {"Bullish": 1, "Bearish": -1, "Neutral": 0}
+
+# Bit order of the packed masks; any other signal named in the rule config is appended
+SIGNAL_KEYS = [
+    "ema_bullish", "ema_bearish",
+    "vwap_above", "vwap_below",
+    "macd_positive", "macd_negative",
+    "rsi_bullish", "rsi_bearish",
+    "volume_spike",
+]
+TABLE_MAX_BITS = 16  # Past this the per-mask tables get too big; scores are computed per bar instead
+
+
+class CompiledRules:
+
+    def __init__(self, trend_rules=TREND_RULES, entry_rules=ENTRY_RULES, weights=RULE_WEIGHTS,
+                 scoring_mode=USE_SCORING_MODE, threshold=MIN_MATCH_THRESHOLD):
+        keys = list(SIGNAL_KEYS)
+        for rules in [r["signals"] for r in trend_rules.values()] + list(entry_rules.values()):
+            keys += [key for key in rules if key not in keys]
+        self.keys = keys
+        self.bit = {key: i for i, key in enumerate(keys)}
+        self.scoring_mode = scoring_mode
+        self.threshold = threshold
+
+        # Trend side: one column per trend, checked in config order
+        self.trends = list(trend_rules)
+        self.trend_codes = np.array([TREND_CODES[t] for t in self.trends], dtype=np.int8)
+        self.trend_weights = self._matrix([trend_rules[t]["signals"] for t in self.trends], weights)
+        self.trend_min = np.array([trend_rules[t]["min_score"] for t in self.trends], dtype=float)
+
+        # Entry side: one column per trend that has entry rules
+        self.entry_trends = [t for t in entry_rules if entry_rules[t]]
+        self.entry_codes = np.array([TREND_CODES[t] for t in self.entry_trends], dtype=np.int8)
+        self.entry_weights = self._matrix([entry_rules[t] for t in self.entry_trends], weights)
+        self.entry_total = self.entry_weights.sum(axis=0)
+
+        # Lookup tables over every possible mask: trend code, and entry pass per
+        # trend code (row trend + 1, so Bearish/Neutral/Bullish are rows 0/1/2)
+        self.tables = None
+        if len(keys) <= TABLE_MAX_BITS:
+            masks = np.arange(1 << len(keys), dtype=np.uint32)
+            codes = np.array([-1, 0, 1], dtype=np.int8)
+            self.tables = (self._trend(self._unpack(masks)), self._entries(masks[None, :], codes[:, None]))
+
+    def _matrix(self, rule_lists, weights):
+        matrix = np.zeros((len(self.keys), len(rule_lists)))
+        for j, rules in enumerate(rule_lists):
+            for key in rules:
+                matrix[self.bit[key], j] = weights.get(key, 1.0)
+        return matrix
+
+    def _unpack(self, masks):
+        masks = np.asarray(masks, dtype=np.uint32)
+        return ((masks[..., None] >> np.arange(len(self.keys), dtype=np.uint32)) & 1).astype(float)
+
+    def _trend(self, bits):
+        # First trend (in config order) whose score reaches its minimum wins
+        hit = bits @ self.trend_weights >= self.trend_min
+        first = np.argmax(hit, axis=-1)
+        return np.where(hit.any(axis=-1), self.trend_codes[first], TREND_CODES["Neutral"]).astype(np.int8)
+
+    def _entries(self, masks, trend_codes):
+        # Same comparison evaluate_entry_conditions() makes, against the rules of each bar's trend
+        matches = self._unpack(masks) @ self.entry_weights
+        if self.scoring_mode:
+            passed = matches / self.entry_total >= self.threshold
+        else:
+            passed = matches >= self.threshold
+        entry = np.zeros(np.broadcast(masks, trend_codes).shape, dtype=bool)
+        for j, code in enumerate(self.entry_codes):
+            entry |= (trend_codes == code) & passed[..., j]
+        return entry
+
+    def mask(self, signals):
+        """One analyze_signals() dict -> its bitmask, as a plain int."""
+        return sum(1 << i for key, i in self.bit.items() if signals.get(key))
+
+    def entry_score(self, mask, trend_code):
+        """(weighted matches, total weight) of the trend's entry rules for one mask; None without rules."""
+        if trend_code not in self.entry_codes:
+            return None
+        j = int(np.flatnonzero(self.entry_codes == trend_code)[0])
+        return float(self._unpack(mask) @ self.entry_weights[:, j]), float(self.entry_total[j])
+
+    def pack(self, signals):
+        """Boolean arrays keyed by signal name -> one bitmask array. Missing keys count as False."""
+        masks = np.uint32(0)
+        for key, i in self.bit.items():
+            values = signals.get(key)
+            if values is not None:
+                masks = masks | (np.asarray(values, dtype=bool).astype(np.uint32) << np.uint32(i))
+        return masks
+
+    def classify(self, masks, enough=True):
+        """Trend codes for packed masks; bars failing `enough` (too little history) come out Neutral."""
+        masks = np.asarray(masks, dtype=np.uint32)
+        trend = self.tables[0][masks] if self.tables is not None else self._trend(self._unpack(masks))
+        return np.where(enough, trend, TREND_CODES["Neutral"])
+
+    def entries(self, masks, trend_codes):
+        """True where the entry rules of the bar's trend match well enough."""
+        masks = np.asarray(masks, dtype=np.uint32)
+        trend_codes = np.asarray(trend_codes)
+        if self.tables is not None:
+            return self.tables[1][trend_codes + 1, masks]
+        return self._entries(masks, trend_codes)
+
+
+_compiled = None
+
+
+def get_compiled_rules():
+    global _compiled
+    if _compiled is None:
+        _compiled = CompiledRules()
+    return _compiled
@@ -1,13 +1,13 @@
 import discord
-import csv
 import os
 from discord.ext import commands
 from dotenv import load_dotenv
 
+from prediction_index import PredictionIndex
+
 load_dotenv()
 TOKEN = os.getenv("Discord_Alert_Bot_Token")
 EMOJI_TRIGGER = "👀"
-PREDICTIONS_PATH = "output/logs/predictions.csv"
 
 intents = discord.Intents.default()
 intents.message_content = True
@@ -16,16 +16,14 @@ intents.messages = True
 
 bot = commands.Bot(command_prefix="!", intents=intents)
 
+# Built on the first reaction, then only reads rows appended since the last one
+prediction_index = PredictionIndex()
+
 def load_predictions():
     predictions = {}
     try:
-        with open(PREDICTIONS_PATH, "r") as f:
-            reader = csv.DictReader(f)
-            for row in reversed(list(reader)):
-                symbol = row["Symbol"].strip().upper()
-                if symbol not in predictions:
-                    predictions[symbol] = row
-        print(f"[DEBUG] Loaded predictions for symbols: {list(predictions.keys())}")
+        predictions = prediction_index.refresh()
+        print(f"[DEBUG] Predictions indexed for {len(predictions)} symbols")
     except Exception as e:
         print(f"[ERROR] Could not load predictions: {e}")
     return predictions
@@ -78,7 +76,7 @@ async def on_reaction_add(reaction, user):
             f"🧠 **Signal Breakdown for {symbol}**\n"
             f"> Trend: **{trend}**\n"
             f"- EMA: {data['EMA']}\n"
-            f"- VWAP: {data['VWAP']}\n"
+            f"- VWAP: {data['VWAP Signal']}\n"
             f"- MACD: {data['MACD']}\n"
             f"- RSI: {data['RSI']}\n"
             f"- Volume Spike: {'🚀' if data['Volume Spike'] == 'True' else '—'}\n\n"
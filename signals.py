@@ -1,8 +1,11 @@
 # signals.py
 
+import numpy as np
 import pandas as pd
 import ta
 
+from bars import stack
+
 def analyze_signals(df: pd.DataFrame) -> dict:
     if df.empty or len(df) < 30:
         return {"error": "Not enough data"}
@@ -15,16 +18,16 @@ def analyze_signals(df: pd.DataFrame) -> dict:
     low = df["Low"].squeeze()
     volume = df["Volume"].squeeze()
 
-    # 1. EMA Crossover
-    df["ema9"] = ta.trend.ema_indicator(close, window=9)
-    df["ema21"] = ta.trend.ema_indicator(close, window=21)
-    result["ema_bullish"] = df["ema9"].iloc[-1] > df["ema21"].iloc[-1]
-    result["ema_bearish"] = df["ema9"].iloc[-1] < df["ema21"].iloc[-1]
+    # 1. EMA Crossover (indicators stay local: the caller's frame is not widened)
+    ema9 = ta.trend.ema_indicator(close, window=9)
+    ema21 = ta.trend.ema_indicator(close, window=21)
+    result["ema_bullish"] = ema9.iloc[-1] > ema21.iloc[-1]
+    result["ema_bearish"] = ema9.iloc[-1] < ema21.iloc[-1]
 
     # 2. VWAP
-    df["vwap"] = ta.volume.volume_weighted_average_price(high, low, close, volume)
-    result["vwap_above"] = close.iloc[-1] > df["vwap"].iloc[-1]
-    result["vwap_below"] = close.iloc[-1] < df["vwap"].iloc[-1]
+    vwap = ta.volume.volume_weighted_average_price(high, low, close, volume)
+    result["vwap_above"] = close.iloc[-1] > vwap.iloc[-1]
+    result["vwap_below"] = close.iloc[-1] < vwap.iloc[-1]
 
     # 3. MACD Histogram
     macd_hist = ta.trend.macd_diff(close)
@@ -42,3 +45,165 @@ def analyze_signals(df: pd.DataFrame) -> dict:
     result["volume_spike"] = volume.iloc[-1] > avg_vol.iloc[-1] * 1.5
 
     return result
+
+
+# --- Panel mode: the same indicators for a whole universe at once ---
+#
+# The kernels below work on (bars x symbols) NumPy arrays and reproduce the
+# `ta` defaults used above (EMA 9/21, 14-bar VWAP, MACD 12/26/9, Wilder RSI 14,
+# 20-bar volume mean). Each column may start with NaN padding but must have no
+# gaps after its first bar; build_panel() right-aligns symbols to guarantee that.
+
+PANEL_FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+def build_panel(frames: dict) -> pd.DataFrame:
+    """
+    Stacks per-symbol frames into one (bars x (field, symbol)) block.
+    Each symbol's bars are pushed to the bottom so every column ends on its
+    latest bar, regardless of how many bars the symbol has.
+    """
+    frames = {s: df for s, df in frames.items() if df is not None and not df.empty}
+    if not frames:
+        return pd.DataFrame()
+
+    length = max(len(df) for df in frames.values())
+    data = {}
+    for symbol, df in frames.items():
+        pad = length - len(df)
+        for field in PANEL_FIELDS:
+            values = df[field].squeeze().to_numpy(dtype=float) if field in df.columns else np.full(len(df), np.nan)
+            data[(field, symbol)] = np.concatenate([np.full(pad, np.nan), values])
+
+    panel = pd.DataFrame(data)
+    panel.columns = pd.MultiIndex.from_tuples(panel.columns, names=["Price", "Ticker"])
+    return panel
+
+
+def ewm_panel(values, alpha, min_periods):
+    """adjust=False EWM down each column, seeded at the column's first non-NaN value."""
+    out = np.full(values.shape, np.nan)
+    prev = np.full(values.shape[1:], np.nan)
+    count = np.zeros(values.shape[1:])
+    for t in range(values.shape[0]):
+        x = values[t]
+        valid = ~np.isnan(x)
+        seeded = np.where(np.isnan(prev), x, alpha * x + (1 - alpha) * prev)
+        prev = np.where(valid, seeded, prev)
+        count += valid
+        out[t] = np.where(count >= min_periods, prev, np.nan)
+    return out
+
+
+def rolling_sum_panel(values, window):
+    """Rolling sum down each column; NaN until `window` valid values are in the window."""
+    valid = ~np.isnan(values)
+    csum = np.cumsum(np.where(valid, values, 0.0), axis=0)
+    ccount = np.cumsum(valid, axis=0)
+    total = csum.copy()
+    total[window:] -= csum[:-window]
+    count = ccount.copy()
+    count[window:] -= ccount[:-window]
+    return np.where(count >= window, total, np.nan)
+
+
+def compute_indicator_panel(close, high, low, volume):
+    """Returns every indicator series as (bars x symbols) arrays."""
+    close = np.asarray(close, dtype=float)
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    volume = np.asarray(volume, dtype=float)
+    has_bar = ~np.isnan(close)
+
+    ema9 = ewm_panel(close, 2 / (9 + 1), 9)
+    ema21 = ewm_panel(close, 2 / (21 + 1), 21)
+
+    typical_volume = (high + low + close) / 3.0 * volume
+    with np.errstate(divide="ignore", invalid="ignore"):
+        vwap = rolling_sum_panel(typical_volume, 14) / rolling_sum_panel(volume, 14)
+
+    macd = ewm_panel(close, 2 / (12 + 1), 12) - ewm_panel(close, 2 / (26 + 1), 26)
+    macd_hist = macd - ewm_panel(macd, 2 / (9 + 1), 9)
+
+    # Matches ta: the first diff is NaN, which counts as a 0.0 move
+    diff = np.full(close.shape, np.nan)
+    diff[1:] = close[1:] - close[:-1]
+    up = np.where(has_bar, np.where(diff > 0, diff, 0.0), np.nan)
+    down = np.where(has_bar, np.where(diff < 0, -diff, 0.0), np.nan)
+    ema_up = ewm_panel(up, 1 / 14, 14)
+    ema_down = ewm_panel(down, 1 / 14, 14)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = np.where(ema_down == 0, 100, 100 - (100 / (1 + ema_up / ema_down)))
+
+    avg_vol = rolling_sum_panel(volume, 20) / 20
+
+    return {
+        "close": close, "volume": volume, "bars": np.cumsum(has_bar, axis=0),
+        "ema9": ema9, "ema21": ema21, "vwap": vwap,
+        "macd_hist": macd_hist, "rsi": rsi, "avg_vol": avg_vol,
+    }
+
+
+def signals_from_indicators(ind, row=-1, rsi_cutoff=50, volume_multiplier=1.5):
+    """
+    Turns one row of the indicator arrays into the analyze_signals booleans, per column.
+    The cutoffs default to analyze_signals(); sweep.py passes other values.
+    """
+    close, ema9, ema21, vwap = ind["close"][row], ind["ema9"][row], ind["ema21"][row], ind["vwap"][row]
+    macd_hist, rsi = ind["macd_hist"][row], ind["rsi"][row]
+    return {
+        "ema_bullish": ema9 > ema21,
+        "ema_bearish": ema9 < ema21,
+        "vwap_above": close > vwap,
+        "vwap_below": close < vwap,
+        "macd_positive": macd_hist > 0,
+        "macd_negative": macd_hist < 0,
+        "rsi": rsi,
+        "rsi_bullish": rsi > rsi_cutoff,
+        "rsi_bearish": rsi < rsi_cutoff,
+        "volume_spike": ind["volume"][row] > ind["avg_vol"][row] * volume_multiplier,
+    }
+
+
+def analyze_signals_panel(panel: pd.DataFrame) -> dict:
+    """
+    Panel version of analyze_signals(): one pass over the whole universe.
+    Takes a build_panel() block and returns {symbol: signal dict}.
+    """
+    if panel.empty:
+        return {}
+
+    symbols = list(panel["Close"].columns)
+    ind = compute_indicator_panel(
+        panel["Close"][symbols].to_numpy(),
+        panel["High"][symbols].to_numpy(),
+        panel["Low"][symbols].to_numpy(),
+        panel["Volume"][symbols].to_numpy(),
+    )
+    return _latest_signals(symbols, ind)
+
+
+def analyze_signals_bars(buffers: dict, starts=None) -> dict:
+    """
+    analyze_signals_panel() straight from {symbol: bars.BarBuffer}: bars.stack()
+    copies the buffers' columns into the indicator arrays, skipping the DataFrames
+    and build_panel().
+    `starts` ({symbol: time}) limits each symbol to its bars from that time on.
+    """
+    symbols, arrays = stack(buffers, starts=starts)
+    if not symbols:
+        return {}
+    return _latest_signals(symbols, compute_indicator_panel(arrays["Close"], arrays["High"], arrays["Low"], arrays["Volume"]))
+
+
+def _latest_signals(symbols, ind):
+    latest = signals_from_indicators(ind)
+    enough = ind["bars"][-1] >= 30
+
+    results = {}
+    for i, symbol in enumerate(symbols):
+        if not enough[i]:
+            results[symbol] = {"error": "Not enough data"}
+            continue
+        results[symbol] = {key: values[i] for key, values in latest.items()}
+    return results
@@ -1,33 +1,43 @@
 # strategy_engine.py
 
-from config import ENTRY_RULES, MIN_MATCH_THRESHOLD, USE_SCORING_MODE
+from config import USE_SCORING_MODE
+from rules import TREND_CODES, get_compiled_rules
 
 def evaluate_entry_conditions(symbol, df, signals, trend):
-    rules = ENTRY_RULES.get(trend)
-    if not rules:
+    rules = get_compiled_rules()
+    code = TREND_CODES.get(trend)
+    mask = rules.mask(signals)
+    score = rules.entry_score(mask, code)
+    if score is None:
         return None  # No rules defined for this trend
 
-# Count how many signals match the required rule set
-    matches = sum(1 for rule in rules if signals.get(rule))
+    # Weighted count of the trend's ENTRY_RULES that match (a plain count with RULE_WEIGHTS empty)
+    matches, total = score
 
     # Optionally return score (even if entry is not triggered)
-    signal_score = matches / len(rules)
+    signal_score = matches / total
+
+    # The decision itself comes from the compiled rules, so it always agrees with the panel paths
+    if not bool(rules.entries(mask, code)):
+        return None
 
     if USE_SCORING_MODE:
-        if signal_score >= MIN_MATCH_THRESHOLD:
-            return {
-                "price": df["Close"].iloc[-1],
-                "buffer": "0.5%",
-                "rationale": f"{trend} setup based on signal score {signal_score:.2f}",
-                "expectation": f"{trend} trend continuation"
-            }
+        rationale = f"{trend} setup based on signal score {signal_score:.2f}"
     else:
-        if matches >= MIN_MATCH_THRESHOLD:
-            return {
-                "price": df["Close"].iloc[-1],
-                "buffer": "0.5%",
-                "rationale": f"{trend} setup met with {matches} signal matches",
-                "expectation": f"{trend} trend continuation"
-            }
-
-    return None
+        rationale = f"{trend} setup met with {matches:g} signal matches"
+    return {
+        "price": df["Close"].iloc[-1],
+        "buffer": "0.5%",
+        "rationale": rationale,
+        "expectation": f"{trend} trend continuation"
+    }
+
+
+def evaluate_entry_panel(signals, trend_codes):
+    """
+    evaluate_entry_conditions() over arrays: True where the trend's ENTRY_RULES
+    match well enough for an entry. `signals` holds boolean arrays keyed by
+    rule name; `trend_codes` is the score_signals_panel() output.
+    """
+    rules = get_compiled_rules()
+    return rules.entries(rules.pack(signals), trend_codes)
@@ -0,0 +1,266 @@
+# sweep.py
+#
+# Grid search over strategy parameters on the backtest path (backtest.py).
+# Bars are loaded once and written as .npy files in the sweep directory; worker
+# processes memory-map them read-only instead of each receiving a pickled copy.
+# Indicators that no swept parameter touches (VWAP, MACD, RSI, average volume)
+# are computed once, and every EMA window in the grid once, in the same files;
+# like the backtest, they restart with each --lookback window (session_indicators()).
+# Each finished setting is appended to results.jsonl, so rerunning the same
+# command after an interruption only evaluates what is missing. The bars are
+# never refetched for a sweep in progress; a grid with EMA windows the saved
+# arrays don't cover needs --fresh.
+#
+#   python sweep.py --period 60d --param threshold=0.6,0.8 --param ema_fast=5,9
+
+import os
+import json
+import shutil
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from config import (
+    DEFAULT_INTERVAL, STOCK_LIST_PATH, BACKTEST_PERIOD, BACKTEST_PROVIDER, BACKTEST_TRIGGER_WINDOW_BARS,
+    BACKTEST_HORIZONS, BACKTEST_LOOKBACK, SWEEP_DIR, SWEEP_WORKERS, SWEEP_GRID, SWEEP_RANK_BY, SWEEP_MIN_TRIGGERED
+)
+from price_data import get_price_data_many, set_price_provider
+from signals import build_panel, signals_from_indicators
+from rules import CompiledRules
+from backtest import simulate_signals, session_indicators, summarize, load_symbols, _aligned_timestamps
+
+PARAMS = ["threshold", "buffer", "ema_fast", "ema_slow", "rsi_cutoff", "volume_multiplier"]
+
+
+def expand_grid(grid):
+    """Every combination of the grid's values, skipping fast EMAs that aren't faster than the slow one."""
+    names = [p for p in PARAMS if p in grid]
+    combos = []
+    for values in itertools.product(*(grid[p] for p in names)):
+        params = dict(zip(names, values))
+        if params.get("ema_fast", 9) >= params.get("ema_slow", 21):
+            continue
+        combos.append(params)
+    return combos
+
+
+def params_key(params):
+    return json.dumps(params, sort_keys=True)
+
+
+# --- Shared arrays ---
+
+def prepare(directory, frames, ema_windows, lookback=BACKTEST_LOOKBACK):
+    """Writes the bar and indicator arrays the workers map; returns the symbol order."""
+    panel = build_panel(frames)
+    symbols = list(panel["Close"].columns)
+    close = panel["Close"][symbols].to_numpy()
+    high = panel["High"][symbols].to_numpy()
+    low = panel["Low"][symbols].to_numpy()
+
+    ind = session_indicators(frames, symbols, len(close), lookback, sorted(ema_windows))
+    arrays = {name: ind[name] for name in ("close", "volume", "bars", "vwap", "macd_hist", "rsi", "avg_vol")}
+    arrays.update(high=high, low=low, stamps=_aligned_timestamps(frames, symbols, len(close)))
+    for window in sorted(ema_windows):
+        arrays[f"ema{window}"] = ind[f"ema{window}"]
+
+    os.makedirs(directory, exist_ok=True)
+    for name, values in arrays.items():
+        np.save(os.path.join(directory, f"{name}.npy"), values)
+    return symbols
+
+
+def attach(directory):
+    """Read-only views of the arrays prepare() wrote."""
+    arrays = {}
+    for filename in os.listdir(directory):
+        if filename.endswith(".npy"):
+            arrays[filename[:-4]] = np.load(os.path.join(directory, filename), mmap_mode="r")
+    return arrays
+
+
+# --- Workers ---
+
+_arrays = None
+_symbols = None
+_rules = {}
+
+
+def _init_worker(directory, symbols):
+    global _arrays, _symbols
+    _arrays = attach(directory)
+    _symbols = symbols
+
+
+def evaluate(params, window, horizons):
+    """Backtest summary for one setting; runs in a worker against the mapped arrays."""
+    params = {**{"threshold": None, "buffer": 0.005, "ema_fast": 9, "ema_slow": 21,
+                 "rsi_cutoff": 50, "volume_multiplier": 1.5}, **params}
+    threshold = params["threshold"]
+    if threshold not in _rules:
+        _rules[threshold] = CompiledRules() if threshold is None else CompiledRules(threshold=threshold)
+
+    # signals_from_indicators() compares ema9 with ema21; the swept windows stand in for them
+    ind = dict(_arrays, ema9=_arrays[f"ema{params['ema_fast']}"], ema21=_arrays[f"ema{params['ema_slow']}"])
+    signals = signals_from_indicators(ind, slice(None), params["rsi_cutoff"], params["volume_multiplier"])
+    trades = simulate_signals(
+        _symbols, _arrays["stamps"], _arrays["close"], _arrays["high"], _arrays["low"], signals,
+        _arrays["bars"] >= 30, window, horizons, buffer=params["buffer"], rules=_rules[threshold],
+    )
+    return summarize(trades, horizons)
+
+
+# --- Sweep ---
+
+def rank(results, rank_by=SWEEP_RANK_BY, min_triggered=SWEEP_MIN_TRIGGERED):
+    """Results table, best first; settings with too few filled triggers go to the bottom."""
+    table = pd.DataFrame(results)
+    if table.empty or rank_by not in table.columns:
+        return table
+    table["enough_trades"] = table["triggered"] >= min_triggered
+    return table.sort_values(["enough_trades", rank_by], ascending=[False, False], na_position="last",
+                             ignore_index=True)
+
+
+def load_results(path):
+    results = {}
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # A line cut short by the interruption
+                results[params_key({p: row[p] for p in PARAMS if p in row})] = row
+    return results
+
+
+def run_sweep(directory, symbols, grid, interval, period, window=BACKTEST_TRIGGER_WINDOW_BARS,
+              horizons=BACKTEST_HORIZONS, workers=SWEEP_WORKERS, fresh=False, lookback=BACKTEST_LOOKBACK):
+    meta = {"symbols": symbols, "interval": interval, "period": period, "window": window,
+            "horizons": horizons, "lookback": lookback}
+    meta_path = os.path.join(directory, "meta.json")
+    results_path = os.path.join(directory, "results.jsonl")
+    arrays_dir = os.path.join(directory, "arrays")
+
+    if fresh and os.path.isdir(directory):
+        shutil.rmtree(directory)
+    if os.path.exists(meta_path):
+        with open(meta_path, "r") as f:
+            saved = json.load(f)
+        if {k: saved.get(k) for k in meta} != meta:
+            raise ValueError(f"{directory} holds a sweep with different data settings; use --fresh or another --name")
+        panel_symbols = saved["panel_symbols"]
+    else:
+        panel_symbols = None
+
+    combos = expand_grid(grid)
+    ema_windows = {9, 21} | set(grid.get("ema_fast", [])) | set(grid.get("ema_slow", []))
+    done = load_results(results_path)
+    todo = [params for params in combos if params_key(params) not in done]
+    missing_emas = [w for w in ema_windows if not os.path.exists(os.path.join(arrays_dir, f"ema{w}.npy"))]
+
+    if todo and panel_symbols is not None and missing_emas:
+        # Refetching would replace the bars the results already in results.jsonl were computed on
+        windows = ", ".join(str(w) for w in sorted(missing_emas))
+        raise ValueError(f"{directory} has no EMA arrays for {windows}; use --fresh to sweep them")
+    if todo and panel_symbols is None:
+        frames = get_price_data_many(symbols, interval=interval, period=period)
+        frames = {s: df for s, df in frames.items() if df is not None and not df.empty}
+        if not frames:
+            raise ValueError("No bars loaded for any symbol")
+        panel_symbols = prepare(arrays_dir, frames, ema_windows, lookback)
+        with open(meta_path, "w") as f:
+            json.dump({**meta, "panel_symbols": panel_symbols}, f, indent=2)
+
+    print(f"[SWEEP] {len(combos)} settings, {len(combos) - len(todo)} already done, {len(todo)} to run")
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(arrays_dir, panel_symbols)) as pool, open(results_path, "a") as out:
+            if out.tell() > 0:
+                out.write("\n")  # Keeps a line cut short by an interruption from swallowing the next one
+            futures = {pool.submit(evaluate, params, window, horizons): params for params in todo}
+            try:
+                for i, future in enumerate(as_completed(futures), 1):
+                    params = futures[future]
+                    try:
+                        row = {**params, **future.result()}
+                    except Exception as e:
+                        print(f"[SWEEP] {params} failed: {e}")
+                        continue
+                    out.write(json.dumps(row, default=str) + "\n")
+                    out.flush()
+                    done[params_key(params)] = row
+                    if i % 10 == 0 or i == len(todo):
+                        print(f"[SWEEP] {i}/{len(todo)} evaluated")
+            except KeyboardInterrupt:
+                print("[SWEEP] Interrupted; rerun the same command to resume")
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
+
+    wanted = {params_key(params) for params in combos}
+    return [row for key, row in done.items() if key in wanted]
+
+
+def parse_grid(pairs, base=SWEEP_GRID):
+    """--param name=v1,v2 entries on top of SWEEP_GRID; a single value pins the parameter."""
+    grid = {name: list(values) for name, values in base.items()}
+    for pair in pairs or []:
+        name, _, values = pair.partition("=")
+        name = name.strip()
+        if name not in PARAMS or not values:
+            raise ValueError(f"Bad --param {pair!r}; expected one of {', '.join(PARAMS)} as name=v1,v2")
+        cast = int if name.startswith("ema_") else float
+        grid[name] = [cast(v) for v in values.split(",") if v.strip()]
+    return grid
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Grid-search strategy parameters over stored bars.")
+    parser.add_argument("--interval", type=str, default=DEFAULT_INTERVAL)
+    parser.add_argument("--period", type=str, default=BACKTEST_PERIOD)
+    parser.add_argument("--provider", type=str, default=BACKTEST_PROVIDER)
+    parser.add_argument("--symbols", type=str, default=None, help="Comma-separated; defaults to the stock list")
+    parser.add_argument("--param", action="append", help="name=v1,v2 (repeatable); overrides SWEEP_GRID")
+    parser.add_argument("--window", type=int, default=BACKTEST_TRIGGER_WINDOW_BARS)
+    parser.add_argument("--lookback", type=str, default=BACKTEST_LOOKBACK, help="Indicator window, as in backtest.py")
+    parser.add_argument("--horizons", type=str, default=",".join(str(h) for h in BACKTEST_HORIZONS))
+    parser.add_argument("--workers", type=int, default=SWEEP_WORKERS)
+    parser.add_argument("--name", type=str, default=None, help="Sweep directory under SWEEP_DIR (resumed if present)")
+    parser.add_argument("--fresh", action="store_true", help="Discard a previous sweep of the same name")
+    parser.add_argument("--rank-by", type=str, default=SWEEP_RANK_BY)
+    parser.add_argument("--min-triggered", type=int, default=SWEEP_MIN_TRIGGERED)
+    parser.add_argument("--top", type=int, default=20)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    grid = parse_grid(args.param)
+    horizons = [int(h) for h in args.horizons.split(",") if h.strip()]
+    symbols = [s.strip().upper() for s in args.symbols.split(",")] if args.symbols else load_symbols(STOCK_LIST_PATH)
+    directory = os.path.join(SWEEP_DIR, args.name or f"{args.interval}_{args.period}")
+
+    set_price_provider(args.provider)
+    results = run_sweep(directory, symbols, grid, args.interval, args.period, args.window, horizons,
+                        args.workers, args.fresh, args.lookback)
+    table = rank(results, args.rank_by, args.min_triggered)
+    if table.empty:
+        print("[SWEEP] No results")
+        return table
+
+    out_path = os.path.join(directory, "ranked.csv")
+    table.to_csv(out_path, index=False)
+    columns = [p for p in PARAMS if p in table.columns] + ["signals", "triggered", "hit_rate", args.rank_by]
+    print(table[[c for c in dict.fromkeys(columns) if c in table.columns]].head(args.top).to_string(index=False))
+    print(f"[SWEEP] Ranked table written to {out_path}")
+    return table
+
+
+if __name__ == "__main__":
+    main()
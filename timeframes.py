@@ -0,0 +1,117 @@
+# timeframes.py
+
+import pandas as pd
+
+from bar_cache import get_bar_cache, trim_to_period, covers_period
+from price_data import get_price_provider, get_price_data_many
+
+# yfinance interval -> pandas offset alias
+INTERVAL_RULES = {
+    "1m": "1min", "2m": "2min", "5m": "5min", "15m": "15min", "30m": "30min",
+    "60m": "60min", "90m": "90min", "1h": "60min", "1d": "1D",
+}
+
+OHLCV_AGG = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+
+
+def interval_to_timedelta(interval):
+    return pd.Timedelta(INTERVAL_RULES[interval])
+
+
+def can_resample(fine_interval, interval):
+    """True when `interval` is a whole multiple of the finer interval we already hold."""
+    if fine_interval not in INTERVAL_RULES or interval not in INTERVAL_RULES:
+        return False
+    fine, coarse = interval_to_timedelta(fine_interval), interval_to_timedelta(interval)
+    return coarse > fine and coarse % fine == pd.Timedelta(0)
+
+
+def resample_bars(df, interval):
+    """
+    OHLCV-resamples finer bars into `interval` bars.
+    Hourly buckets are anchored on :30 to match the 9:30 session open the way
+    yfinance labels its 1h bars; daily buckets are calendar days.
+    """
+    if df.empty:
+        return df
+
+    rule = INTERVAL_RULES[interval]
+    offset = "30min" if interval in ("60m", "90m", "1h") else None
+    agg = {col: how for col, how in OHLCV_AGG.items() if col in df.columns}
+    bars = df[list(agg)].resample(rule, offset=offset, label="left", closed="left").agg(agg)
+    return bars.dropna(subset=["Close"])
+
+
+def _bars_before(df, ts):
+    return df[df.index < ts] if not df.empty else df
+
+
+def build_higher_timeframe(fine_frames, fine_interval, interval, period):
+    """
+    Builds `interval` bars for every symbol from the finer bars already in memory.
+    Older history the fine frames don't reach is served from the bar cache; the
+    network is only asked for the uncovered part (a full download when the cache
+    is too short, otherwise the gap between what was last synced and the fine bars).
+    """
+    if not can_resample(fine_interval, interval):
+        return get_price_data_many(list(fine_frames), interval=interval, period=period)
+
+    provider = get_price_provider()
+    cache = get_bar_cache()
+
+    resampled, fallback, full, gaps = {}, [], [], {}
+    for symbol, fine in fine_frames.items():
+        if fine is None or fine.empty:
+            fallback.append(symbol)
+            continue
+
+        bars = resample_bars(fine, interval)
+        resampled[symbol] = bars
+        first = bars.index[0]
+
+        cached = cache.load(provider.name, interval, symbol)
+        older = _bars_before(cached, first)
+        synced = cache.synced_until(provider.name, interval, symbol)
+
+        if not covers_period(pd.concat([older, bars]), period):
+            full.append(symbol)
+        elif synced is None or synced < first:
+            # Bars between the last sync and the fine window may be missing
+            since = synced if synced is not None else older.index[-1] if not older.empty else first
+            start = since.strftime("%Y-%m-%d")
+            gaps.setdefault((start, first), []).append(symbol)
+        else:
+            cache.record("hits")
+
+    if full:
+        try:
+            fetched = provider.fetch(full, interval, period=period)
+        except Exception as e:
+            print(f"[ERROR] Long-term fetch failed for {len(full)} symbols: {e}")
+            fetched = {}
+        for symbol in full:
+            new_bars = fetched.get(symbol, pd.DataFrame())
+            cache.store(provider.name, interval, symbol, new_bars)
+            cache.record("misses", len(new_bars))
+
+    for (start, first), group in gaps.items():
+        try:
+            fetched = provider.fetch(group, interval, start=start, end=first.strftime("%Y-%m-%d"))
+        except Exception as e:
+            print(f"[ERROR] Gap fetch failed for {len(group)} symbols: {e}")
+            continue
+        for symbol in group:
+            new_bars = fetched.get(symbol, pd.DataFrame())
+            cache.store(provider.name, interval, symbol, _bars_before(new_bars, first), synced_until=first)
+            cache.record("partial", len(new_bars))
+
+    frames = {}
+    for symbol, bars in resampled.items():
+        cached = cache.load(provider.name, interval, symbol)
+        combined = pd.concat([_bars_before(cached, bars.index[0]), bars])
+        frames[symbol] = trim_to_period(combined, period).copy()
+
+    if fallback:
+        frames.update(get_price_data_many(fallback, interval=interval, period=period))
+
+    return {symbol: frames.get(symbol, pd.DataFrame()) for symbol in fine_frames}
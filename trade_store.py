@@ -0,0 +1,290 @@
+# trade_store.py
+
+import os
+import csv
+import sqlite3
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+from config import TRADES_DB_PATH, TRADES_PATH, EXIT_TARGET_PCT, EXIT_STOP_PCT
+
+# trades.csv column name -> SQLite column
+COLUMNS = {
+    "Symbol": "symbol",
+    "Entry Time": "entry_time",
+    "Entry Price": "entry_price",
+    "Buffer": "buffer",
+    "Rationale": "rationale",
+    "Expectation": "expectation",
+    "Signal Source Time": "signal_time",
+    "Trend at Entry": "trend",
+    "Exit Time": "exit_time",
+    "Exit Price": "exit_price",
+    "Change %": "change_pct",
+    "Outcome": "outcome",
+    "Notes": "notes",
+    "Exit Reason": "exit_reason",
+    "Target": "target",
+    "Stop": "stop",
+    "P&L": "pnl",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    pending_id INTEGER UNIQUE,
+    symbol TEXT NOT NULL,
+    trend TEXT,
+    direction INTEGER NOT NULL,
+    entry_time TEXT,
+    entry_price REAL NOT NULL,
+    target REAL,
+    stop REAL,
+    buffer TEXT,
+    rationale TEXT,
+    expectation TEXT,
+    signal_time TEXT,
+    notes TEXT,
+    status TEXT NOT NULL DEFAULT 'open',
+    last_bar TEXT,
+    exit_time TEXT,
+    exit_price REAL,
+    exit_reason TEXT,
+    change_pct REAL,
+    pnl REAL,
+    outcome TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_trades_status ON trades (status);
+CREATE TABLE IF NOT EXISTS pnl_ledger (
+    scope TEXT NOT NULL,
+    key TEXT NOT NULL,
+    trades INTEGER NOT NULL DEFAULT 0,
+    wins INTEGER NOT NULL DEFAULT 0,
+    losses INTEGER NOT NULL DEFAULT 0,
+    pnl REAL NOT NULL DEFAULT 0,
+    change_pct REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (scope, key)
+);
+CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+DIRECTIONS = {"bullish": 1, "bearish": -1}
+
+
+def _to_float(value):
+    try:
+        return float(value) if value not in (None, "") and not pd.isna(value) else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_iso(value):
+    if value in (None, "") or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    try:
+        return pd.Timestamp(value).isoformat()
+    except (TypeError, ValueError):
+        return None
+
+
+def exit_levels(entry_price, direction, target_pct=EXIT_TARGET_PCT, stop_pct=EXIT_STOP_PCT):
+    """(target, stop) prices for a long (1) or short (-1) entry."""
+    target = round(entry_price * (1 + direction * target_pct / 100), 2)
+    stop = round(entry_price * (1 - direction * stop_pct / 100), 2)
+    return target, stop
+
+
+class TradeStore:
+    """
+    Trades in a WAL-mode SQLite database, with a running P&L ledger. Open trades
+    remember the last bar they were checked against, so each exit pass only
+    looks at newer bars; closing a trade adds it to the per-day and per-symbol
+    ledger rows in the same transaction, so totals never need a full recompute.
+    """
+
+    def __init__(self, path=TRADES_DB_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def change_token(self):
+        """(data_version, total_changes), as PendingEntryStore.change_token()."""
+        with self._lock:
+            version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+            return version, self.conn.total_changes
+
+    def _prepare(self, trade):
+        """Normalizes a trades.csv-style dict (plus optional pending_id/Direction) into column values."""
+        trend = str(trade.get("Trend at Entry") or trade.get("Trend") or "")
+        direction = DIRECTIONS.get(str(trade.get("Direction") or trend).lower(), 1)
+        entry_price = _to_float(trade.get("Entry Price"))
+        target, stop = exit_levels(entry_price, direction) if entry_price else (None, None)
+        return {
+            "pending_id": trade.get("pending_id"),
+            "symbol": str(trade.get("Symbol") or "").strip().upper(),
+            "trend": trend,
+            "direction": direction,
+            "entry_time": _to_iso(trade.get("Entry Time")),
+            "entry_price": entry_price,
+            "target": _to_float(trade.get("Target")) or target,
+            "stop": _to_float(trade.get("Stop")) or stop,
+            "buffer": trade.get("Buffer") or "0.5%",
+            "rationale": trade.get("Rationale"),
+            "expectation": trade.get("Expectation") or (f"{trend} trend continuation" if trend else None),
+            "signal_time": _to_iso(trade.get("Signal Source Time")),
+            "notes": trade.get("Notes"),
+        }
+
+    def add_many(self, trades):
+        """
+        Opens trades; a pending entry that already has a trade is ignored. Trades
+        need a symbol, an entry price and an entry time (the exit pass starts
+        from it). Returns rows inserted.
+        """
+        values = [self._prepare(trade) for trade in trades]
+        complete = [v for v in values if v["symbol"] and v["entry_price"] and v["entry_time"]]
+        if len(complete) < len(values):
+            print(f"[WARN] Skipped {len(values) - len(complete)} trade(s) without symbol, entry price or entry time")
+        values = complete
+        if not values:
+            return 0
+        columns = list(values[0])
+        with self._lock, self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                f"INSERT OR IGNORE INTO trades ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+                [[v[c] for c in columns] for v in values],
+            )
+            return self.conn.total_changes - before
+
+    def open_trades(self):
+        """Open trades as a DataFrame (id, symbol, direction, entry_time, entry_price, target, stop, last_bar)."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT id, symbol, direction, entry_time, entry_price, target, stop, last_bar "
+                "FROM trades WHERE status = 'open' ORDER BY id"
+            ).fetchall()
+        df = pd.DataFrame([dict(row) for row in rows],
+                          columns=["id", "symbol", "direction", "entry_time", "entry_price", "target", "stop", "last_bar"])
+        df["entry_time"] = pd.to_datetime(df["entry_time"], format="ISO8601")
+        df["last_bar"] = pd.to_datetime(df["last_bar"], format="ISO8601")
+        return df
+
+    def apply_exits(self, closes, last_bars):
+        """
+        One transaction: records `closes` (DataFrame with id, symbol, exit_time,
+        exit_price, exit_reason, change_pct, pnl, outcome), advances the
+        last-checked bar of the trades in `last_bars` ({id: timestamp}) and adds
+        the closed trades to the ledger. A trade another process closed first
+        is left alone and stays out of the ledger. Returns the closes recorded.
+        """
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "UPDATE trades SET last_bar = ? WHERE id = ? AND status = 'open'",
+                [(_to_iso(ts), int(trade_id)) for trade_id, ts in last_bars.items()],
+            )
+            if closes is None or closes.empty:
+                return closes.iloc[:0] if closes is not None else pd.DataFrame()
+            # Row by row: the rowcount says whether this pass is the one that closed the trade
+            applied = [
+                self.conn.execute(
+                    "UPDATE trades SET status = 'closed', exit_time = ?, exit_price = ?, exit_reason = ?, "
+                    "change_pct = ?, pnl = ?, outcome = ?, last_bar = ? WHERE id = ? AND status = 'open'",
+                    (_to_iso(r.exit_time), _to_float(r.exit_price), r.exit_reason, _to_float(r.change_pct),
+                     _to_float(r.pnl), r.outcome, _to_iso(r.exit_time), int(r.id)),
+                ).rowcount == 1
+                for r in closes.itertuples(index=False)
+            ]
+            recorded = closes[applied]
+
+            # Ledger deltas (priced exits only), aggregated per key before they touch the table
+            closes = recorded[recorded["exit_price"].notna()]
+            closes = closes.assign(day=pd.to_datetime(closes["exit_time"]).dt.strftime("%Y-%m-%d"),
+                                   win=closes["outcome"] == "win", loss=closes["outcome"] == "loss")
+            for scope, key in (("day", "day"), ("symbol", "symbol")):
+                deltas = closes.groupby(key).agg(trades=("id", "size"), wins=("win", "sum"), losses=("loss", "sum"),
+                                                 pnl=("pnl", "sum"), change_pct=("change_pct", "sum"))
+                self.conn.executemany(
+                    "INSERT INTO pnl_ledger (scope, key, trades, wins, losses, pnl, change_pct) VALUES (?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(scope, key) DO UPDATE SET trades = trades + excluded.trades, wins = wins + excluded.wins, "
+                    "losses = losses + excluded.losses, pnl = pnl + excluded.pnl, change_pct = change_pct + excluded.change_pct",
+                    [(scope, str(k), int(d.trades), int(d.wins), int(d.losses), float(d.pnl), float(d.change_pct))
+                     for k, d in deltas.iterrows()],
+                )
+        return recorded
+
+    def ledger(self, scope="day"):
+        """Ledger rows for "day" or "symbol", with win rate and average change per trade."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT key, trades, wins, losses, pnl, change_pct FROM pnl_ledger WHERE scope = ? ORDER BY key", (scope,)
+            ).fetchall()
+        df = pd.DataFrame([dict(row) for row in rows], columns=["key", "trades", "wins", "losses", "pnl", "change_pct"])
+        df = df.rename(columns={"key": scope, "change_pct": "total_change_pct"})
+        df["win_rate"] = (df["wins"] / df["trades"]).round(3)
+        df["avg_change_pct"] = (df["total_change_pct"] / df["trades"]).round(4)
+        return df
+
+    def trades(self, symbol=None):
+        query, params = "SELECT * FROM trades", []
+        if symbol is not None:
+            query += " WHERE symbol = ?"
+            params.append(symbol.upper())
+        with self._lock:
+            rows = self.conn.execute(query + " ORDER BY id", params).fetchall()
+        return [{csv_name: row[column] for csv_name, column in COLUMNS.items()} for row in rows]
+
+    def migrate_from_csv(self, csv_path=TRADES_PATH):
+        """One-shot import of trades.csv rows written before the store existed. Returns rows imported."""
+        with self._lock:
+            done = self.conn.execute("SELECT value FROM store_meta WHERE key = 'csv_migrated'").fetchone()
+        if done:
+            return 0
+        rows = []
+        if os.path.exists(csv_path):
+            with open(csv_path, "r", newline="") as f:
+                rows = [row for row in csv.DictReader(f) if row.get("Symbol") and row.get("Entry Price")]
+        count = self.add_many(rows)
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO store_meta (key, value) VALUES ('csv_migrated', ?)", (datetime.now().isoformat(),)
+            )
+        return count
+
+    def export_csv(self, csv_path=TRADES_PATH):
+        """Writes every trade out as trades.csv for journaling and the Discord !status command."""
+        trades = self.trades()
+        os.makedirs(os.path.dirname(csv_path) or ".", exist_ok=True)
+        tmp_path = csv_path + ".tmp"
+        with open(tmp_path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(COLUMNS))
+            writer.writeheader()
+            writer.writerows(trades)
+        os.replace(tmp_path, csv_path)
+        return len(trades)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_trade_store():
+    """Shared store, seeded from the existing trades.csv on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = TradeStore()
+            migrated = _store.migrate_from_csv()
+            if migrated:
+                print(f"[MIGRATION] Imported {migrated} trades from {TRADES_PATH}")
+    return _store
@@ -0,0 +1,145 @@
+# trigger_index.py
+#
+# Waiting pending entries kept in memory, per symbol and direction, sorted by
+# trigger price. A bullish entry triggers once price >= its trigger, so for a
+# new price every triggered bullish entry sits at the front of its list
+# (bisect_right, one slice); bearish entries trigger once price <= trigger and
+# sit at the back (bisect_left). Resolving a price is O(log n) plus the hits.
+#
+# The pending store stays the source of truth: sync() rebuilds from it only
+# when the database changed since the last sync (any connection, any process).
+
+import threading
+from bisect import bisect_left, bisect_right
+
+DIRECTIONS = ("bullish", "bearish")
+
+
+def _trigger(entry):
+    # Same reading as the evaluator always used: a missing trigger counts as 0
+    return float(entry.get("Trigger Price") or 0)
+
+
+class TriggerIndex:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._books = {}    # symbol -> {direction: ([trigger, ...], [entry, ...])}
+        self._ids = set()
+        self._token = None
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(prices) for book in self._books.values() for prices, _ in book.values())
+
+    def clear(self):
+        with self._lock:
+            self._books = {}
+            self._ids = set()
+            self._token = None
+
+    def add(self, entry):
+        """Indexes one waiting entry (a pending-store dict). Returns False if it can't trigger."""
+        symbol = (entry.get("Symbol") or "").strip().upper()
+        direction = (entry.get("Direction") or "bullish").lower()
+        if not symbol or direction not in DIRECTIONS:
+            return False
+        try:
+            trigger = _trigger(entry)
+        except (TypeError, ValueError):
+            return False
+        entry_id = entry.get("id")
+        with self._lock:
+            if entry_id is not None and entry_id in self._ids:
+                return True
+            prices, entries = self._books.setdefault(symbol, {}).setdefault(direction, ([], []))
+            # Equal triggers stay in insertion order (ids ascending on a rebuild)
+            position = bisect_right(prices, trigger)
+            prices.insert(position, trigger)
+            entries.insert(position, entry)
+            self._ids.add(entry_id)
+        return True
+
+    def load(self, entries):
+        with self._lock:
+            self._books = {}
+            self._ids = set()
+        for entry in entries:
+            self.add(entry)
+        return self
+
+    def symbols(self):
+        with self._lock:
+            return sorted(self._books)
+
+    def count(self, symbol):
+        with self._lock:
+            book = self._books.get(symbol.upper(), {})
+            return sum(len(prices) for prices, _ in book.values())
+
+    def _take(self, symbol, direction, price):
+        book = self._books.get(symbol)
+        if not book or direction not in book:
+            return []
+        prices, entries = book[direction]
+        if direction == "bullish":
+            cut = bisect_right(prices, price)
+            hit, book[direction] = entries[:cut], (prices[cut:], entries[cut:])
+        else:
+            cut = bisect_left(prices, price)
+            hit, book[direction] = entries[cut:], (prices[:cut], entries[:cut])
+        if not book[direction][0]:
+            del book[direction]
+            if not book:
+                del self._books[symbol]
+        for entry in hit:
+            self._ids.discard(entry.get("id"))
+        return hit
+
+    def on_price(self, symbol, price):
+        """Removes and returns every entry for `symbol` that `price` triggers."""
+        return self.on_bar(symbol, price, price)
+
+    def on_bar(self, symbol, high, low):
+        """Same as on_price() for a bar: bullish triggers are checked against its high, bearish against its low."""
+        symbol = symbol.upper()
+        with self._lock:
+            hit = []
+            if high is not None:
+                hit += self._take(symbol, "bullish", high)
+            if low is not None:
+                hit += self._take(symbol, "bearish", low)
+        return sorted(hit, key=lambda entry: entry.get("id") or 0)
+
+    # --- Keeping up with the store ---
+
+    def sync(self, store):
+        """Reloads the waiting entries from `store` if it changed since the last sync. Returns True on reload."""
+        token = (store, *store.change_token())
+        if token == self._token:
+            return False
+        self.load(store.entries(status="waiting"))
+        self._token = token
+        return True
+
+    def mark_synced(self, store, writes):
+        """
+        Call after writing `writes` row changes the index already reflects (the
+        entries on_price() returned). Any other change since sync() still
+        forces a reload next time.
+        """
+        token = (store, *store.change_token())
+        if self._token is not None and token == (self._token[0], self._token[1], self._token[2] + writes):
+            self._token = token
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_trigger_index():
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = TriggerIndex()
+    return _index